@@ -1,16 +1,20 @@
+import functools
 import logging
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
 
 import pandas as pd
+import sklearn
 from airflow.operators.python import PythonOperator
+from mlflow.exceptions import MlflowException
 from mlflow.pyfunc import PythonModel
-from sklearn.model_selection import train_test_split
 
 import mlflow
+import mlops
 from airflow import DAG
-from mlops.config import MODEL_CONFIG
+from mlops import caching, datasets, profiling
+from mlops.config import MODEL_CONFIG, strtobool
 from mlops.processors.churn import ChurnProcessor
 
 logger = logging.getLogger(__name__)
@@ -27,6 +31,21 @@ default_args = {
 DATA_PATH = Path(os.environ["MLOPS_DATA_PATH"])
 MODEL_PATH = Path(os.environ["MLOPS_MODEL_PATH"])
 MLFLOW_URI = os.environ["MLOPS_MLFLOW_URI"]
+DATASETS_PATH = Path(os.environ.get("MLOPS_DATASETS_PATH", MODEL_PATH.parent / "datasets"))
+
+# Train out of core, streaming the dataset by row group, which can then also be a directory of Parquet parts
+STREAMING = MODEL_CONFIG["models"]["churn"].get("streaming", {}).get("enabled", False)
+
+# Outputs of past runs, reused by the tasks whose inputs did not change
+TASK_CACHE = (
+    caching.TaskCache(
+        os.environ.get("MLOPS_TASK_CACHE_PATH", MODEL_PATH.parent / "task_cache"),
+        max_age=float(os.environ.get("MLOPS_TASK_CACHE_MAX_AGE", 30)),  # Days since last used
+        max_entries=int(os.environ.get("MLOPS_TASK_CACHE_MAX_ENTRIES", 4)),  # Per task
+    )
+    if strtobool(os.environ.get("MLOPS_TASK_CACHE", "true"))
+    else None
+)
 
 
 class ChurnPredictionModel(PythonModel):
@@ -34,64 +53,220 @@ class ChurnPredictionModel(PythonModel):
         self.model = model
 
     def predict(self, context, model_input, params=None):  # type: ignore
-        return self.model.predict(model_input)
+        # Labels and probabilities from a single pass through the pipeline
+        return self.model.score(model_input)
+
+
+@functools.cache
+def code_version() -> dict[str, str]:
+    """Version of the code run by the tasks: the sources of this DAG and of the package, and the libraries they use."""
+    return {
+        "sources": caching.code_version(Path(__file__), Path(mlops.__file__).parent),
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def fingerprint(**inputs) -> str:
+    return caching.fingerprint(code=code_version(), seed=MODEL_CONFIG["models"]["churn"]["random_seed"], **inputs)
+
+
+def reuse(task_instance, key, check=None) -> bool:
+    """Push the output of a past run of the task with the same inputs and restore its files, if it is cached and, when
+    given a check, the check accepts it."""
+    if TASK_CACHE is None or (output := TASK_CACHE.get(task_instance.task_id, key)) is None:
+        return False
+
+    if check is not None and not check(output):
+        TASK_CACHE.drop(task_instance.task_id, key)
+        logger.info("Output of a past run with the same inputs is no longer valid, running again: %s", key)
+        return False
+
+    for name, value in output.items():
+        task_instance.xcom_push(key=name, value=value)
+    logger.info("Inputs unchanged since a past run, its output is reused: %s", key)
+    return True
+
+
+def store(task_instance, key, output, files=()):
+    """Push the output of the task and cache it with the files it wrote."""
+    for name, value in output.items():
+        task_instance.xcom_push(key=name, value=value)
+    if TASK_CACHE is not None:
+        TASK_CACHE.put(task_instance.task_id, key, output, files)
+
+
+def run_exists(run_id) -> bool:
+    """Whether an MLflow run is still kept by the tracking server."""
+    mlflow.set_tracking_uri(MLFLOW_URI)
+    try:
+        return mlflow.get_run(run_id).info.lifecycle_stage != "deleted"
+    except MlflowException:
+        return False
+
+
+def dataset_digest() -> str:
+    """Content hash of the dataset, either a Parquet file or a directory of Parquet parts."""
+    if not DATA_PATH.is_dir():
+        return datasets.digest(DATA_PATH)
+    return caching.fingerprint(
+        data={path.relative_to(DATA_PATH).as_posix(): datasets.digest(path) for path in DATA_PATH.rglob("*.parquet")}
+    )
+
+
+def split_reference(task_instance, key):
+    """Path and hash of a split, or of the whole dataset when streaming, as it is split while it is read."""
+    return task_instance.xcom_pull(key="dataset" if STREAMING else key)
+
+
+def model_files():
+    """Model artifact and, if profiling, its profile report."""
+    return [path for path in (MODEL_PATH, ChurnProcessor.profile_path(MODEL_PATH)) if path.exists()]
+
+
+def pull_split(task_instance, key):
+    # Only the path and hash of the split go through XCom, the data is memory-mapped from the datasets directory
+    dataset = datasets.load_frame(**task_instance.xcom_pull(key=key))
+    target = MODEL_CONFIG["models"]["churn"]["target"]
+    return dataset.drop(columns=[target]), dataset[target]
 
 
 def load_data(**context):
+    if STREAMING:
+        # Only the dataset reference goes through XCom, the next tasks stream it
+        dataset = {"path": DATA_PATH.as_posix(), "sha256": dataset_digest()}
+        context["task_instance"].xcom_push(key="dataset", value=dataset)
+        logger.info("Dataset to be streamed: %s", dataset)
+        return
+
+    churn_config = MODEL_CONFIG["models"]["churn"]
+    key = fingerprint(
+        data={"dataset": dataset_digest()},
+        config={
+            name: churn_config[name]
+            for name in ("target", "test_size", "id_column", "profiling")
+            if name in churn_config
+        },
+    )
+    if reuse(context["task_instance"], key):
+        return
+
+    profiling_config = MODEL_CONFIG["models"]["churn"].get("profiling", {})
+    profiler = (
+        profiling.Profiler(memory=profiling_config.get("memory", True)) if profiling_config.get("enabled") else None
+    )
+
     # Load the dataset
-    dataset = pd.read_parquet(DATA_PATH)
+    with profiling.section(profiler, "load_data/read_parquet"):
+        dataset = pd.read_parquet(DATA_PATH)
     logger.info("Read parquet from: %s", DATA_PATH.as_posix())
 
     # Split the dataset into train and test sets
     X = dataset.drop(columns=[MODEL_CONFIG["models"]["churn"]["target"]])
     y = dataset[MODEL_CONFIG["models"]["churn"]["target"]]
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X,
-        y,
-        test_size=MODEL_CONFIG["models"]["churn"]["test_size"],
-        random_state=MODEL_CONFIG["models"]["churn"]["random_seed"],
-    )
+    # Split by a hash of the ids, so rows a previous model was trained on never end up in the test split once the
+    # dataset grows, which would inflate the metrics of the warm-started model
+    with profiling.section(profiler, "load_data/train_test_split"):
+        test = datasets.hash_split(
+            X[churn_config.get("id_column", "CustomerId")], churn_config["test_size"], churn_config["random_seed"]
+        )
+        X_train, X_test, y_train, y_test = X[~test], X[test], y[~test], y[test]
     logger.info("Tran-test split done")
 
-    # Push data to XCom
-    logger.info("Pushing data to XCom")
-    context["task_instance"].xcom_push(key="X_train", value=X_train.to_dict())  # type: ignore
-    context["task_instance"].xcom_push(key="X_test", value=X_test.to_dict())  # type: ignore
-    context["task_instance"].xcom_push(key="y_train", value=y_train.to_list())  # type: ignore
-    context["task_instance"].xcom_push(key="y_test", value=y_test.to_list())  # type: ignore
+    # Store splits as Arrow files and push their references to XCom
+    train = datasets.save_frame(pd.concat([X_train, y_train], axis=1), DATASETS_PATH)
+    test = datasets.save_frame(pd.concat([X_test, y_test], axis=1), DATASETS_PATH)
+    logger.info("Splits stored at: %s, %s", train["path"], test["path"])
+    output = {"train": train, "test": test}
+    if profiler is not None:
+        # Added to the profile report written next to the artifact by the train task
+        output["profile"] = profiler.records
+    store(context["task_instance"], key, output, files=[train["path"], test["path"]])
 
 
 def train_model(**context):
-    # Pull data from XCom
-    task_instance = context["task_instance"]
-    X_train = pd.DataFrame(task_instance.xcom_pull(key="X_train"))
-    y_train = pd.Series(task_instance.xcom_pull(key="y_train"))
-    logger.info("Data loaded successfully from XCom")
-
-    # Train model
-    model = ChurnProcessor().train(X_train, y_train)
-    logger.info("Model trained successfully")
+    if STREAMING:
+        train_model_stream(context["task_instance"])
+        return
+
+    train = context["task_instance"].xcom_pull(key="train")
+
+    # A warm-started model also depends on the previous one, which records the split it was trained on
+    retrain_enabled = MODEL_CONFIG["models"]["churn"].get("retrain", {}).get("enabled")
+    previous_digest = datasets.digest(MODEL_PATH) if retrain_enabled and MODEL_PATH.exists() else None
+    data = {"train": train["sha256"], **({"previous": previous_digest} if previous_digest else {})}
+    key = fingerprint(data=data, config=MODEL_CONFIG["models"]["churn"])
+    if reuse(context["task_instance"], key):
+        return
+
+    # Warm-start the previous model on the rows not in the split it was trained on, if that split is still stored
+    previous = ChurnProcessor.load(MODEL_PATH.as_posix()) if previous_digest else None
+    seen = previous.training.get("dataset") if previous is not None else None
+    retrain = seen is not None and Path(seen["path"]).exists()
+
+    # Load train split
+    X_train, y_train = pull_split(context["task_instance"], "train")
+    logger.info("Train split loaded successfully")
+
+    model = previous if retrain else ChurnProcessor()
+    if model.profiler is not None:
+        model.profiler.add(context["task_instance"].xcom_pull(key="profile") or [])
+
+    if retrain:
+        new = datasets.difference(datasets.load_frame(**train), datasets.load_frame(**seen)).index
+        model.retrain(X_train, y_train, new)
+        if model.training["mode"] == "unchanged":
+            # Dumping it again would only change its id and timestamp, and so the inputs of every next task
+            logger.info("No new rows, the previous model is kept at: %s", MODEL_PATH.as_posix())
+            store(context["task_instance"], key, {}, files=model_files())
+            return
+    else:
+        model.train(X_train, y_train)
+    model.training["dataset"] = train
+    logger.info("Model trained successfully: %s", model.training)
 
     # Store the trained model temporarily
     MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
     model.dump(metrics={}, model_path=MODEL_PATH.as_posix())
     logger.info("Model stored without metrics at: %s", MODEL_PATH.as_posix())
+    store(context["task_instance"], key, {}, files=model_files())
+
+
+def train_model_stream(task_instance):
+    dataset = task_instance.xcom_pull(key="dataset")
+    key = fingerprint(data={"dataset": dataset["sha256"]}, config=MODEL_CONFIG["models"]["churn"])
+    if reuse(task_instance, key):
+        return
+
+    # Preprocessing statistics in a single pass over the train rows, then the classifier epoch by epoch
+    model = ChurnProcessor().train_stream(dataset["path"])
+    model.training["dataset"] = dataset
+    logger.info("Model trained successfully: %s", model.training)
+
+    MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
+    model.dump(metrics={}, model_path=MODEL_PATH.as_posix())
+    logger.info("Model stored without metrics at: %s", MODEL_PATH.as_posix())
+    store(task_instance, key, {}, files=model_files())
 
 
 def evaluate_model(**context):
     """Evaluate the model and compute metrics"""
-    # Get test data from XCom
-    task_instance = context["task_instance"]
-    X_test = pd.DataFrame(task_instance.xcom_pull(key="X_test"))
-    y_test = pd.Series(task_instance.xcom_pull(key="y_test"))
+    test = split_reference(context["task_instance"], "test")
+    key = fingerprint(data={"model": datasets.digest(MODEL_PATH), "test": test["sha256"]})
+    if reuse(context["task_instance"], key):
+        return
 
-    # Load the trained model
-    model = ChurnProcessor.load(MODEL_PATH.as_posix())
+    # Load the trained model, adding to its profile report if profiling
+    model = ChurnProcessor.load(MODEL_PATH.as_posix(), resume_profile=True)
     logger.info("Model loaded from: %s", MODEL_PATH.as_posix())
 
-    # Compute metrics
-    metrics = model.compute_metrics(X_test, y_test)
+    # Compute metrics from a single pass through the pipeline, streaming the test rows if training out of core
+    if STREAMING:
+        metrics = model.compute_metrics_stream(test["path"])
+    else:
+        X_test, y_test = pull_split(context["task_instance"], "test")
+        metrics = model.compute_metrics(X_test, y_test)
     logger.info("Metrics computed: %s", metrics)
 
     # Save final model with metrics
@@ -99,15 +274,28 @@ def evaluate_model(**context):
     logger.info("Model stored with metrics at: %s", MODEL_PATH.as_posix())
 
     # Push metrics to XCom
-    context["task_instance"].xcom_push(key="metrics", value=metrics)
+    store(context["task_instance"], key, {"metrics": metrics}, files=model_files())
     logger.info("Metrics pushed to XCom")
 
+    # The evaluated artifact is the input of the next run if the model is kept, so it is cached as already evaluated
+    if TASK_CACHE is not None:
+        evaluated = fingerprint(data={"model": datasets.digest(MODEL_PATH), "test": test["sha256"]})
+        TASK_CACHE.put(context["task_instance"].task_id, evaluated, {"metrics": metrics}, files=model_files())
+
 
 def mlflow_register_model(**context):
     # Pull metrics from XCom
     task_instance = context["task_instance"]
     metrics = task_instance.xcom_pull(key="metrics")
 
+    # The same model is not registered again while the run registering it is kept
+    key = fingerprint(
+        data={"model": datasets.digest(MODEL_PATH)},
+        config={"uri": MLFLOW_URI, "metrics": metrics, "params": MODEL_CONFIG["models"]["churn"]},
+    )
+    if reuse(task_instance, key, check=lambda output: run_exists(output["run_id"])):
+        return
+
     # Set the experiment
     mlflow.set_tracking_uri(MLFLOW_URI)
     mlflow.set_experiment("churn-prediction-loyola")
@@ -124,10 +312,23 @@ def mlflow_register_model(**context):
             python_model=ChurnPredictionModel(model),
             artifacts={"model": MODEL_PATH.as_posix()},
         )
+
+        # Log the training profile, if profiling
+        if (profile_path := ChurnProcessor.profile_path(MODEL_PATH)).exists():
+            mlflow.log_artifact(profile_path.as_posix())
+            profile = profiling.Profiler.read(profile_path).records
+            mlflow.log_metrics(
+                {
+                    f"profile/{section['name']}/{measure}": value
+                    for section in profile
+                    for measure, value in section.items()
+                    if measure != "name"
+                }
+            )
         run_id = mlflow.active_run().info.run_id
 
     # Push run_id to XCom
-    context["task_instance"].xcom_push(key="run_id", value=run_id)
+    store(task_instance, key, {"run_id": run_id})
     logger.info("Run ID pushed to XCom: %s", run_id)
 
 
@@ -135,19 +336,31 @@ def mlflow_load_model(**context):
     # Pull test data from XCom
     task_instance = context["task_instance"]
     run_id = task_instance.xcom_pull(key="run_id")
+    key = fingerprint(
+        data={"test": split_reference(task_instance, "test")["sha256"]}, config={"uri": MLFLOW_URI, "run_id": run_id}
+    )
+    if reuse(task_instance, key, check=lambda output: run_exists(run_id)):
+        return
 
     # Load the model
     mlflow.set_tracking_uri(MLFLOW_URI)
     model = mlflow.pyfunc.load_model(f"runs:/{run_id}/model")
 
-    # Make predictions
-    X_test = pd.DataFrame(task_instance.xcom_pull(key="X_test")).values
+    # Make predictions, on the test rows of the first row group only when streaming
+    if STREAMING:
+        churn_config = MODEL_CONFIG["models"]["churn"]
+        row_group = datasets.read_row_group(datasets.row_groups(DATA_PATH)[0])
+        ids = row_group[churn_config.get("id_column", "CustomerId")]
+        X_test = row_group[datasets.hash_split(ids, churn_config["test_size"], churn_config["random_seed"])]
+        X_test = X_test.drop(columns=[churn_config["target"]])
+    else:
+        X_test, _ = pull_split(task_instance, "test")
+    X_test = X_test.values
     predictions = model.predict(X_test)
     logger.info("Predictions: %s", predictions)
 
     # Push predictions to XCom
-    context["task_instance"].xcom_push(key="predictions", value=predictions[0].tolist())
-    context["task_instance"].xcom_push(key="scores", value=predictions[1].tolist())
+    store(task_instance, key, {"predictions": predictions[0].tolist(), "scores": predictions[1].tolist()})
     logger.info("Predictions pushed to XCom")
 
 
@@ -0,0 +1,93 @@
+"""Measure the training time saved by caching fitted preprocessing across CV folds and search candidates.
+
+Every search worker process has a cache of its own, whose statistics are added up. Workers are stopped after every run,
+so that the next one starts with empty caches.
+
+Usage:
+    python benchmarks/cache.py --sample 0.5 --output cache.json
+"""
+import argparse
+import json
+import logging
+import time
+
+import pandas as pd
+
+from mlops.config import MODEL_CONFIG, ROOT_PATH
+from mlops.pipelines import ChurnPipeline, Execution, TransformerCache
+
+logger = logging.getLogger(__name__)
+
+
+def run(X, y, enabled, n_jobs):
+    churn_config = MODEL_CONFIG["models"]["churn"]
+    numeric_features = [
+        X.columns.get_loc(c)
+        for c in X.select_dtypes(include=["int64", "float64"]).drop(churn_config["drop_features"]["numerical"], axis=1)
+    ]
+    categorical_features = [
+        X.columns.get_loc(c)
+        for c in X.select_dtypes(include=["object"]).drop(churn_config["drop_features"]["categorical"], axis=1)
+    ]
+    search = ChurnPipeline(
+        churn_config["param_grid"],
+        numeric_features=numeric_features,
+        categorical_features=categorical_features,
+        search=churn_config.get("search"),
+        cache={**churn_config.get("cache", {}), "enabled": enabled},
+    ).build()
+    search.set_params(n_jobs=n_jobs)
+
+    memory = search.estimator.memory
+    if isinstance(memory, TransformerCache):
+        memory.clear()
+
+    start = time.perf_counter()
+    search.fit(X, y)
+    elapsed = time.perf_counter() - start
+    stats = memory.stats() if isinstance(memory, TransformerCache) else None
+    Execution("processes").release()
+
+    return {
+        "cache": enabled,
+        "seconds": elapsed,
+        "mean_fit_time": float(search.cv_results_["mean_fit_time"].mean()),
+        "stats": stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sample", type=float, default=1.0, help="Fraction of the dataset to use")
+    parser.add_argument("--max-iter", type=int, default=None, help="Override the MLP max_iter to shorten the run")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Search worker processes, -1 for one per core")
+    parser.add_argument("--output", default=None, help="JSON report path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    churn_config = MODEL_CONFIG["models"]["churn"]
+    if args.max_iter:
+        churn_config["param_grid"]["mlp_classifier__max_iter"] = [args.max_iter]
+
+    dataset = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet")
+    dataset = dataset.sample(frac=args.sample, random_state=churn_config["random_seed"])
+    X = dataset.drop(columns=[churn_config["target"]])
+    y = dataset[churn_config["target"]]
+
+    results = [run(X, y, enabled=False, n_jobs=args.n_jobs), run(X, y, enabled=True, n_jobs=args.n_jobs)]
+    for result in results:
+        logger.info(
+            "cache=%-5s %8.1fs  mean fit %.3fs  %s",
+            result["cache"],
+            result["seconds"],
+            result["mean_fit_time"],
+            result["stats"] or "",
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
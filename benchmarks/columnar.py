@@ -0,0 +1,129 @@
+"""Compare the throughput of the row-oriented and the columnar churn prediction endpoints.
+
+The same rows are sent to ``/churn/predict/`` as JSON rows and to ``/churn/predict/columnar/`` both as column-oriented
+JSON and as an Arrow IPC stream, with the API running in-process in a fresh process per backend. Bodies are encoded once
+beforehand, so the report measures decoding and inference on the server, in rows per second for every batch size.
+
+Usage:
+    python benchmarks/columnar.py --backends sklearn numpy --batch-sizes 1 100 10000 --rows 20000 --output columnar.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import time
+import warnings
+
+import pandas as pd
+import pyarrow as pa
+
+from mlops.config import MODEL_CONFIG, ROOT_PATH
+
+logger = logging.getLogger(__name__)
+
+
+def bodies(X: pd.DataFrame, drop: list[str]) -> dict[str, tuple[bytes, str]]:
+    rows = X.astype(object).where(X.notna(), None).values.tolist()
+    columns = X.drop(columns=drop)
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(columns, preserve_index=False)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    return {
+        "rows-json": (json.dumps({"input": rows}).encode(), "application/json"),
+        "columns-json": (
+            json.dumps(
+                {"columns": {k: v.astype(object).where(v.notna(), None).tolist() for k, v in columns.items()}}
+            ).encode(),
+            "application/json",
+        ),
+        "columns-arrow": (sink.getvalue().to_pybytes(), "application/vnd.apache.arrow.stream"),
+    }
+
+
+async def serve(X, batch_sizes, total_rows, drop):
+    from flama.client import Client
+
+    from mlops.app import app
+
+    results = []
+    async with Client(app=app) as client:
+        while (await client.get("/ping/")).status_code != 200:  # Model loads in the background
+            await asyncio.sleep(0.01)
+
+        for batch_size in batch_sizes:
+            requests = max(total_rows // batch_size, 5)
+            batch = X.sample(n=batch_size, replace=batch_size > len(X), random_state=0)
+            for payload, (body, content_type) in bodies(batch, drop).items():
+                path = "/churn/predict/" if payload == "rows-json" else "/churn/predict/columnar/"
+                headers = {"content-type": content_type}
+                (await client.post(path, content=body, headers=headers)).raise_for_status()
+                start = time.perf_counter()
+                for _ in range(requests):
+                    response = await client.post(path, content=body, headers=headers)
+                response.raise_for_status()
+                seconds = time.perf_counter() - start
+                results.append(
+                    {
+                        "payload": payload,
+                        "batch_size": batch_size,
+                        "body_bytes": len(body),
+                        "requests": requests,
+                        "rows_per_second": requests * batch_size / seconds,
+                    }
+                )
+
+    return results
+
+
+def measure(X, batch_sizes, total_rows, drop, queue):
+    warnings.simplefilter("ignore")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    queue.put(asyncio.run(serve(X, batch_sizes, total_rows, drop)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=("sklearn", "numpy"), default=["sklearn", "numpy"])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 10000], help="Rows per request")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows sent per batch size and payload")
+    parser.add_argument("--output", default=None, help="JSON report path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    churn_config = MODEL_CONFIG["models"]["churn"]
+    dataset = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet")
+    X = dataset.drop(columns=[churn_config["target"]])
+    drop = churn_config["drop_features"]["numerical"] + churn_config["drop_features"]["categorical"]
+
+    context = multiprocessing.get_context("spawn")
+    report = []
+    for backend in args.backends:
+        # Settings are read when the config module is imported, so they must be in the environment the process inherits
+        os.environ.update(CHURN_BACKEND=backend, METRICS="false", CHURN_RELOAD_INTERVAL="0")
+        queue = context.Queue()
+        process = context.Process(target=measure, args=(X, args.batch_sizes, args.rows, drop, queue))
+        process.start()
+        results = queue.get()
+        process.join()
+        for result in results:
+            logger.info(
+                "%-7s %-14s batch %6d  %9d bytes  %10.0f rows/s",
+                backend,
+                result["payload"],
+                result["batch_size"],
+                result["body_bytes"],
+                result["rows_per_second"],
+            )
+            report.append({"backend": backend, **result})
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Compare peak memory and throughput of the compact churn preprocessing with the previous float64 one.
+
+The dataset is repeated ``--scales`` times. The ``legacy`` layout rebuilds the previous preprocessing: float64 numerical
+columns copied by every step and a sparse float64 one-hot block stacked with them by the column transformer. The
+``compact`` layout is the current one: numerical columns cast once to float32 and transformed in place, next to a dense
+float32 one-hot block. Scoring is also run on the compiled NumPy engine, which keeps categories as small integer codes.
+
+Every scenario runs in a fresh process, training a single pipeline with fixed params for ``--max-iter`` epochs, or
+scoring the data in chunks with a pipeline trained on the original dataset. Peak memory is the growth of the max RSS
+of the process over the one it had once the data was loaded.
+
+Usage:
+    python benchmarks/compact.py --scales 10 100 --max-iter 5 --output compact.json
+"""
+import argparse
+import json
+import logging
+import subprocess
+import sys
+
+logger = logging.getLogger(__name__)
+
+CHILD = """
+import json, resource, sys, time, warnings
+import numpy as np
+import pandas as pd
+from mlops.config import MODEL_CONFIG, ROOT_PATH
+from mlops.engines import ChurnEngine
+from mlops.pipelines import ChurnPipeline
+
+warnings.filterwarnings("ignore")
+task, layout = sys.argv[1], sys.argv[2]
+scale, max_iter, chunk_size = int(sys.argv[3]), int(sys.argv[4]), int(sys.argv[5])
+config = MODEL_CONFIG["models"]["churn"]
+dataset = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet")
+X, y = dataset.drop(columns=[config["target"]]), dataset[config["target"]]
+
+estimator = ChurnPipeline(
+    {},
+    numeric_features=X.select_dtypes("number").columns,
+    categorical_features=X.select_dtypes("object").columns,
+).build().estimator
+estimator.set_params(
+    mlp_classifier__hidden_layer_sizes=config["param_grid"]["mlp_classifier__hidden_layer_sizes"][0],
+    mlp_classifier__max_iter=max_iter,
+)
+if layout == "legacy":
+    estimator.set_params(
+        preprocessing__sparse_threshold=0.3,
+        preprocessing__numerical__cast="passthrough",
+        preprocessing__numerical__imputer__copy=True,
+        preprocessing__numerical__scaler__copy=True,
+        preprocessing__categorical__onehot__sparse_output=True,
+        preprocessing__categorical__onehot__dtype=np.float64,
+    )
+if task == "score":
+    estimator.fit(X, y)
+    model = ChurnEngine.from_estimator(estimator) if layout == "numpy" else estimator
+
+X, y = pd.concat([X] * scale, ignore_index=True), pd.concat([y] * scale, ignore_index=True)
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if task == "train":
+    estimator.fit(X, y)
+else:
+    for i in range(0, len(X), chunk_size):
+        model.predict_proba(X.iloc[i : i + chunk_size])
+seconds = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+print(json.dumps({"rows": len(X), "seconds": seconds, "rows_per_second": len(X) / seconds, "peak_mb": peak / 1024}))
+"""
+
+SCENARIOS = [("train", "legacy"), ("train", "compact"), ("score", "legacy"), ("score", "compact"), ("score", "numpy")]
+
+
+def run(task, layout, scale, max_iter, chunk_size):
+    child = subprocess.run(
+        [sys.executable, "-c", CHILD, task, layout, str(scale), str(max_iter), str(chunk_size)],
+        capture_output=True,
+        text=True,
+    )
+    if child.returncode:
+        raise RuntimeError(f"Scenario {task}/{layout} at scale {scale} failed:\n{child.stderr}")
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100], help="Times the dataset is repeated")
+    parser.add_argument("--max-iter", type=int, default=5, help="MLP epochs of the training scenarios")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows per scoring chunk")
+    parser.add_argument("--output", help="JSON report path")
+    args = parser.parse_args()
+
+    report = []
+    for scale in args.scales:
+        for task, layout in SCENARIOS:
+            result = {"task": task, "layout": layout, "scale": scale}
+            result.update(run(task, layout, scale, args.max_iter, args.chunk_size))
+            logger.info(
+                "%-5s x%-4d %-7s %12.0f rows/s  peak %8.1f MB",
+                task,
+                scale,
+                layout,
+                result["rows_per_second"],
+                result["peak_mb"],
+            )
+            report.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,124 @@
+"""Measure training time and peak memory of the churn search for every execution backend and worker count.
+
+Every run trains in a fresh process on the same train split. Memory is sampled during the whole run as the sum of the
+proportional set size (PSS) of the training process and its workers, so pages shared through the memory-mapped training
+data are not counted once per worker. Process workers are run both sharing the data and getting a pickled copy per fit.
+Time can only improve with workers up to the number of available cores.
+
+Usage:
+    python benchmarks/execution.py --workers 1 2 4 --max-iter 200 --scale 10 --output execution.json
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+CHILD = """
+import copy, json, sys, time, warnings
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from mlops.config import MODEL_CONFIG, ROOT_PATH
+from mlops.processors.churn import ChurnProcessor
+
+warnings.filterwarnings("ignore")
+execution, sample, max_iter, scale = json.loads(sys.argv[1]), float(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4])
+config = copy.deepcopy(MODEL_CONFIG)
+churn_config = config["models"]["churn"]
+churn_config["execution"] = execution
+churn_config["param_grid"]["mlp_classifier__max_iter"] = [max_iter]
+dataset = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet")
+dataset = dataset.sample(frac=sample, random_state=churn_config["random_seed"])
+dataset = pd.concat([dataset] * scale, ignore_index=True)
+X_train, _, y_train, _ = train_test_split(
+    dataset.drop(columns=[churn_config["target"]]),
+    dataset[churn_config["target"]],
+    test_size=churn_config["test_size"],
+    random_state=churn_config["random_seed"],
+)
+start = time.perf_counter()
+processor = ChurnProcessor(config).train(X_train, y_train)
+print(json.dumps({"seconds": time.perf_counter() - start, "best_cv_roc_auc": processor.pipeline.best_score_}))
+"""
+
+
+def pss(process):
+    total = 0
+    for p in [process, *process.children(recursive=True)]:
+        try:
+            total += p.memory_full_info().pss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            ...
+    return total
+
+
+def run(execution, sample, max_iter, scale, interval=0.2):
+    child = subprocess.Popen(
+        [sys.executable, "-c", CHILD, json.dumps(execution), str(sample), str(max_iter), str(scale)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    process, peak, done = psutil.Process(child.pid), 0, threading.Event()
+
+    def sample_memory():
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, pss(process))
+            time.sleep(interval)
+
+    sampler = threading.Thread(target=sample_memory)
+    sampler.start()
+    stdout, _ = child.communicate()
+    done.set()
+    sampler.join()
+
+    if child.returncode:
+        raise RuntimeError(f"Training with {execution} failed")
+    return {**json.loads(stdout.strip().splitlines()[-1]), "peak_pss_mb": peak / 1024**2}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts")
+    parser.add_argument("--sample", type=float, default=1.0, help="Fraction of the dataset to use")
+    parser.add_argument("--max-iter", type=int, default=200, help="MLP iterations of every candidate")
+    parser.add_argument("--scale", type=int, default=1, help="Times the dataset is repeated, to grow the training data")
+    parser.add_argument("--output", help="JSON report path")
+    args = parser.parse_args()
+
+    scenarios = [("serial", {"backend": "serial"})]
+    for workers in args.workers:
+        scenarios += [
+            (f"processes-{workers}", {"backend": "processes", "n_jobs": workers}),
+            (f"processes-{workers}-copy", {"backend": "processes", "n_jobs": workers, "share": False}),
+            (f"threads-{workers}", {"backend": "threads", "n_jobs": workers}),
+        ]
+
+    report = []
+    for name, execution in scenarios:
+        result = {"scenario": name, **execution, **run(execution, args.sample, args.max_iter, args.scale)}
+        logger.info(
+            "%-22s %8.1fs  peak PSS %7.1f MB  cv roc_auc %.4f",
+            name,
+            result["seconds"],
+            result["peak_pss_mb"],
+            result["best_cv_roc_auc"],
+        )
+        report.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cpus": os.cpu_count(), "results": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
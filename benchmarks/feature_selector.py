@@ -0,0 +1,72 @@
+"""Compare the vectorized FeatureSelector.fit against the former per-column np.corrcoef implementation.
+
+Usage:
+    python benchmarks/feature_selector.py --rows 5000 --widths 10 100 1000 10000 --output feature_selector.json
+"""
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+
+from mlops.transformers import FeatureSelector
+
+logger = logging.getLogger(__name__)
+
+
+def legacy_fit(X, y, threshold=0.1):
+    correlations = np.array([abs(np.corrcoef(X[:, i], y)[0, 1]) for i in range(X.shape[1])])
+    return correlations >= threshold
+
+
+def timeit(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--widths", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per block for the chunked mode")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None, help="JSON report path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    rng = np.random.default_rng(0)
+    results = []
+    for width in args.widths:
+        X = rng.normal(size=(args.rows, width))
+        y = X[:, : max(width // 10, 1)].sum(axis=1) + rng.normal(size=args.rows)
+
+        assert np.array_equal(legacy_fit(X, y), FeatureSelector().fit(X, y).selected_features_)
+        result = {
+            "rows": args.rows,
+            "width": width,
+            "legacy_seconds": timeit(lambda: legacy_fit(X, y), args.repeat),
+            "vectorized_seconds": timeit(lambda: FeatureSelector().fit(X, y), args.repeat),
+            "chunked_seconds": timeit(lambda: FeatureSelector(chunk_size=args.chunk_size).fit(X, y), args.repeat),
+        }
+        results.append(result)
+        logger.info(
+            "%6d features  legacy %8.4fs  vectorized %8.4fs  chunked %8.4fs  speedup x%.0f",
+            width,
+            result["legacy_seconds"],
+            result["vectorized_seconds"],
+            result["chunked_seconds"],
+            result["legacy_seconds"] / result["vectorized_seconds"],
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""Load test the API and compare the results with a baseline.
+
+``run`` starts the API locally with ``python -m mlops run`` and, for every combination of concurrency and batch size,
+keeps that many clients sending predictions back to back for a fixed time after a warm up. Requests are either replayed
+from a JSONL file, one request body per line (or ``{"path": ..., "body": ...}`` for other endpoints), or built from
+rows drawn with a fixed seed from ``data/churn/data.parquet``. Every scenario reports the p50/p95/p99 latency, the
+throughput and the CPU usage and peak RSS of the server processes, and the report is written as JSON.
+
+``compare`` checks a report against a baseline report and exits with an error if any scenario regressed by more than
+the tolerance: lower throughput, higher p95/p99 latency or higher peak RSS.
+
+Usage:
+    python benchmarks/load.py run --concurrency 1 8 --batch-sizes 1 100 --duration 10 --output load.json
+    python benchmarks/load.py run --requests requests.jsonl --concurrency 4 --output load.json
+    python benchmarks/load.py compare load.json baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+import psutil
+
+from mlops.config import ROOT_PATH
+
+logger = logging.getLogger(__name__)
+
+PREDICT_PATH = "/churn/predict/"
+
+# Metric: whether higher values are better
+METRICS = {"requests_per_second": True, "p95_ms": False, "p99_ms": False, "peak_rss_mb": False}
+
+
+def wait_ready(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/ping/").status_code == 200:
+                return
+        except httpx.TransportError:
+            ...
+        time.sleep(0.2)
+    raise TimeoutError(f"Server at {url} not ready after {timeout}s")
+
+
+def replayed(path):
+    """Requests of a JSONL file, either predict bodies or ``{"path": ..., "body": ...}`` objects."""
+    requests = []
+    with open(path) as f:
+        for line in filter(str.strip, f):
+            request = json.loads(line)
+            if "body" in request:
+                requests.append((request.get("path", PREDICT_PATH), request["body"]))
+            else:
+                requests.append((PREDICT_PATH, request))
+    return requests
+
+
+def synthetic(rows, batch_size, n_requests, seed):
+    """Predict requests of rows drawn from the dataset."""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(rows), size=(n_requests, batch_size))
+    return [(PREDICT_PATH, {"input": [rows[i] for i in batch]}) for batch in picks]
+
+
+class Sampler:
+    """Sample CPU and RSS of a process and its children in a background thread."""
+
+    def __init__(self, pid, interval=0.2):
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.peak_rss = 0
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _processes(self):
+        return [self.process, *self.process.children(recursive=True)]
+
+    def _cpu_seconds(self):
+        total = 0.0
+        for p in self._processes():
+            try:
+                times = p.cpu_times()
+                total += times.user + times.system
+            except psutil.NoSuchProcess:
+                ...
+        return total
+
+    def _sample(self):
+        while not self._done.is_set():
+            rss = 0
+            for p in self._processes():
+                try:
+                    rss += p.memory_info().rss
+                except psutil.NoSuchProcess:
+                    ...
+            self.peak_rss = max(self.peak_rss, rss)
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._start = (time.monotonic(), self._cpu_seconds())
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+        wall, cpu = time.monotonic() - self._start[0], self._cpu_seconds() - self._start[1]
+        self.cpu_percent = 100 * cpu / wall
+
+
+async def load(url, requests, concurrency, duration):
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def client(offset):
+        nonlocal errors
+        async with httpx.AsyncClient(base_url=url, timeout=60) as c:
+            i = offset
+            while time.monotonic() < deadline:
+                path, body = requests[i % len(requests)]
+                start = time.perf_counter()
+                response = await c.post(path, json=body)
+                if response.is_success:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+                i += concurrency
+
+    start = time.monotonic()
+    await asyncio.gather(*[client(i) for i in range(concurrency)])
+    return np.asarray(latencies), errors, time.monotonic() - start
+
+
+def measure(url, pid, requests, concurrency, duration, warmup):
+    asyncio.run(load(url, requests, concurrency, warmup))
+    with Sampler(pid) as sampler:
+        latencies, errors, seconds = asyncio.run(load(url, requests, concurrency, duration))
+
+    rows = [len(body["input"]) if "input" in body else 1 for _, body in requests]
+    p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99]) if len(latencies) else (np.nan,) * 3
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": len(latencies) / seconds,
+        "rows_per_second": len(latencies) * float(np.mean(rows)) / seconds,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "cpu_percent": sampler.cpu_percent,
+        "peak_rss_mb": sampler.peak_rss / 1024**2,
+    }
+
+
+def run(args):
+    if args.requests:
+        requests = {None: replayed(args.requests)}
+    else:
+        df = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet").drop(columns="Exited")
+        rows = df.astype(object).where(df.notna(), None).values.tolist()
+        requests = {b: synthetic(rows, b, args.synthetic_requests, args.seed) for b in args.batch_sizes}
+
+    url = f"http://127.0.0.1:{args.port}"
+    env = {**os.environ, **dict(e.split("=", 1) for e in args.env), "PORT": str(args.port)}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "mlops", "run", "--workers", str(args.workers)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    results = []
+    try:
+        wait_ready(url)
+        for batch_size, batch_requests in requests.items():
+            for concurrency in args.concurrency:
+                scenario = f"c{concurrency}" if batch_size is None else f"c{concurrency}-b{batch_size}"
+                result = measure(url, server.pid, batch_requests, concurrency, args.duration, args.warmup)
+                results.append({"scenario": scenario, "concurrency": concurrency, "batch_size": batch_size, **result})
+                logger.info(
+                    "%-12s %8.1f req/s %10.1f rows/s  p50 %7.2f  p95 %7.2f  p99 %7.2f ms  cpu %5.1f%%  rss %7.1f MB"
+                    "  errors %d",
+                    scenario,
+                    result["requests_per_second"],
+                    result["rows_per_second"],
+                    result["p50_ms"],
+                    result["p95_ms"],
+                    result["p99_ms"],
+                    result["cpu_percent"],
+                    result["peak_rss_mb"],
+                    result["errors"],
+                )
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "workers": args.workers,
+            "duration": args.duration,
+            "requests": str(args.requests) if args.requests else None,
+            "env": args.env,
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if any(result["errors"] for result in results):
+        sys.exit("Some requests failed")
+
+
+def compare(args):
+    with open(args.report) as f:
+        current = {r["scenario"]: r for r in json.load(f)["results"]}
+    with open(args.baseline) as f:
+        baseline = {r["scenario"]: r for r in json.load(f)["results"]}
+
+    regressions = []
+    for scenario, base in baseline.items():
+        if scenario not in current:
+            logger.warning("Scenario '%s' of the baseline is missing from the report", scenario)
+            continue
+        for metric, higher_is_better in METRICS.items():
+            change = current[scenario][metric] / base[metric] - 1 if base[metric] else 0.0
+            regressed = -change > args.tolerance if higher_is_better else change > args.tolerance
+            logger.info(
+                "%-12s %-20s %10.2f -> %10.2f  %+6.1f%%%s",
+                scenario,
+                metric,
+                base[metric],
+                current[scenario][metric],
+                change * 100,
+                "  REGRESSION" if regressed else "",
+            )
+            if regressed:
+                regressions.append(f"{scenario} {metric}")
+
+    if regressions:
+        sys.exit(f"Regressions above {args.tolerance:.0%}: {', '.join(regressions)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(required=True)
+
+    run_parser = subparsers.add_parser("run", help="Load test the API")
+    run_parser.add_argument("--requests", default=None, help="JSONL file of requests to replay")
+    run_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8], help="Concurrent clients")
+    run_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100], help="Rows per synthetic request")
+    run_parser.add_argument("--synthetic-requests", type=int, default=1000, help="Distinct synthetic requests")
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic rows")
+    run_parser.add_argument("--duration", type=float, default=10, help="Load duration in seconds per scenario")
+    run_parser.add_argument("--warmup", type=float, default=2, help="Warm up duration in seconds per scenario")
+    run_parser.add_argument("--workers", type=int, default=1, help="Server processes")
+    run_parser.add_argument("--env", nargs="*", default=[], help="Server settings, as KEY=VALUE")
+    run_parser.add_argument("--port", type=int, default=8766)
+    run_parser.add_argument("--output", default=None, help="JSON report path")
+    run_parser.set_defaults(command=run)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare a report with a baseline")
+    compare_parser.add_argument("report", help="JSON report path")
+    compare_parser.add_argument("baseline", help="JSON baseline report path")
+    compare_parser.add_argument("--tolerance", type=float, default=0.2, help="Relative change allowed")
+    compare_parser.set_defaults(command=compare)
+
+    args = parser.parse_args()
+    args.command(args)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    main()
@@ -0,0 +1,113 @@
+"""Measure the overhead of the metrics middleware and stage timers on the serving latency.
+
+The API runs in-process, once with metrics enabled and once disabled, each in a fresh process, and serves the same
+sequence of single row predictions and pings. The report includes the mean time per request for both and the cost of a
+single histogram observation.
+
+Usage:
+    python benchmarks/metrics.py --requests 2000 --output metrics.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import time
+import warnings
+
+import pandas as pd
+
+from mlops.config import ROOT_PATH
+
+logger = logging.getLogger(__name__)
+
+
+async def serve(n_requests):
+    from flama.client import Client
+
+    from mlops.app import app
+
+    df = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet").drop(columns="Exited").head(n_requests)
+    rows = df.astype(object).where(df.notna(), None).values.tolist()
+
+    async with Client(app=app) as client:
+        while (await client.get("/ping/")).status_code != 200:  # Model loads in the background
+            await asyncio.sleep(0.01)
+        for row in rows[:100]:  # Warm up
+            await client.post("/churn/predict/", json={"input": [row]})
+
+        start = time.perf_counter()
+        for row in rows:
+            await client.post("/churn/predict/", json={"input": [row]})
+        predict = (time.perf_counter() - start) / len(rows)
+
+        start = time.perf_counter()
+        for _ in rows:
+            await client.get("/ping/")
+        ping = (time.perf_counter() - start) / len(rows)
+
+    return predict, ping
+
+
+def measure(enabled, n_requests, queue):
+    warnings.simplefilter("ignore")
+    predict, ping = asyncio.run(serve(n_requests))
+    queue.put({"metrics": enabled, "predict_seconds": predict, "ping_seconds": ping})
+
+
+def observe_cost(n=100000):
+    from mlops.serving import STAGE_SECONDS
+
+    start = time.perf_counter()
+    for _ in range(n):
+        STAGE_SECONDS.observe(0.001, model="benchmark", stage="classifier")
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--output", default=None, help="JSON report path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for enabled in (False, True):
+        # Settings are read when the config module is imported, so they must be in the environment the process inherits
+        os.environ["METRICS"] = str(enabled).lower()
+        queue = context.Queue()
+        process = context.Process(target=measure, args=(enabled, args.requests, queue))
+        process.start()
+        results[enabled] = queue.get()
+        process.join()
+        logger.info(
+            "metrics %-5s  predict %7.3f ms/request  ping %7.3f ms/request",
+            enabled,
+            results[enabled]["predict_seconds"] * 1000,
+            results[enabled]["ping_seconds"] * 1000,
+        )
+
+    report = {
+        "requests": args.requests,
+        "disabled": results[False],
+        "enabled": results[True],
+        "predict_overhead": results[True]["predict_seconds"] / results[False]["predict_seconds"] - 1,
+        "ping_overhead": results[True]["ping_seconds"] / results[False]["ping_seconds"] - 1,
+        "observe_seconds": observe_cost(),
+    }
+    logger.info(
+        "overhead  predict %+.1f%%  ping %+.1f%%  histogram observation %.2f us",
+        report["predict_overhead"] * 100,
+        report["ping_overhead"] * 100,
+        report["observe_seconds"] * 1e6,
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Measure the impact of shadow scoring on the latency of the served churn predictions.
+
+The API runs in-process and serves predictions from several concurrent clients, once without a shadow model and once
+mirroring every request to a shadow model, the served artifact itself unless ``--shadow`` is given, each in a fresh
+process. Mirrored requests are scored in the serving process, so they compete with the served ones for the GIL. The
+report includes request latency percentiles of both scenarios and the mirrored requests scored and dropped.
+
+Usage:
+    python benchmarks/mirror.py --duration 10 --concurrency 8 --rows 10 --output mirror.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from mlops.config import CHURN_ARTIFACT_PATH, ROOT_PATH
+
+logger = logging.getLogger(__name__)
+
+
+async def serve(batches, concurrency, duration):
+    from flama.client import Client
+
+    from mlops.app import app
+
+    latencies, failures = [], 0
+    async with Client(app=app) as client:
+        while (await client.get("/ping/")).status_code != 200:  # Model loads in the background
+            await asyncio.sleep(0.01)
+        while os.environ.get("CHURN_SHADOW_PATH") and not (await client.get("/churn/traffic/")).json()["candidates"]:
+            await asyncio.sleep(0.01)  # Shadow model loads in the background too
+
+        deadline = time.monotonic() + duration
+
+        async def run(offset):
+            nonlocal failures
+            i = offset
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                response = await client.post("/churn/predict/", json={"input": batches[i % len(batches)]})
+                latencies.append(time.perf_counter() - start)
+                failures += response.status_code != 200
+                i += concurrency
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*[run(i) for i in range(concurrency)])
+        stats = (await client.get("/churn/traffic/")).json()
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "requests": len(latencies),
+        "failures": failures,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "mirrored": stats["mirrored"],
+        "dropped": stats["dropped"],
+        "scored": sum(model["requests"] for model in stats["models"].values() if model["role"] == "shadow"),
+    }
+
+
+def measure(shadow, batches, concurrency, duration, queue):
+    warnings.simplefilter("ignore")
+    queue.put({"shadow": shadow, **asyncio.run(serve(batches, concurrency, duration))})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of traffic per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=10, help="Rows per request")
+    parser.add_argument("--shadow", default=str(CHURN_ARTIFACT_PATH), help="Shadow model artifact")
+    parser.add_argument("--output", default=None, help="JSON report path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    df = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet").drop(columns="Exited").head(1000)
+    rows = df.astype(object).where(df.notna(), None).values.tolist()
+    batches = [rows[i : i + args.rows] for i in range(0, len(rows) - args.rows + 1, args.rows)]
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for shadow in (False, True):
+        # Settings are read when the config module is imported, so they must be in the environment the process inherits
+        if shadow:
+            os.environ["CHURN_SHADOW_PATH"] = args.shadow
+        else:
+            os.environ.pop("CHURN_SHADOW_PATH", None)
+        queue = context.Queue()
+        process = context.Process(target=measure, args=(shadow, batches, args.concurrency, args.duration, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+        logger.info(
+            "shadow %-5s %6d requests  p50 %6.2f ms  p95 %6.2f ms  p99 %6.2f ms  %d mirrored  %d dropped",
+            shadow,
+            results[-1]["requests"],
+            results[-1]["p50_ms"],
+            results[-1]["p95_ms"],
+            results[-1]["p99_ms"],
+            results[-1]["mirrored"],
+            results[-1]["dropped"],
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare the OutlierClipper fitting modes: two np.percentile calls as before, one exact np.quantile call and the
+streaming quantile sketches fed in batches.
+
+For the streaming mode the report includes the time spent on every batch and the number of values retained by the
+sketches, which should both stay roughly flat as more batches are seen, as well as the largest relative deviation of
+the bounds from the exact ones.
+
+Usage:
+    python benchmarks/outlier_clipper.py --rows 100000 1000000 --columns 8 --batch-size 10000 --output clipper.json
+"""
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+
+from mlops.transformers import OutlierClipper
+
+logger = logging.getLogger(__name__)
+
+
+def legacy_fit(X, factor=1.5):
+    q1 = np.percentile(X, 25, axis=0)
+    q3 = np.percentile(X, 75, axis=0)
+    return q1 - factor * (q3 - q1), q3 + factor * (q3 - q1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--epsilon", type=float, default=0.01)
+    parser.add_argument("--output", default=None, help="JSON report path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    rng = np.random.default_rng(0)
+    results = []
+    for rows in args.rows:
+        X = rng.lognormal(size=(rows, args.columns))
+
+        start = time.perf_counter()
+        legacy_fit(X)
+        legacy = time.perf_counter() - start
+
+        start = time.perf_counter()
+        exact = OutlierClipper().fit(X)
+        exact_seconds = time.perf_counter() - start
+
+        clipper = OutlierClipper(epsilon=args.epsilon)
+        batch_seconds = []
+        for batch in range(0, rows, args.batch_size):
+            start = time.perf_counter()
+            clipper.partial_fit(X[batch : batch + args.batch_size])
+            batch_seconds.append(time.perf_counter() - start)
+
+        scale = exact.upper_bounds_ - exact.lower_bounds_
+        result = {
+            "rows": rows,
+            "columns": args.columns,
+            "legacy_seconds": legacy,
+            "exact_seconds": exact_seconds,
+            "streaming_seconds": sum(batch_seconds),
+            "first_batch_seconds": batch_seconds[0],
+            "last_batch_seconds": batch_seconds[-1],
+            "retained_values": sum(len(level) for sketch in clipper.sketches_ for level in sketch.levels),
+            "max_bound_deviation": float(
+                max(
+                    np.abs(clipper.lower_bounds_ - exact.lower_bounds_).max(),
+                    np.abs(clipper.upper_bounds_ - exact.upper_bounds_).max(),
+                )
+                / scale.max()
+            ),
+        }
+        results.append(result)
+        logger.info(
+            "%8d rows  legacy %7.3fs  exact %7.3fs  streaming %7.3fs (last batch %.4fs)  retained %6d  deviation %.4f",
+            rows,
+            result["legacy_seconds"],
+            result["exact_seconds"],
+            result["streaming_seconds"],
+            result["last_batch_seconds"],
+            result["retained_values"],
+            result["max_bound_deviation"],
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
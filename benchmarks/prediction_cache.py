@@ -0,0 +1,90 @@
+"""Measure the prediction cache on traffic that re-scores the same customers.
+
+Requests pick customers from the churn data following a Zipf distribution, with a fresh row number every time, and the
+API runs in-process with the cache disabled and enabled, each in a fresh process. The report includes the mean time
+per request and the cache statistics.
+
+Usage:
+    python benchmarks/prediction_cache.py --requests 5000 --customers 1000 --rows 10 --output cache.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from mlops.config import ROOT_PATH
+
+logger = logging.getLogger(__name__)
+
+
+async def serve(batches):
+    from flama.client import Client
+
+    from mlops.app import app
+
+    async with Client(app=app) as client:
+        while (await client.get("/ping/")).status_code != 200:  # Model loads in the background
+            await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        for rows in batches:
+            response = await client.post("/churn/predict/", json={"input": rows})
+            response.raise_for_status()
+        seconds = (time.perf_counter() - start) / len(batches)
+        stats = (await client.get("/churn/cache/")).json()
+
+    return seconds, stats
+
+
+def measure(enabled, batches, queue):
+    warnings.simplefilter("ignore")
+    seconds, stats = asyncio.run(serve(batches))
+    queue.put({"cache": enabled, "seconds_per_request": seconds, "stats": stats})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--customers", type=int, default=1000, help="Distinct customers")
+    parser.add_argument("--rows", type=int, default=10, help="Rows per request")
+    parser.add_argument("--zipf", type=float, default=1.2, help="Zipf exponent of the customer popularity")
+    parser.add_argument("--output", default=None, help="JSON report path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    df = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet").drop(columns="Exited").head(args.customers)
+    customers = df.astype(object).where(df.notna(), None).values.tolist()
+    rng = np.random.default_rng(0)
+    picks = (rng.zipf(args.zipf, (args.requests, args.rows)) - 1) % len(customers)
+    batches = [[[n * args.rows + j, *customers[i][1:]] for j, i in enumerate(row)] for n, row in enumerate(picks)]
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for enabled in (False, True):
+        # Settings are read when the config module is imported, so they must be in the environment the process inherits
+        os.environ["CHURN_CACHE"] = str(enabled).lower()
+        queue = context.Queue()
+        process = context.Process(target=measure, args=(enabled, batches, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+        logger.info(
+            "cache %-5s  %7.3f ms/request  hit rate %.2f",
+            enabled,
+            results[-1]["seconds_per_request"] * 1000,
+            results[-1]["stats"].get("hit_rate", 0.0),
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Measure the impact of hot reloading the churn model on the requests being served.
+
+The API runs in-process and serves single row predictions from several concurrent clients, first undisturbed and then
+while the model is reloaded every ``--every`` seconds through the admin endpoint, which needs ``CHURN_RELOAD_TOKEN``
+to be set. The report includes request latency percentiles of both phases, failed requests and the load and swap time
+of every reload.
+
+Usage:
+    CHURN_RELOAD_TOKEN=secret python benchmarks/reload.py --duration 10 --every 1 --concurrency 8 --output reload.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from flama.client import Client
+
+from mlops.app import app
+from mlops.config import CHURN_RELOAD_TOKEN, ROOT_PATH
+
+logger = logging.getLogger(__name__)
+
+
+async def traffic(client, rows, concurrency, duration):
+    latencies, failures = [], 0
+    deadline = time.monotonic() + duration
+
+    async def run():
+        nonlocal failures
+        i = 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            response = await client.post("/churn/predict/", json={"input": [rows[i % len(rows)]]})
+            latencies.append(time.perf_counter() - start)
+            failures += response.status_code != 200
+            i += 1
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*[run() for _ in range(concurrency)])
+    return latencies, failures
+
+
+async def reloads(client, every, duration):
+    results = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        await asyncio.sleep(every)
+        response = await client.post("/churn/reload/", headers={"authorization": f"Bearer {CHURN_RELOAD_TOKEN}"})
+        response.raise_for_status()
+        results.append(response.json())
+    return results
+
+
+def summary(latencies, failures):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {"requests": len(latencies), "failures": failures, "p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+
+
+async def benchmark(args):
+    df = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet").drop(columns="Exited").head(1000)
+    rows = df.astype(object).where(df.notna(), None).values.tolist()
+
+    async with Client(app=app) as client:
+        while (await client.get("/ping/")).status_code != 200:  # Model loads in the background
+            await asyncio.sleep(0.01)
+        steady = summary(*await traffic(client, rows, args.concurrency, args.duration))
+        (latencies, failures), swaps = await asyncio.gather(
+            traffic(client, rows, args.concurrency, args.duration), reloads(client, args.every, args.duration)
+        )
+
+    return {
+        "steady": steady,
+        "reloading": summary(latencies, failures),
+        "reloads": len(swaps),
+        "load_seconds_mean": float(np.mean([s["load_seconds"] for s in swaps])),
+        "swap_seconds_max": float(np.max([s["swap_seconds"] for s in swaps])),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of traffic per phase")
+    parser.add_argument("--every", type=float, default=1, help="Seconds between reloads")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", default=None, help="JSON report path")
+    args = parser.parse_args()
+    if not CHURN_RELOAD_TOKEN:
+        parser.error("CHURN_RELOAD_TOKEN must be set to request reloads")
+
+    logging.basicConfig(level=logging.INFO)
+    warnings.simplefilter("ignore")
+    report = asyncio.run(benchmark(args))
+    for phase in ("steady", "reloading"):
+        logger.info(
+            "%-9s %6d requests  %d failed  p50 %6.2f ms  p95 %6.2f ms  p99 %6.2f ms",
+            phase,
+            report[phase]["requests"],
+            report[phase]["failures"],
+            report[phase]["p50_ms"],
+            report[phase]["p95_ms"],
+            report[phase]["p99_ms"],
+        )
+    logger.info(
+        "%d reloads  load %.3fs mean  swap %.6fs max",
+        report["reloads"],
+        report["load_seconds_mean"],
+        report["swap_seconds_max"],
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
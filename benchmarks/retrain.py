@@ -0,0 +1,77 @@
+"""Compare a warm-start retrain of the churn model on new rows with a full search on all of them.
+
+A model is first trained with a full search on the oldest part of the train split, as last week's model would have
+been. The remaining rows then arrive as new data: the model is updated with ``ChurnProcessor.retrain`` and, separately,
+trained from scratch with a full search on the whole split. Both are scored on the same hold-out split.
+
+Usage:
+    python benchmarks/retrain.py --new 0.2 --max-iter 200 --output retrain.json
+"""
+import argparse
+import copy
+import json
+import logging
+import time
+import warnings
+
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from mlops.config import MODEL_CONFIG, ROOT_PATH
+from mlops.processors.churn import ChurnProcessor
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--new", type=float, default=0.2, help="Fraction of the train split arriving as new rows")
+    parser.add_argument("--max-iter", type=int, default=None, help="MLP iterations of every search candidate")
+    parser.add_argument("--output", default=None, help="JSON report path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    warnings.filterwarnings("ignore")
+    config = copy.deepcopy(MODEL_CONFIG)
+    churn_config = config["models"]["churn"]
+    if args.max_iter:
+        churn_config["param_grid"]["mlp_classifier__max_iter"] = [args.max_iter]
+
+    dataset = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet")
+    X = dataset.drop(columns=[churn_config["target"]])
+    y = dataset[churn_config["target"]]
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=churn_config["test_size"], random_state=churn_config["random_seed"]
+    )
+    old = X_train.index[: int(len(X_train) * (1 - args.new))]
+    new = X_train.index.difference(old)
+
+    processor = ChurnProcessor(config).train(X_train.loc[old], y_train.loc[old])
+    report = {"previous": {**processor.training, "test": processor.compute_metrics(X_test, y_test)}}
+
+    start = time.perf_counter()
+    processor.retrain(X_train, y_train, new)
+    report["retrain"] = {**processor.training, "seconds": time.perf_counter() - start}
+    report["retrain"]["test"] = processor.compute_metrics(X_test, y_test)
+
+    processor = ChurnProcessor(config).train(X_train, y_train)
+    report["full"] = {**processor.training, "test": processor.compute_metrics(X_test, y_test)}
+
+    for name, result in report.items():
+        logger.info(
+            "%-8s %-10s %6d rows %8.2fs  test roc_auc %.4f  f1 %.4f",
+            name,
+            result["mode"],
+            result["samples"],
+            result["seconds"],
+            result["test"]["roc_auc_score"],
+            result["test"]["f1_score"],
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=float)
+
+
+if __name__ == "__main__":
+    main()
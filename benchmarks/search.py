@@ -0,0 +1,85 @@
+"""Compare wall-clock time and quality of the churn hyperparameter search strategies.
+
+Every strategy is trained on the same train split and scored on the same hold-out split, so the faster searches can be
+checked to lose no ROC-AUC against the exhaustive grid.
+
+Usage:
+    python benchmarks/search.py --strategies grid random halving --output search.json
+"""
+import argparse
+import copy
+import json
+import logging
+import time
+
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from mlops.config import MODEL_CONFIG, ROOT_PATH
+from mlops.processors.churn import ChurnProcessor
+
+logger = logging.getLogger(__name__)
+
+
+def run(strategy, X_train, y_train, X_test, y_test, **search):
+    config = copy.deepcopy(MODEL_CONFIG)
+    config["models"]["churn"]["search"] = {
+        **config["models"]["churn"].get("search", {}),
+        **search,
+        "strategy": strategy,
+    }
+
+    start = time.perf_counter()
+    processor = ChurnProcessor(config).train(X_train, y_train)
+    elapsed = time.perf_counter() - start
+
+    search_cv = processor.pipeline
+    return {
+        "strategy": strategy,
+        "seconds": elapsed,
+        "candidates": len(search_cv.cv_results_["params"]),
+        "fits": len(search_cv.cv_results_["params"]) * search_cv.n_splits_,
+        "best_cv_roc_auc": search_cv.best_score_,
+        "best_params": search_cv.best_params_,
+        "test": processor.compute_metrics(X_test, y_test),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strategies", nargs="+", default=["grid", "random", "halving"])
+    parser.add_argument("--resource", default=None, help="Halving resource, e.g. n_samples or mlp_classifier__max_iter")
+    parser.add_argument("--sample", type=float, default=1.0, help="Fraction of the dataset to use")
+    parser.add_argument("--output", default=None, help="JSON report path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    churn_config = MODEL_CONFIG["models"]["churn"]
+    dataset = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet")
+    dataset = dataset.sample(frac=args.sample, random_state=churn_config["random_seed"])
+    X = dataset.drop(columns=[churn_config["target"]])
+    y = dataset[churn_config["target"]]
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=churn_config["test_size"], random_state=churn_config["random_seed"]
+    )
+
+    search = {"resource": args.resource} if args.resource else {}
+    results = [run(strategy, X_train, y_train, X_test, y_test, **search) for strategy in args.strategies]
+
+    for result in results:
+        logger.info(
+            "%-8s %8.1fs %4d fits  cv roc_auc %.4f  test roc_auc %.4f",
+            result["strategy"],
+            result["seconds"],
+            result["fits"],
+            result["best_cv_roc_auc"],
+            result["test"]["roc_auc_score"],
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
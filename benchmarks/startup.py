@@ -0,0 +1,106 @@
+"""Measure the cold start of the API: time to import it and time until it reports the model ready.
+
+Every run happens in a fresh Python process, so nothing is cached in memory between them. The API runs in-process and
+``/ping/`` is polled until the model has been loaded and warmed up in the background. The scenarios are the sklearn
+backend, the NumPy backend compiled from the artifact and the NumPy backend loaded from its snapshot, which is written
+before the runs.
+
+Usage:
+    python benchmarks/startup.py --repeat 5 --output startup.json
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from mlops.apps.churn import components
+from mlops.config import CHURN_ARTIFACT_PATH, CHURN_SNAPSHOT_PATH
+
+logger = logging.getLogger(__name__)
+
+SCENARIOS = {
+    "sklearn": {"CHURN_BACKEND": "sklearn"},
+    "numpy": {"CHURN_BACKEND": "numpy", "CHURN_SNAPSHOT": "false"},
+    "numpy-snapshot": {"CHURN_BACKEND": "numpy", "CHURN_SNAPSHOT": "true"},
+}
+
+CHILD = """
+import asyncio, json, sys, time
+
+start = time.perf_counter()
+from flama.client import Client
+from mlops.app import app
+imported = time.perf_counter()
+
+async def main():
+    async with Client(app=app) as client:
+        served = time.perf_counter()
+        while (await client.get("/ping/")).status_code != 200:
+            await asyncio.sleep(0.001)
+        ready = time.perf_counter()
+        stats = (await client.get("/churn/reload/")).json()
+    print(json.dumps({
+        "import": imported - start,
+        "serving": served - start,
+        "ready": ready - start,
+        "load": stats["last"]["load_seconds"],
+        "sklearn_imported": "sklearn" in sys.modules,
+    }))
+
+asyncio.run(main())
+"""
+
+
+def run(env):
+    # Configuration is read at import, so it has to be in the environment of the new process
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        env={**os.environ, "CHURN_RELOAD_INTERVAL": "0", "METRICS": "false", **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh processes per scenario")
+    parser.add_argument("--output", help="JSON report path")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    components.snapshot(CHURN_ARTIFACT_PATH, CHURN_SNAPSHOT_PATH)
+    logger.info("Snapshot written in %.3fs", time.perf_counter() - start)
+
+    report = {}
+    for name, env in SCENARIOS.items():
+        runs = [run(env) for _ in range(args.repeat)]
+        report[name] = {
+            key: statistics.median(r[key] for r in runs) for key in ("import", "serving", "ready", "load")
+        } | {"sklearn_imported": any(r["sklearn_imported"] for r in runs)}
+
+    logger.info("%-16s %10s %10s %10s %10s %8s", "scenario", "import", "serving", "ready", "load", "sklearn")
+    for name, r in report.items():
+        logger.info(
+            "%-16s %9.3fs %9.3fs %9.3fs %9.3fs %8s",
+            name,
+            r["import"],
+            r["serving"],
+            r["ready"],
+            r["load"],
+            r["sklearn_imported"],
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,129 @@
+"""Compare peak memory and throughput of out-of-core churn training, streaming Parquet row groups, with in-memory one.
+
+The dataset is repeated ``--scales`` times into a Parquet file with row groups of ``--row-group-size`` rows, every copy
+with new customer ids. The ``memory`` mode reads the whole file and fits the pipeline on the hash split train rows, the
+``stream`` mode fits it with :class:`mlops.pipelines.StreamingTrainer`, one row group at a time. Both train a single
+pipeline with the ``streaming.params`` of the config for ``--epochs`` epochs, without a search.
+
+Every scenario runs in a fresh process. Peak memory is the growth of the max RSS of the process over the one it had
+once the libraries were imported, before reading the data.
+
+Usage:
+    python benchmarks/streaming.py --scales 10 100 --epochs 5 --output streaming.json
+"""
+import argparse
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CHILD = """
+import copy, json, resource, sys, time, warnings
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from mlops.config import MODEL_CONFIG
+from mlops.datasets import hash_split
+from mlops.pipelines import ChurnPipeline
+from mlops.processors.churn import ChurnProcessor
+
+warnings.filterwarnings("ignore")
+mode, path, epochs = sys.argv[1], sys.argv[2], int(sys.argv[3])
+model_config = copy.deepcopy(MODEL_CONFIG)
+config = model_config["models"]["churn"]
+config["streaming"]["epochs"] = epochs
+processor = ChurnProcessor(model_config)
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if mode == "stream":
+    processor.train_stream(path)
+    rows, auc = processor.training["samples"], processor.compute_metrics_stream(path)["roc_auc_score"]
+else:
+    dataset = pd.read_parquet(path)
+    test = hash_split(dataset[config["id_column"]], config["test_size"], config["random_seed"])
+    X, y = dataset.drop(columns=[config["target"]]), dataset[config["target"]]
+    numeric_features, categorical_features = processor._features(X)
+    estimator = ChurnPipeline(
+        {}, numeric_features=numeric_features, categorical_features=categorical_features
+    ).estimator()
+    estimator.set_params(**config["streaming"]["params"], mlp_classifier__max_iter=epochs)
+    estimator.fit(X[~test], y[~test])
+    rows, auc = int((~test).sum()), roc_auc_score(y[test], estimator.predict_proba(X[test])[:, 1])
+seconds = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+print(
+    json.dumps(
+        {
+            "rows": rows,
+            "seconds": seconds,
+            "rows_per_second": rows * epochs / seconds,
+            "peak_mb": peak / 1024,
+            "roc_auc_score": auc,
+        }
+    )
+)
+"""
+
+MODES = ["memory", "stream"]
+
+
+def write_dataset(path, scale, row_group_size):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from mlops.config import MODEL_CONFIG, ROOT_PATH
+
+    id_column = MODEL_CONFIG["models"]["churn"]["id_column"]
+    table = pq.read_table(ROOT_PATH / "data" / "churn" / "data.parquet")
+    ids = table.column(id_column).to_numpy()
+    with pq.ParquetWriter(path, table.schema) as writer:
+        for i in range(scale):
+            # Every copy gets new ids, so the copies are split independently
+            copy = table.set_column(table.schema.get_field_index(id_column), id_column, pa.array(ids + i * 10**8))
+            writer.write_table(copy, row_group_size=row_group_size)
+
+
+def run(mode, path, epochs):
+    child = subprocess.run([sys.executable, "-c", CHILD, mode, str(path), str(epochs)], capture_output=True, text=True)
+    if child.returncode:
+        raise RuntimeError(f"Scenario {mode} on '{path}' failed:\n{child.stderr}")
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100], help="Times the dataset is repeated")
+    parser.add_argument("--epochs", type=int, default=5, help="MLP epochs")
+    parser.add_argument("--row-group-size", type=int, default=50_000, help="Rows per Parquet row group")
+    parser.add_argument("--output", help="JSON report path")
+    args = parser.parse_args()
+
+    report = []
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in args.scales:
+            path = Path(directory) / f"churn-{scale}.parquet"
+            write_dataset(path, scale, args.row_group_size)
+            for mode in MODES:
+                result = {"mode": mode, "scale": scale}
+                result.update(run(mode, path, args.epochs))
+                logger.info(
+                    "x%-4d %-6s %12.0f rows/s  peak %8.1f MB  AUC %.4f",
+                    scale,
+                    mode,
+                    result["rows_per_second"],
+                    result["peak_mb"],
+                    result["roc_auc_score"],
+                )
+                report.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,121 @@
+"""Measure memory and throughput of the API served by an increasing number of worker processes.
+
+For every worker count the API is started with ``python -m mlops run --workers N`` on the NumPy engine, warmed up and
+loaded with concurrent single row predictions for a fixed time. The report includes the requests per second and, per
+worker, the unique (USS) and proportional (PSS) memory, so that memory shared through the memory-mapped model is not
+counted once per worker. Throughput can only grow with workers up to the number of available cores.
+
+Usage:
+    python benchmarks/workers.py --workers 1 2 4 --duration 10 --output workers.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import pandas as pd
+import psutil
+
+from mlops.config import ROOT_PATH
+
+logger = logging.getLogger(__name__)
+
+
+def wait_ready(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/ping/").status_code == 200:
+                return
+        except httpx.TransportError:
+            ...
+        time.sleep(0.2)
+    raise TimeoutError(f"Server at {url} not ready after {timeout}s")
+
+
+async def load(url, rows, concurrency, duration):
+    count = 0
+    deadline = time.monotonic() + duration
+
+    async def client():
+        nonlocal count
+        async with httpx.AsyncClient(base_url=url) as c:
+            i = 0
+            while time.monotonic() < deadline:
+                response = await c.post("/churn/predict/", json={"input": [rows[i % len(rows)]]})
+                response.raise_for_status()
+                count += 1
+                i += 1
+
+    start = time.monotonic()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    return count / (time.monotonic() - start)
+
+
+def measure(workers, port, rows, concurrency, duration):
+    url = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "PORT": str(port), "METRICS": "0", "CHURN_BACKEND": "numpy"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "mlops", "run", "--workers", str(workers)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(url)
+        asyncio.run(load(url, rows, concurrency, 1))  # Warm up
+        throughput = asyncio.run(load(url, rows, concurrency, duration))
+
+        parent = psutil.Process(server.pid)
+        # Worker processes serve the requests, the supervisor and the resource tracker don't count
+        processes = [p for p in parent.children(recursive=True) if "resource_tracker" not in " ".join(p.cmdline())]
+        processes = processes or [parent]
+        memory = [p.memory_full_info() for p in processes]
+        return {
+            "workers": workers,
+            "requests_per_second": throughput,
+            "uss_mb_per_worker": sum(m.uss for m in memory) / len(memory) / 1024**2,
+            "pss_mb_per_worker": sum(m.pss for m in memory) / len(memory) / 1024**2,
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10, help="Load duration in seconds")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent clients per worker")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", default=None, help="JSON report path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    df = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet").drop(columns="Exited").head(1000)
+    rows = df.astype(object).where(df.notna(), None).values.tolist()
+
+    results = []
+    for workers in args.workers:
+        result = measure(workers, args.port, rows, args.concurrency * workers, args.duration)
+        results.append(result)
+        logger.info(
+            "%2d workers  %8.1f req/s  uss %7.1f MB/worker  pss %7.1f MB/worker",
+            workers,
+            result["requests_per_second"],
+            result["uss_mb_per_worker"],
+            result["pss_mb_per_worker"],
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
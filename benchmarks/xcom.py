@@ -0,0 +1,96 @@
+"""Compare handing train/test splits between Airflow tasks through XCom dicts or content-addressed Arrow files.
+
+For each dataset size the churn data is replicated and every approach runs in a fresh process, which serializes the
+split as the producer task does and rebuilds the DataFrame as the consumer task does. The report includes both times,
+the payload stored in the metadata DB and the peak RSS of the process.
+
+Usage:
+    python benchmarks/xcom.py --scales 1 10 50 --output xcom.json
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import resource
+import tempfile
+import time
+
+import pandas as pd
+
+from mlops import datasets
+from mlops.config import ROOT_PATH
+
+logger = logging.getLogger(__name__)
+
+
+def xcom(df, directory):
+    start = time.perf_counter()
+    payload = json.dumps(df.to_dict())  # XCom values are stored JSON encoded
+    serialized = time.perf_counter()
+    pd.DataFrame(json.loads(payload))
+    return serialized - start, time.perf_counter() - serialized, len(payload)
+
+
+def arrow(df, directory):
+    start = time.perf_counter()
+    payload = json.dumps(datasets.save_frame(df, directory))
+    serialized = time.perf_counter()
+    datasets.load_frame(**json.loads(payload))
+    return serialized - start, time.perf_counter() - serialized, len(payload)
+
+
+def measure(approach, scale, queue):
+    df = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet")
+    df = pd.concat([df] * scale, ignore_index=True)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    with tempfile.TemporaryDirectory() as directory:
+        serialize, deserialize, payload = {"xcom": xcom, "arrow": arrow}[approach](df, directory)
+
+    queue.put(
+        {
+            "approach": approach,
+            "rows": len(df),
+            "serialize_seconds": serialize,
+            "deserialize_seconds": deserialize,
+            "xcom_bytes": payload,
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "peak_rss_increase_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024,
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50], help="Dataset replication factors")
+    parser.add_argument("--output", default=None, help="JSON report path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for scale in args.scales:
+        for approach in ("xcom", "arrow"):
+            queue = context.Queue()
+            process = context.Process(target=measure, args=(approach, scale, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            results.append(result)
+            logger.info(
+                "%-5s %9d rows  serialize %7.3fs  deserialize %7.3fs  xcom %11d B  peak rss +%8.1f MB",
+                result["approach"],
+                result["rows"],
+                result["serialize_seconds"],
+                result["deserialize_seconds"],
+                result["xcom_bytes"],
+                result["peak_rss_increase_mb"],
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,101 @@
-import flama
+import argparse
+import contextlib
+import logging
+import os
+import tempfile
+from pathlib import Path
 
 from mlops import config
-from mlops.app import app
 
 
-def main():
-    flama.run(flama_app=app, server_host=config.HOST, server_port=config.PORT)
+def run(args):
+    import flama
+
+    if args.workers <= 1:
+        from mlops.app import app
+
+        flama.run(flama_app=app, server_host=args.host, server_port=args.port, server_log_level=args.log_level)
+        return
+
+    from mlops.apps.churn import components
+
+    with contextlib.ExitStack() as stack:
+        # The NumPy engine is compiled once into a memory-mapped file, preferably on a RAM backed filesystem, that every
+        # worker maps read-only instead of unpickling its own copy of the artifact. Other backends load it per worker
+        if config.CHURN_BACKEND == "numpy":
+            directory = stack.enter_context(
+                tempfile.TemporaryDirectory(dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+            )
+            os.environ["CHURN_SHARED_MODEL"] = str(
+                components.share(config.CHURN_ARTIFACT_PATH, Path(directory) / "churn.plan")
+            )
+        flama.run(
+            flama_app="mlops.app:app",
+            server_host=args.host,
+            server_port=args.port,
+            server_log_level=args.log_level,
+            server_workers=args.workers,
+        )
+
+
+def snapshot(args):
+    from mlops.apps.churn import components
+
+    logging.basicConfig(level=logging.INFO)
+    path = components.snapshot(args.model, args.output)
+    logging.info("Snapshot of '%s' written to '%s'", args.model, path)
+
+
+def score(args):
+    from mlops import scoring
+
+    logging.basicConfig(level=logging.INFO)
+    scoring.score(
+        args.input,
+        args.output,
+        args.model,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        keep=args.keep,
+        backend=args.backend,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="mlops")
+    parser.set_defaults(command=run, host=config.HOST, port=config.PORT, workers=config.WORKERS, log_level=None)
+    subparsers = parser.add_subparsers()
+
+    run_parser = subparsers.add_parser("run", help="Serve the API")
+    run_parser.add_argument("--host", default=config.HOST, help="Bind host")
+    run_parser.add_argument("--port", type=int, default=config.PORT, help="Bind port")
+    run_parser.add_argument("--workers", type=int, default=config.WORKERS, help="Number of server processes")
+    run_parser.add_argument(
+        "--development", dest="log_level", action="store_const", const="debug", help="Log at debug level"
+    )
+    run_parser.set_defaults(command=run)
+
+    snapshot_parser = subparsers.add_parser(
+        "snapshot", help="Compile the model into a checked snapshot, loaded much faster by the NumPy backend"
+    )
+    snapshot_parser.add_argument("--model", default=config.CHURN_ARTIFACT_PATH, help="Model artifact path")
+    snapshot_parser.add_argument("--output", default=config.CHURN_SNAPSHOT_PATH, help="Snapshot file path")
+    snapshot_parser.set_defaults(command=snapshot)
+
+    score_parser = subparsers.add_parser("score", help="Score a Parquet or JSONL file in chunks")
+    score_parser.add_argument("input", help="Input .parquet or .jsonl file")
+    score_parser.add_argument("output", help="Output .parquet file")
+    score_parser.add_argument("--model", default=config.CHURN_ARTIFACT_PATH, help="Model artifact path")
+    score_parser.add_argument("--chunk-size", type=int, default=10_000, help="Max rows per chunk")
+    score_parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    score_parser.add_argument("--keep", action="append", default=[], help="Input column to copy to the output")
+    score_parser.add_argument(
+        "--backend", choices=("sklearn", "numpy"), default="sklearn", help="Scoring backend, pipeline or NumPy engine"
+    )
+    score_parser.set_defaults(command=score)
+
+    args = parser.parse_args(argv)
+    args.command(args)
 
 
 if __name__ == "__main__":
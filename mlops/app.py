@@ -1,6 +1,8 @@
-from flama import Flama, types
+from flama import Flama, exceptions, http, types
+from flama.middleware import Middleware
 
-from mlops import apps
+from mlops import apps, serving
+from mlops.config import METRICS
 
 OPENAPI: types.OpenAPISpec = {
     "info": {
@@ -11,7 +13,7 @@ OPENAPI: types.OpenAPISpec = {
     },
 }
 
-app = Flama(openapi=OPENAPI, docs="/docs/")
+app = Flama(openapi=OPENAPI, docs="/docs/", middleware=[Middleware(serving.MetricsMiddleware)] if METRICS else None)
 
 
 @app.get("/ping/")
@@ -22,9 +24,23 @@ def home():
     summary:
         Returns warming message
     description:
-        The function returns a hello message
+        The function returns a hello message once the models are loaded and warmed up, and a 503 error until then
     """
+    if not apps.ready():
+        raise exceptions.HTTPException(status_code=503, detail="Models are loading")
+
     return "Hello 🔥"
 
 
+if METRICS:
+
+    @app.get("/metrics/", include_in_schema=False)
+    def metrics():
+        """Request latency, prediction stages, rows per request, in-flight requests and model load time."""
+        return http.PlainTextResponse(serving.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+# Flama resolves the parameters of every route with the app whose routes were built last, so the churn app, whose
+# routes need its model component, is mounted last
+app.mount("/models/", app=apps.registry, name="registry")
 app.mount("/churn/", app=apps.churn, name="churn")
@@ -1,3 +1,10 @@
 from mlops.apps.churn.app import app as churn
+from mlops.apps.churn.app import ready as churn_ready
+from mlops.apps.registry.app import app as registry
 
-__all__ = ["churn"]
+__all__ = ["churn", "registry", "ready"]
+
+
+def ready() -> bool:
+    """Whether the models of every app are loaded, except the ones of the registry that load on their first request."""
+    return churn_ready()
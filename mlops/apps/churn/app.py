@@ -1,9 +1,364 @@
-from flama import Flama
+import asyncio
+import hmac
+import logging
+import time
+import typing as t
+from pathlib import Path
 
-from mlops.config import CHURN_ARTIFACT_PATH
+import flama.schemas
+from flama import Flama, exceptions, http, schemas
+from flama.models import ModelResource
+from flama.models.resource import ModelResourceType
+from flama.resources.routing import resource_method
 
-__all__ = ["app"]
+from mlops import config, drift, serving
+from mlops.apps.churn import components
+from mlops.apps.churn import schemas as churn_schemas
+from mlops.config import (
+    CHURN_ARTIFACT_PATH,
+    CHURN_BACKEND,
+    CHURN_BATCH_QUEUE_SIZE,
+    CHURN_BATCH_SIZE,
+    CHURN_BATCH_WAIT,
+    CHURN_BATCHING,
+    CHURN_CACHE,
+    CHURN_CACHE_SIZE,
+    CHURN_CACHE_TTL,
+    CHURN_CANARY_PATH,
+    CHURN_CANARY_SHARE,
+    CHURN_DRIFT,
+    CHURN_DRIFT_BUFFER_SIZE,
+    CHURN_MIRROR_CONCURRENCY,
+    CHURN_MIRROR_QUEUE_SIZE,
+    CHURN_RELOAD_INTERVAL,
+    CHURN_RELOAD_TOKEN,
+    CHURN_SHADOW_PATH,
+    CHURN_SHARED_MODEL,
+    CHURN_SNAPSHOT,
+    CHURN_SNAPSHOT_PATH,
+)
+
+__all__ = ["app", "ready"]
+
+logger = logging.getLogger(__name__)
+
+if CHURN_SHARED_MODEL and CHURN_BACKEND != "numpy":
+    raise ValueError(f"Shared model '{CHURN_SHARED_MODEL}' is served by the NumPy engine, not '{CHURN_BACKEND}'")
 
 app = Flama(docs=None, schema=None)
 
-app.models.add_model(path="/", model=CHURN_ARTIFACT_PATH, name="Churn")
+# The model is loaded and warmed up in the background once the app starts, requests get a 503 until then
+component = components.ChurnModelComponent()
+
+
+def load_model() -> components.ChurnModel:
+    if CHURN_SHARED_MODEL and component.model is None:
+        model = components.load_shared(CHURN_SHARED_MODEL).model
+    elif CHURN_SHARED_MODEL:
+        model = components.load_shared_artifact(CHURN_ARTIFACT_PATH, Path(CHURN_SHARED_MODEL).parent).model
+    else:
+        snapshot_path = CHURN_SNAPSHOT_PATH if CHURN_SNAPSHOT else None
+        model = components.load(CHURN_ARTIFACT_PATH, backend=CHURN_BACKEND, snapshot_path=snapshot_path).model
+    model.warmup()
+    return model
+
+
+def serve(model: components.ChurnModel) -> components.ChurnModel | None:
+    """Swap the model in, setting up the batcher and the cache for the first one, which later ones get copies of, and a
+    drift monitor against the reference summary of every one."""
+    if CHURN_DRIFT and (reference := model.reference) is not None:
+        model.monitor = drift.DriftMonitor(reference, buffer_size=CHURN_DRIFT_BUFFER_SIZE)
+
+    if component.model is None and CHURN_BATCHING:
+        model.batcher = serving.MicroBatcher(
+            model.predict_proba,
+            max_batch_size=CHURN_BATCH_SIZE,
+            max_wait=CHURN_BATCH_WAIT / 1000,
+            max_queue_size=CHURN_BATCH_QUEUE_SIZE,
+        )
+
+    if component.model is None and CHURN_CACHE:
+        drop_features = config.MODEL_CONFIG["models"]["churn"]["drop_features"]
+        model.cache = serving.PredictionCache(
+            model.name,
+            max_size=CHURN_CACHE_SIZE,
+            ttl=CHURN_CACHE_TTL,
+            columns=model.key_columns(drop_features["numerical"] + drop_features["categorical"]),
+            watch=CHURN_ARTIFACT_PATH,
+        )
+
+    return component.swap(model)
+
+
+def ready() -> bool:
+    return component.ready
+
+
+reloader = serving.ModelReloader(
+    components.ChurnModel.name,
+    CHURN_ARTIFACT_PATH,
+    load_model,
+    serve,
+    interval=CHURN_RELOAD_INTERVAL or None,
+    preload=True,
+)
+app.add_event_handler("startup", reloader.start)
+app.add_event_handler("shutdown", reloader.close)
+
+# Candidate models, by role: the canary serves a share of the requests and the shadow scores them off the request path
+candidates: dict[str, components.ChurnModel] = {}
+traffic = serving.TrafficSplitter(
+    components.ChurnModel.name,
+    canary_share=CHURN_CANARY_SHARE if CHURN_CANARY_PATH else 0.0,
+    max_queue_size=CHURN_MIRROR_QUEUE_SIZE,
+    concurrency=CHURN_MIRROR_CONCURRENCY,
+)
+_candidates_loader: asyncio.Task | None = None
+
+
+def load_candidate(role: str, path: str) -> components.ChurnModel:
+    model = components.load(path, backend=CHURN_BACKEND).model
+    model.name = f"{components.ChurnModel.name}-{role}"  # Metrics label
+    model.warmup()
+    return model
+
+
+async def _load_candidates() -> None:
+    for role, path in (("canary", CHURN_CANARY_PATH), ("shadow", CHURN_SHADOW_PATH)):
+        if not path:
+            continue
+        try:
+            candidates[role] = await asyncio.to_thread(load_candidate, role, path)
+        except Exception:
+            logger.exception("Cannot load %s model from '%s', requests are served by the primary one", role, path)
+
+
+async def start_candidates() -> None:
+    """Load the candidate models in the background, until then every request is served by the primary model only."""
+    global _candidates_loader
+    if (CHURN_CANARY_PATH or CHURN_SHADOW_PATH) and _candidates_loader is None:
+        _candidates_loader = asyncio.create_task(_load_candidates())
+
+
+async def close_candidates() -> None:
+    global _candidates_loader
+    if _candidates_loader is not None:
+        _candidates_loader.cancel()
+        try:
+            await _candidates_loader
+        except asyncio.CancelledError:
+            ...
+        _candidates_loader = None
+    await traffic.close()
+
+
+app.add_event_handler("startup", start_candidates)
+app.add_event_handler("shutdown", close_candidates)
+
+
+class ChurnResource(ModelResource, metaclass=ModelResourceType):
+    name = "Churn"
+    component = component
+
+    @resource_method("/predict/", methods=["POST"], name="predict")
+    async def predict(
+        self,
+        model: components.ChurnModel,
+        data: t.Annotated[schemas.SchemaType, schemas.SchemaMetadata(flama.schemas.schemas.MLModelInput)],
+    ) -> t.Annotated[schemas.SchemaType, schemas.SchemaMetadata(churn_schemas.ChurnOutput)]:
+        """
+        tags:
+            - Churn
+        summary:
+            Generate a prediction
+        description:
+            Generate a prediction using the churn model, batched with concurrent requests when enabled. When a canary
+            model is set it serves a share of the requests, and when a shadow model is set it scores every request in
+            the background.
+        responses:
+            200:
+                description:
+                    The prediction generated by the model, and the id and version of the model.
+        """
+        rows = data["input"]
+        canary = candidates.get("canary")
+        served, role = (canary, "canary") if canary is not None and traffic.pick_canary() else (model, "primary")
+
+        start = time.perf_counter()
+        output = await served.apredict(rows)
+        traffic.observe(served.name, role, time.perf_counter() - start, len(rows))
+
+        # Mirrored off the request path, compared with the served predictions
+        if served is not model:
+            traffic.mirror(model.name, "primary", model.predict, rows, output)
+        if (shadow := candidates.get("shadow")) is not None:
+            traffic.mirror(shadow.name, "shadow", shadow.predict, rows, output)
+
+        return {"output": output, "model": served.info}
+
+    @resource_method("/predict/columnar/", methods=["POST"], name="predict-columnar")
+    async def predict_columnar(
+        self, model: components.ChurnModel, request: http.Request
+    ) -> t.Annotated[schemas.SchemaType, schemas.SchemaMetadata(churn_schemas.ChurnOutput)]:
+        """
+        tags:
+            - Churn
+        summary:
+            Generate a prediction from columns
+        description:
+            Generate a prediction using the churn model for a batch sent column by column, either as an Arrow IPC
+            stream (`application/vnd.apache.arrow.stream`) or as a JSON object `{"columns": {name: values}}`. Columns
+            follow the training order and the ones the model doesn't use can be omitted.
+        responses:
+            200:
+                description:
+                    The prediction generated by the model, and the id and version of the model.
+            400:
+                description:
+                    The columns don't match the training schema.
+        """
+        try:
+            if request.headers.get("content-type", "").startswith(serving.ARROW_STREAM):
+                columns = model.decoder.arrow(await request.body())
+            else:
+                payload = await request.json()
+                columns = model.decoder.json(payload.get("columns") if isinstance(payload, dict) else None)
+        except ValueError as e:
+            raise exceptions.HTTPException(status_code=400, detail=str(e))
+
+        return {"output": await model.apredict_columns(columns), "model": model.info}
+
+    @resource_method("/batching/", methods=["GET"], name="batching")
+    async def batching(self, model: components.ChurnModel):
+        """
+        tags:
+            - Churn
+        summary:
+            Batching statistics
+        description:
+            Queue wait, batch fill ratio and per-batch inference time of the request batcher.
+        responses:
+            200:
+                description:
+                    The batcher statistics.
+        """
+        if model.batcher is None:
+            return {"enabled": False}
+
+        return {"enabled": True, **model.batcher.stats()}
+
+    @resource_method("/cache/", methods=["GET"], name="cache")
+    async def cache(self, model: components.ChurnModel):
+        """
+        tags:
+            - Churn
+        summary:
+            Prediction cache statistics
+        description:
+            Hits, misses, evictions, expirations, flushes and size of the prediction cache.
+        responses:
+            200:
+                description:
+                    The cache statistics.
+        """
+        if model.cache is None:
+            return {"enabled": False}
+
+        return {"enabled": True, **model.cache.stats()}
+
+    @resource_method("/traffic/", methods=["GET"], name="traffic")
+    async def traffic_stats(self):
+        """
+        tags:
+            - Churn
+        summary:
+            Traffic splitting statistics
+        description:
+            Canary share, mirrored requests queued, dropped and failed, and the latency of every model and the
+            agreement of the mirrored ones with the served predictions.
+        responses:
+            200:
+                description:
+                    The traffic splitting statistics.
+        """
+        return {"candidates": {role: model.info for role, model in candidates.items()}, **traffic.stats()}
+
+    @resource_method("/drift/", methods=["GET"], name="drift")
+    async def drift_report(self, model: components.ChurnModel):
+        """
+        tags:
+            - Churn
+        summary:
+            Drift from the training data
+        description:
+            PSI of every input column and of the predicted churn probability, and KS distance of the numerical ones,
+            between the rows served by the model and the reference summary of its training data.
+        responses:
+            200:
+                description:
+                    The drift report.
+        """
+        if model.monitor is None:
+            return {"enabled": False, "model": model.info}
+
+        return {"enabled": True, "model": model.info, **model.monitor.report()}
+
+    @resource_method("/reload/", methods=["POST"], name="reload")
+    async def reload(self, request: http.Request):
+        """
+        tags:
+            - Churn
+        summary:
+            Reload the model
+        description:
+            Load the model artifact again, warm it up and swap it in without dropping requests. Returns the new model
+            and the load and swap times. Admin operation, only available with the `CHURN_RELOAD_TOKEN` bearer token.
+        responses:
+            200:
+                description:
+                    The reloaded model.
+            401:
+                description:
+                    Missing or wrong token.
+            404:
+                description:
+                    Reloads on demand are disabled.
+            503:
+                description:
+                    The model cannot be loaded.
+        """
+        if not CHURN_RELOAD_TOKEN:
+            raise exceptions.HTTPException(status_code=404)
+
+        if not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {CHURN_RELOAD_TOKEN}"):
+            raise exceptions.HTTPException(status_code=401, detail="Wrong token")
+
+        try:
+            last = await reloader.reload()
+        except Exception:
+            logger.exception("Cannot reload model from '%s'", CHURN_ARTIFACT_PATH)
+            last = None
+
+        if last is None or component.model is None:
+            raise exceptions.HTTPException(status_code=503, detail="Model cannot be loaded")
+
+        return {"model": component.model.info, **last}
+
+    @resource_method("/reload/", methods=["GET"], name="reload-stats")
+    async def reload_stats(self, model: components.ChurnModel):
+        """
+        tags:
+            - Churn
+        summary:
+            Reload statistics
+        description:
+            Served model, artifact watching status and number and timing of reloads.
+        responses:
+            200:
+                description:
+                    The reload statistics.
+        """
+        return {"model": model.info, **reloader.stats()}
+
+
+app.models.add_model_resource(path="/", resource=ChurnResource)
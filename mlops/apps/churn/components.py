@@ -0,0 +1,406 @@
+import asyncio
+import functools
+import hashlib
+import logging
+import os
+import time
+import typing as t
+import warnings
+from pathlib import Path
+
+import flama
+import numpy as np
+from flama import exceptions
+from flama.models.base import Model
+from flama.models.components import ModelComponent
+from flama.serialize.data_structures import Metadata
+
+from mlops import drift, engines, serving
+
+__all__ = [
+    "BACKENDS",
+    "ChurnModel",
+    "ChurnModelComponent",
+    "load",
+    "share",
+    "load_shared",
+    "load_shared_artifact",
+    "snapshot",
+    "load_snapshot",
+]
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("sklearn", "numpy")
+
+
+def _row(plan: dict[str, np.ndarray], numerical: t.Sequence[t.Any], categorical: t.Sequence[t.Any]) -> list[t.Any]:
+    """Input row holding the given values in the numerical and categorical columns of a plan, and None elsewhere."""
+    names = list(plan["feature_names"]) if "feature_names" in plan else None
+    row: list[t.Any] = [None] * int(plan["n_features_in"])
+    for column, value in zip([*plan["numerical_columns"], *plan["categorical_columns"]], [*numerical, *categorical]):
+        row[names.index(column) if isinstance(column, str) and names else int(column)] = value
+    return row
+
+
+def _digest(path: str | os.PathLike) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class ChurnModel(Model):
+    name = "churn"
+    batcher: serving.MicroBatcher | None = None
+    cache: serving.PredictionCache | None = None
+    monitor: drift.DriftMonitor | None = None
+
+    @functools.cached_property
+    def stages(self) -> tuple[t.Callable, t.Callable]:
+        """Preprocessing and classifier steps of the model, so that they can be timed separately."""
+        estimator = getattr(self.model, "best_estimator_", self.model)
+        if isinstance(estimator, engines.ChurnEngine):
+            return estimator.transform, estimator.forward
+
+        # Imported here so that serving the NumPy engine doesn't import sklearn at all
+        from sklearn.pipeline import Pipeline
+
+        if isinstance(estimator, Pipeline) and len(estimator) > 1:
+            return estimator[:-1].transform, estimator[-1].predict_proba
+        return (lambda x: x), estimator.predict_proba
+
+    @functools.cached_property
+    def plan(self) -> dict[str, np.ndarray]:
+        """Inference plan of the model, which holds its input schema."""
+        return self.model.plan if isinstance(self.model, engines.ChurnEngine) else engines.build_plan(self.model)
+
+    @functools.cached_property
+    def decoder(self) -> serving.ColumnarDecoder:
+        """Decoder of columnar requests, checking them against the columns and categories the model was trained on."""
+        if "feature_names" not in self.plan:
+            raise ValueError("Columnar requests need a model trained on named columns")
+
+        names = self.plan["feature_names"].tolist()
+        numerical, categorical = (
+            [names[c] if isinstance(c, int | np.integer) else str(c) for c in self.plan[key].tolist()]
+            for key in ("numerical_columns", "categorical_columns")
+        )
+        return serving.ColumnarDecoder(
+            names,
+            numerical,
+            {name: self.plan[f"categories_{i}"].tolist() for i, name in enumerate(categorical)},
+            dtype=engines.churn.DTYPE if isinstance(self.model, engines.ChurnEngine) else np.float64,
+        )
+
+    def _rows(self, columns: serving.Columns) -> np.ndarray:
+        """Input rows of the sklearn pipeline holding decoded columns, and None in the ones it doesn't use."""
+        decoder = self.decoder
+        X = np.full((len(columns), len(decoder.names)), None, dtype=object)
+        X[:, [decoder.names.index(name) for name in decoder.numerical]] = columns.numerical
+        for name, code in zip(decoder.categorical, columns.codes):
+            # Code past the last category picks a value the encoder ignores as unknown, and -1 picks None
+            values = np.array([*decoder.categories[name], f"<unknown {name}>", None], dtype=object)
+            X[:, decoder.names.index(name)] = values[code]
+        return X
+
+    def _predict_proba(self, preprocess: t.Callable, classify: t.Callable, x: t.Any) -> np.ndarray:
+        start = time.perf_counter()
+        try:
+            Xt = preprocess(x)
+            preprocessed = time.perf_counter()
+            probabilities = classify(Xt)
+        except ValueError as e:
+            raise exceptions.HTTPException(status_code=400, detail=str(e))
+
+        serving.STAGE_SECONDS.observe(preprocessed - start, model=self.name, stage="preprocessing")
+        serving.STAGE_SECONDS.observe(time.perf_counter() - preprocessed, model=self.name, stage="classifier")
+        return probabilities
+
+    def predict_proba(self, x: list[list[t.Any]]) -> np.ndarray:
+        return self._predict_proba(*self.stages, x)
+
+    def predict_proba_columns(self, columns: serving.Columns) -> np.ndarray:
+        """Predict probabilities of a batch decoded by :attr:`decoder`.
+
+        :param columns: Decoded batch.
+        :return: Probabilities.
+        """
+        preprocess, classify = self.stages
+        if isinstance(self.model, engines.ChurnEngine):
+            return self._predict_proba(lambda c: self.model.transform_columns(*c), classify, columns)
+        return self._predict_proba(lambda c: preprocess(self._rows(c)), classify, columns)
+
+    def predict(self, x: list[list[t.Any]]) -> t.Any:
+        return self.model.classes_[self.predict_proba(x).argmax(axis=1)].tolist()
+
+    @property
+    def info(self) -> dict[str, t.Any]:
+        """Id and version of the artifact, as recorded when it was dumped."""
+        return {"id": str(self.meta.id), "version": (self.meta.extra or {}).get("model_version")}
+
+    @property
+    def reference(self) -> dict[str, t.Any] | None:
+        """Summary of the training data written into the artifact, None if it was dumped without one."""
+        return (self.meta.extra or {}).get("reference")
+
+    def warmup(self) -> None:
+        """Predict a synthetic row, made of the imputation values and the first known categories, so that lazily
+        initialized state is built before serving."""
+        plan = self.plan
+        categories = [str(plan[f"categories_{i}"][0]) for i in range(len(plan["categorical_columns"]))]
+        self.predict_proba([_row(plan, [float(v) for v in plan["impute"]], categories)])
+
+    def key_columns(self, drop: t.Collection[str]) -> list[int] | None:
+        """Positions of the input columns other than the given ones, None if the model doesn't know their names."""
+        estimator = getattr(self.model, "best_estimator_", self.model)
+        if (names := getattr(estimator, "feature_names_in_", None)) is None:
+            return None
+        return [i for i, name in enumerate(names) if name not in drop]
+
+    async def _apredict_proba(self, x: list[list[t.Any]]) -> np.ndarray:
+        if self.batcher is None:
+            return self.predict_proba(x)
+
+        try:
+            return await self.batcher.submit(x)
+        except asyncio.QueueFull:
+            raise exceptions.HTTPException(status_code=503, detail="Too many pending predictions")
+
+    async def apredict(self, x: list[list[t.Any]]) -> t.Any:
+        """Generate a prediction, reusing the cached rows and coalescing the rest with concurrent ones when a cache and
+        a batcher are set."""
+        serving.ROWS.observe(len(x), model=self.name)
+        if (timer := serving.current_timer()) is not None:
+            timer.model = self.name
+            timer.lap("deserialization")
+
+        if self.cache is None or not x:
+            probabilities = await self._apredict_proba(x)
+        else:
+            keys = [self.cache.key(row) for row in x]
+            rows = [self.cache.get(key) for key in keys]
+            if missing := [i for i, row in enumerate(rows) if row is None]:
+                computed = await self._apredict_proba([x[i] for i in missing])
+                for i, row in zip(missing, computed):
+                    rows[i] = row
+                    self.cache.put(keys[i], row.copy())
+            probabilities = np.vstack(rows)
+
+        if self.monitor is not None:
+            self.monitor.observe(x, probabilities[:, 1])
+
+        output = self.model.classes_[probabilities.argmax(axis=1)].tolist()
+
+        if timer is not None:
+            # Inference stages are timed on their own, per batch when batching, so the response is timed from here
+            timer.reset()
+
+        return output
+
+    async def apredict_columns(self, columns: serving.Columns) -> t.Any:
+        """Generate a prediction for a batch decoded by :attr:`decoder`, which is already vectorized so it skips the
+        cache and the batcher."""
+        serving.ROWS.observe(len(columns), model=self.name)
+        if (timer := serving.current_timer()) is not None:
+            timer.model = self.name
+            timer.lap("deserialization")
+
+        probabilities = self.predict_proba_columns(columns)
+        if self.monitor is not None:
+            self.monitor.observe(self._rows(columns), probabilities[:, 1])
+
+        output = self.model.classes_[probabilities.argmax(axis=1)].tolist()
+
+        if timer is not None:
+            timer.reset()
+
+        return output
+
+
+class ChurnModelComponent(ModelComponent):
+    """Component resolving the served churn model, which can be set once the app is already running.
+
+    :param model: Served model, None until it is loaded.
+    """
+
+    def __init__(self, model: ChurnModel | None = None):
+        super().__init__(model)
+        self._retiring: set[asyncio.Task] = set()
+
+    @property
+    def ready(self) -> bool:
+        return self.model is not None
+
+    def get_model_type(self) -> type[Model]:
+        return ChurnModel
+
+    def resolve(self) -> ChurnModel:
+        if self.model is None:
+            raise exceptions.HTTPException(status_code=503, detail="Model is loading")
+        return self.model
+
+    def swap(self, model: ChurnModel) -> ChurnModel | None:
+        """Serve another model from now on, with a batcher and a cache of its own set up like the current ones.
+
+        Requests already resolved to the current model keep using its batcher and cache, so they finish on it and none
+        of its predictions is ever served by the new one. The batcher of the current model is stopped once drained.
+
+        :param model: New model.
+        :return: Previous model, None if there was no model yet.
+        """
+        previous = self.model
+        if previous is not None:
+            if previous.batcher is not None:
+                model.batcher = previous.batcher.clone(model.predict_proba)
+            if previous.cache is not None:
+                model.cache = previous.cache.clone()
+        self.model = model
+
+        if previous is not None and previous.batcher is not None:
+            try:
+                task = asyncio.get_running_loop().create_task(self._retire(previous))
+            except RuntimeError:  # No loop, so no request can be waiting on the batcher
+                previous.batcher = None
+            else:
+                self._retiring.add(task)
+                task.add_done_callback(self._retiring.discard)
+        return previous
+
+    @staticmethod
+    async def _retire(model: ChurnModel) -> None:
+        batcher = t.cast(serving.MicroBatcher, model.batcher)
+        await batcher.drain()
+        # Requests resolved to the model but not queued yet are predicted directly
+        model.batcher = None
+
+
+def load(
+    path: str | os.PathLike, backend: str = "sklearn", snapshot_path: str | os.PathLike | None = None
+) -> ChurnModelComponent:
+    """Load a churn artifact and wrap it into a component using the given inference backend.
+
+    :param path: Model artifact path.
+    :param backend: Inference backend, either the fitted sklearn pipeline or the compiled NumPy engine.
+    :param snapshot_path: Snapshot written by :func:`snapshot`, loaded instead of the artifact by the NumPy engine as
+        long as it was taken from the current artifact.
+    :return: Model component.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Wrong backend '{backend}', expected one of: {', '.join(BACKENDS)}")
+
+    if backend == "numpy" and snapshot_path is not None and os.path.exists(snapshot_path):
+        if (component := load_snapshot(snapshot_path, path)) is not None:
+            return component
+        logger.warning("Snapshot '%s' was not taken from artifact '%s', loading the artifact", snapshot_path, path)
+
+    start = time.perf_counter()
+    artifact = flama.load(path)
+    model = engines.ChurnEngine.from_estimator(artifact.model) if backend == "numpy" else artifact.model
+    serving.MODEL_LOAD_SECONDS.set(time.perf_counter() - start, model=ChurnModel.name)
+    return ChurnModelComponent(ChurnModel(model, artifact.meta, artifact.artifacts))
+
+
+def share(path: str | os.PathLike, shared_path: str | os.PathLike) -> Path:
+    """Compile a churn artifact into an inference plan file that several processes can memory-map.
+
+    :param path: Model artifact path.
+    :param shared_path: Inference plan file path.
+    :return: Inference plan file path.
+    """
+    artifact = flama.load(path)
+    return engines.save_plan(engines.build_plan(artifact.model), shared_path, meta=artifact.meta.to_dict())
+
+
+def load_shared(shared_path: str | os.PathLike) -> ChurnModelComponent:
+    """Load a component running the NumPy engine over an inference plan file written by :func:`share`.
+
+    The model arrays are read-only views of the mapped file, so they are shared by every process serving it.
+
+    :param shared_path: Inference plan file path.
+    :return: Model component.
+    """
+    start = time.perf_counter()
+    plan, header = engines.load_plan(shared_path)
+    return _from_plan(plan, header, start)
+
+
+def _from_plan(plan: dict[str, np.ndarray], header: dict[str, t.Any], start: float) -> ChurnModelComponent:
+    model = engines.ChurnEngine(plan)
+    serving.MODEL_LOAD_SECONDS.set(time.perf_counter() - start, model=ChurnModel.name)
+    return ChurnModelComponent(ChurnModel(model, Metadata.from_dict(header["meta"]), None))
+
+
+def load_shared_artifact(path: str | os.PathLike, directory: str | os.PathLike) -> ChurnModelComponent:
+    """Share a churn artifact as an inference plan file named after its version and load it.
+
+    Processes loading the same artifact version reuse the file written by the first one.
+
+    :param path: Model artifact path.
+    :param directory: Inference plan files directory.
+    :return: Model component.
+    """
+    stat = os.stat(path)
+    shared_path = Path(directory) / f"churn-{stat.st_mtime_ns}-{stat.st_size}.plan"
+    if not shared_path.exists():
+        share(path, shared_path)
+    return load_shared(shared_path)
+
+
+def snapshot(
+    path: str | os.PathLike, snapshot_path: str | os.PathLike, *, rows: int = 1000, tolerance: float = 1e-4
+) -> Path:
+    """Compile a churn artifact into an inference plan file that loads without unpickling it nor importing sklearn.
+
+    The compiled engine is checked against the artifact pipeline on synthetic rows, spread beyond the clipping bounds
+    and including missing values and unknown categories, and the snapshot is only written if they agree.
+
+    :param path: Model artifact path.
+    :param snapshot_path: Snapshot file path.
+    :param rows: Number of synthetic rows checked.
+    :param tolerance: Max absolute difference allowed between the probabilities of the engine and the pipeline.
+    :return: Snapshot file path.
+    """
+    artifact = flama.load(path)
+    plan = engines.build_plan(artifact.model)
+
+    rng = np.random.default_rng(0)
+    lower, upper = plan["lower_bounds"], plan["upper_bounds"]
+    margin = (upper - lower) * 0.1
+    numerical = rng.uniform(lower - margin, upper + margin, size=(rows, len(lower))).astype(object)
+    numerical[rng.random(numerical.shape) < 0.05] = None
+    categorical = [
+        rng.choice([*plan[f"categories_{i}"].tolist(), "unknown", None], size=rows)
+        for i in range(len(plan["categorical_columns"]))
+    ]
+    X = [_row(plan, numerical[i], [c[i] for c in categorical]) for i in range(rows)]
+
+    with warnings.catch_warnings():
+        # Rows are given as lists, as they come in requests, to a pipeline fitted on a DataFrame
+        warnings.filterwarnings("ignore", "X does not have valid feature names")
+        expected = artifact.model.predict_proba(X)
+    error = float(np.abs(engines.ChurnEngine(plan).predict_proba(X) - expected).max())
+    if error > tolerance:
+        raise ValueError(
+            f"Compiled model differs from the artifact by {error:.2e}, above the tolerance {tolerance:.2e}"
+        )
+
+    return engines.save_plan(
+        plan,
+        snapshot_path,
+        meta=artifact.meta.to_dict(),
+        artifact=_digest(path),
+        validation={"rows": rows, "max_error": error},
+    )
+
+
+def load_snapshot(snapshot_path: str | os.PathLike, path: str | os.PathLike) -> ChurnModelComponent | None:
+    """Load a component running the NumPy engine over a snapshot written by :func:`snapshot`.
+
+    :param snapshot_path: Snapshot file path.
+    :param path: Model artifact path the snapshot must have been taken from.
+    :return: Model component, None if the snapshot was taken from another artifact.
+    """
+    start = time.perf_counter()
+    plan, header = engines.load_plan(snapshot_path)
+    if header.get("artifact") != _digest(path):
+        return None
+    return _from_plan(plan, header, start)
@@ -0,0 +1,15 @@
+import typing as t
+
+import pydantic
+
+__all__ = ["ModelInfo", "ChurnOutput"]
+
+
+class ModelInfo(pydantic.BaseModel):
+    id: str = pydantic.Field(title="id", description="Model artifact id")
+    version: str | None = pydantic.Field(None, title="version", description="Model version")
+
+
+class ChurnOutput(pydantic.BaseModel):
+    output: list[t.Any] = pydantic.Field(title="output", description="Model output")
+    model: ModelInfo = pydantic.Field(title="model", description="Model that generated the output")
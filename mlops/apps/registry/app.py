@@ -0,0 +1,95 @@
+import functools
+import typing as t
+
+from flama import Flama, exceptions, http
+
+from mlops import config, serving
+from mlops.apps.registry import components
+
+__all__ = ["app", "get_registry"]
+
+app = Flama(docs=None, schema=None)
+
+
+def build(registry_config: dict[str, t.Any]) -> serving.ModelRegistry:
+    """Registry of the models of the ``registry`` section of ``model.yaml``.
+
+    :param registry_config: Registry config.
+    :return: Registry.
+    """
+    registry = serving.ModelRegistry(max_size=registry_config.get("max_size"))
+    for name, entry in registry_config.get("models", {}).items():
+        if entry.get("kind") not in components.KINDS:
+            raise ValueError(
+                f"Wrong kind '{entry.get('kind')}' of model '{name}', expected one of: {', '.join(components.KINDS)}"
+            )
+
+        registry.register(name, functools.partial(components.load, name, entry))
+    return registry
+
+
+@functools.cache
+def get_registry() -> serving.ModelRegistry:
+    """Registry of ``model.yaml``, built on its first request so that importing the app doesn't read the model config.
+
+    :return: Registry.
+    """
+    return build(config.MODEL_CONFIG.get("registry", {}))
+
+
+@app.route("/{name}/predict/", methods=["POST"], name="predict")
+async def predict(name: str, request: http.Request):
+    """
+    tags:
+        - Registry
+    summary:
+        Generate a prediction
+    description:
+        Generate a prediction using a model of the registry, loading it first if it is not in memory.
+    responses:
+        200:
+            description:
+                The prediction generated by the model, and the id and version of the model.
+        400:
+            description:
+                The input doesn't match the model schema.
+        404:
+            description:
+                The model is not in the registry.
+        503:
+            description:
+                The model cannot be loaded.
+    """
+    registry = get_registry()
+    if name not in registry:
+        raise exceptions.HTTPException(status_code=404, detail=f"Model '{name}' not found")
+
+    try:
+        model = await registry.get(name)
+    except Exception:  # Logged by the registry when the load fails
+        raise exceptions.HTTPException(status_code=503, detail=f"Model '{name}' cannot be loaded")
+
+    payload = await request.json()
+    try:
+        output = await model.apredict(payload.get("input") if isinstance(payload, dict) else None)
+    except (ValueError, TypeError) as e:
+        raise exceptions.HTTPException(status_code=400, detail=str(e))
+
+    return {"output": output, "model": model.info}
+
+
+@app.get("/", name="registry")
+def stats():
+    """
+    tags:
+        - Registry
+    summary:
+        Registry statistics
+    description:
+        Registered and loaded models, their estimated size and the number of hits, loads and evictions.
+    responses:
+        200:
+            description:
+                The registry statistics.
+    """
+    return get_registry().stats()
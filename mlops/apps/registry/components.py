@@ -0,0 +1,119 @@
+import asyncio
+import json
+import os
+import typing as t
+
+import flama
+from flama.serialize.data_structures import Metadata
+
+from mlops.apps.churn import components as churn_components
+from mlops.config import ROOT_PATH
+
+__all__ = ["KINDS", "Schema", "SchemaModel", "load"]
+
+KINDS = ("churn", "schema")
+
+# Python types accepted for every schema field type, besides None for missing values
+FIELD_TYPES: dict[str, tuple[type, ...]] = {
+    "integer": (int,),
+    "float": (int, float),
+    "category": (str,),
+    "date": (str,),
+}
+
+
+class Schema:
+    """Input columns of a model, the eligible features of a dataset schema such as ``data/cars/schema.json``.
+
+    :param fields: Name and type of every input column, in input order.
+    """
+
+    def __init__(self, fields: dict[str, str]):
+        self.fields = fields
+
+    @classmethod
+    def from_file(cls, path: str | os.PathLike) -> "Schema":
+        with open(path) as f:
+            schema = json.load(f)
+
+        return cls(
+            {
+                name: field["type"]
+                for name, field in schema.items()
+                if field.get("kind") == "feature" and field.get("eligible", True)
+            }
+        )
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.fields)
+
+    def check(self, rows: t.Any) -> list[list[t.Any]]:
+        """Check that rows hold a value of the right type, or None, for every column.
+
+        :param rows: Input rows.
+        :return: Input rows.
+        """
+        if not isinstance(rows, list) or not all(isinstance(row, list) for row in rows):
+            raise ValueError("Input must be a list of rows")
+
+        for i, row in enumerate(rows):
+            if len(row) != len(self.fields):
+                raise ValueError(
+                    f"Row {i} has {len(row)} values, expected {len(self.fields)}: {', '.join(self.fields)}"
+                )
+            for value, (name, kind) in zip(row, self.fields.items()):
+                types = FIELD_TYPES[kind]
+                if value is not None and (isinstance(value, bool) or not isinstance(value, types)):
+                    raise ValueError(f"Wrong value {value!r} of column '{name}' in row {i}, expected {kind}")
+        return rows
+
+
+class SchemaModel:
+    """Model predicting from rows of the eligible features of a dataset schema, as a DataFrame with those columns.
+
+    :param model: Fitted estimator.
+    :param meta: Artifact metadata.
+    :param schema: Input schema.
+    """
+
+    def __init__(self, model: t.Any, meta: Metadata, schema: Schema):
+        self.model = model
+        self.meta = meta
+        self.schema = schema
+
+    @property
+    def info(self) -> dict[str, t.Any]:
+        return {"id": str(self.meta.id), "version": (self.meta.extra or {}).get("model_version")}
+
+    def predict(self, rows: list[list[t.Any]]) -> list[t.Any]:
+        # Imported here so that registering models doesn't import pandas
+        import pandas as pd
+
+        return self.model.predict(pd.DataFrame(rows, columns=self.schema.columns)).tolist()
+
+    async def apredict(self, x: t.Any) -> list[t.Any]:
+        """Check the rows against the schema and predict them in a worker thread, so the event loop keeps serving."""
+        return await asyncio.to_thread(self.predict, self.schema.check(x))
+
+
+def load(name: str, entry: dict[str, t.Any]) -> churn_components.ChurnModel | SchemaModel:
+    """Load a model of the registry, as described by its ``model.yaml`` entry.
+
+    :param name: Model name.
+    :param entry: Model ``kind``, ``artifact`` path and, for churn models, inference ``backend`` or, for schema models,
+        ``schema`` path. Paths are relative to the repository root.
+    :return: Model.
+    """
+    artifact = ROOT_PATH / entry["artifact"]
+    if entry["kind"] == "churn":
+        model = churn_components.load(artifact, backend=entry.get("backend", "sklearn")).model
+        model.name = name  # Metrics label
+        model.warmup()
+        return model
+
+    if entry["kind"] == "schema":
+        loaded = flama.load(artifact)
+        return SchemaModel(loaded.model, loaded.meta, Schema.from_file(ROOT_PATH / entry["schema"]))
+
+    raise ValueError(f"Wrong kind '{entry['kind']}' of model '{name}', expected one of: {', '.join(KINDS)}")
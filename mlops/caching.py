@@ -0,0 +1,175 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import typing as t
+from pathlib import Path
+
+from mlops import datasets
+
+__all__ = ["TaskCache", "fingerprint", "code_version"]
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FILE = "output.json"
+
+
+def fingerprint(
+    *,
+    data: t.Mapping[str, str] | None = None,
+    config: t.Any = None,
+    code: t.Any = None,
+    seed: int | None = None,
+) -> str:
+    """Content address of the inputs of a task, the same for every run with the same inputs.
+
+    :param data: Content hash of every input dataset, by name.
+    :param config: Config the task depends on, JSON serializable.
+    :param code: Version of the code run by the task, such as :func:`code_version`.
+    :param seed: Random seed.
+    :return: SHA-256 hash of the inputs.
+    """
+    inputs = {"data": dict(data or {}), "config": config, "code": code, "seed": seed}
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def code_version(*paths: str | os.PathLike) -> str:
+    """SHA-256 hash of the Python sources in the given files and directories, so that any change of code yields a new
+    version.
+
+    :param paths: Source files or directories.
+    :return: Code version.
+    """
+    sha256 = hashlib.sha256()
+    for path in map(Path, paths):
+        for source in sorted(path.rglob("*.py")) if path.is_dir() else [path]:
+            sha256.update(source.relative_to(path if path.is_dir() else path.parent).as_posix().encode())
+            sha256.update(datasets.digest(source).encode())
+    return sha256.hexdigest()
+
+
+class TaskCache:
+    """Outputs of past task runs, addressed by the :func:`fingerprint` of their inputs, in a local directory.
+
+    Every entry holds the JSON output of a run and copies of the files it wrote, which are copied back to where they
+    were written when the entry is reused. Entries are dropped once they have not been used for ``max_age`` days, and
+    past the ``max_entries`` most recently used ones of every task.
+
+    :param directory: Cache directory.
+    :param max_age: Days an entry is kept since it was last used, forever if not set.
+    :param max_entries: Max entries kept per task, no limit if not set.
+    """
+
+    def __init__(self, directory: str | os.PathLike, *, max_age: float | None = None, max_entries: int | None = None):
+        self.directory = Path(directory)
+        self.max_age = max_age
+        self.max_entries = max_entries
+
+    def path(self, task: str, key: str) -> Path:
+        return self.directory / task / key
+
+    def get(self, task: str, key: str) -> dict[str, t.Any] | None:
+        """Output of a past run of a task with the same inputs, restoring the files it wrote.
+
+        :param task: Task name.
+        :param key: Fingerprint of the task inputs.
+        :return: Output, None if there is no such run.
+        """
+        path = self.path(task, key)
+        try:
+            entry = json.loads((path / OUTPUT_FILE).read_text())
+            for name, target in entry["files"].items():
+                _copy(path / "files" / name, target)
+        except (OSError, ValueError, KeyError):
+            if path.exists():
+                logger.warning("Dropping broken cache entry '%s'", path)
+                shutil.rmtree(path, ignore_errors=True)
+            return None
+
+        os.utime(path / OUTPUT_FILE)  # Last used, for the retention policy
+        return entry["output"]
+
+    def put(
+        self, task: str, key: str, output: dict[str, t.Any], files: t.Iterable[str | os.PathLike] = ()
+    ) -> Path | None:
+        """Store the output of a task run and copies of the files it wrote, then drop entries past retention.
+
+        :param task: Task name.
+        :param key: Fingerprint of the task inputs.
+        :param output: Task output, JSON serializable.
+        :param files: Files written by the task.
+        :return: Entry path, None if another run stored the same entry first.
+        """
+        path = self.path(task, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Written aside and renamed, so a half written entry is never read
+        staging = Path(tempfile.mkdtemp(dir=path.parent, suffix=".tmp"))
+        targets = {}
+        for i, file in enumerate(map(Path, files)):
+            name = f"{i}-{file.name}"
+            _copy(file, staging / "files" / name)
+            targets[name] = file.absolute().as_posix()
+        (staging / OUTPUT_FILE).write_text(json.dumps({"output": output, "files": targets, "created": time.time()}))
+
+        try:
+            os.replace(staging, path)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            return None
+        finally:
+            self.evict(task)
+        return path
+
+    def drop(self, task: str, key: str) -> bool:
+        """Drop an entry, such as one whose output refers to something that no longer exists.
+
+        :param task: Task name.
+        :param key: Fingerprint of the task inputs.
+        :return: Whether there was such an entry.
+        """
+        if not (path := self.path(task, key)).exists():
+            return False
+
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info("Dropped cache entry '%s'", path)
+        return True
+
+    def entries(self, task: str) -> list[Path]:
+        """Entries of a task, from the most recently used one."""
+        if not (directory := self.directory / task).exists():
+            return []
+
+        entries = [p for p in directory.iterdir() if (p / OUTPUT_FILE).exists()]
+        return sorted(entries, key=lambda p: (p / OUTPUT_FILE).stat().st_mtime, reverse=True)
+
+    def evict(self, task: str) -> list[Path]:
+        """Drop the entries of a task past the retention policy.
+
+        :param task: Task name.
+        :return: Dropped entries.
+        """
+        entries = self.entries(task)
+        limit = time.time() - self.max_age * 86400 if self.max_age is not None else None
+        evicted = [
+            entry
+            for i, entry in enumerate(entries)
+            if (self.max_entries is not None and i >= self.max_entries)
+            or (limit is not None and (entry / OUTPUT_FILE).stat().st_mtime < limit)
+        ]
+        for entry in evicted:
+            shutil.rmtree(entry, ignore_errors=True)
+            logger.info("Evicted cache entry '%s'", entry)
+        return evicted
+
+
+def _copy(source: str | os.PathLike, target: str | os.PathLike) -> None:
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Copied aside and renamed, so readers of the target never see a partial file
+    with open(source, "rb") as src, tempfile.NamedTemporaryFile(dir=target.parent, suffix=".tmp", delete=False) as f:
+        shutil.copyfileobj(src, f)
+    os.replace(f.name, target)
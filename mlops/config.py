@@ -1,11 +1,33 @@
+import typing as t
 from pathlib import Path
 
-import yaml
 from flama.config import Config
 
 __all__ = [
     "MODEL_CONFIG",
     "CHURN_ARTIFACT_PATH",
+    "CHURN_SNAPSHOT_PATH",
+    "CHURN_BACKEND",
+    "CHURN_BATCHING",
+    "CHURN_BATCH_SIZE",
+    "CHURN_BATCH_WAIT",
+    "CHURN_BATCH_QUEUE_SIZE",
+    "CHURN_CACHE",
+    "CHURN_CACHE_SIZE",
+    "CHURN_CACHE_TTL",
+    "CHURN_RELOAD_INTERVAL",
+    "CHURN_RELOAD_TOKEN",
+    "CHURN_SNAPSHOT",
+    "CHURN_CANARY_PATH",
+    "CHURN_CANARY_SHARE",
+    "CHURN_SHADOW_PATH",
+    "CHURN_MIRROR_QUEUE_SIZE",
+    "CHURN_MIRROR_CONCURRENCY",
+    "CHURN_DRIFT",
+    "CHURN_DRIFT_BUFFER_SIZE",
+    "METRICS",
+    "WORKERS",
+    "CHURN_SHARED_MODEL",
     "DEBUG",
     "VERSION",
     "HOST",
@@ -16,14 +38,29 @@ ROOT_PATH = Path(__file__).parents[1]
 
 
 def load_model_config():
+    import yaml
+
     with open(ROOT_PATH / "model.yaml") as f:
         config = yaml.safe_load(f)
     return config
 
 
+def strtobool(value) -> bool:
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+def __getattr__(name: str) -> t.Any:
+    # The model config is only read the first time it is used, so that serving doesn't pay for it at import
+    if name == "MODEL_CONFIG":
+        globals()[name] = load_model_config()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # Model config
-MODEL_CONFIG = load_model_config()
+MODEL_CONFIG: dict[str, t.Any]  # Read on first access
 CHURN_ARTIFACT_PATH = ROOT_PATH / "artifacts" / "models" / "churn" / "model.flm"
+CHURN_SNAPSHOT_PATH = CHURN_ARTIFACT_PATH.with_suffix(".plan")  # Written by `python -m mlops snapshot`
 
 # Flama config:
 config = Config()
@@ -31,3 +68,30 @@ DEBUG = config("DEBUG", cast=bool, default=False)
 VERSION = config("VERSION", cast=str, default="0.1.0")
 HOST = config("HOST", default="0.0.0.0")
 PORT = config("PORT", cast=int, default=8000)
+WORKERS = config("WORKERS", cast=int, default=1)  # Server processes, sharing a memory-mapped model when more than one
+
+# Serving config:
+CHURN_BACKEND = config("CHURN_BACKEND", cast=str, default="sklearn")
+CHURN_SNAPSHOT = config("CHURN_SNAPSHOT", cast=strtobool, default=True)  # Load the NumPy engine from its snapshot
+CHURN_BATCHING = config("CHURN_BATCHING", cast=strtobool, default=False)
+CHURN_BATCH_SIZE = config("CHURN_BATCH_SIZE", cast=int, default=64)  # Max rows per batch
+CHURN_BATCH_WAIT = config("CHURN_BATCH_WAIT", cast=float, default=5.0)  # Max wait in milliseconds
+CHURN_SHARED_MODEL = config("CHURN_SHARED_MODEL", default=None)  # Inference plan file set for the workers
+CHURN_BATCH_QUEUE_SIZE = config("CHURN_BATCH_QUEUE_SIZE", cast=int, default=1024)  # Max queued requests
+CHURN_RELOAD_INTERVAL = config("CHURN_RELOAD_INTERVAL", cast=float, default=5.0)  # Artifact polling seconds, 0 disables
+CHURN_RELOAD_TOKEN = config(
+    "CHURN_RELOAD_TOKEN", default=None
+)  # Bearer token of POST /churn/reload/, disabled if unset
+CHURN_CACHE = config("CHURN_CACHE", cast=strtobool, default=False)
+CHURN_CACHE_SIZE = config("CHURN_CACHE_SIZE", cast=float, default=64.0)  # Max size in megabytes
+CHURN_CACHE_TTL = config("CHURN_CACHE_TTL", cast=float, default=3600.0)  # Entries time to live in seconds
+CHURN_CANARY_PATH = config("CHURN_CANARY_PATH", default=None)  # Candidate artifact serving a share of the traffic
+CHURN_CANARY_SHARE = config("CHURN_CANARY_SHARE", cast=float, default=0.1)  # Share of requests served by the canary
+CHURN_SHADOW_PATH = config("CHURN_SHADOW_PATH", default=None)  # Candidate artifact scoring mirrored requests
+CHURN_MIRROR_QUEUE_SIZE = config("CHURN_MIRROR_QUEUE_SIZE", cast=int, default=256)  # Max mirrored requests queued
+CHURN_MIRROR_CONCURRENCY = config(
+    "CHURN_MIRROR_CONCURRENCY", cast=int, default=1
+)  # Max mirrored requests scored at once
+CHURN_DRIFT = config("CHURN_DRIFT", cast=strtobool, default=True)  # Monitor drift from the artifact reference summary
+CHURN_DRIFT_BUFFER_SIZE = config("CHURN_DRIFT_BUFFER_SIZE", cast=int, default=256)  # Rows buffered per sketch update
+METRICS = config("METRICS", cast=strtobool, default=True)  # Serve Prometheus metrics at /metrics/
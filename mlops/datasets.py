@@ -0,0 +1,129 @@
+import hashlib
+import os
+import tempfile
+import typing as t
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+__all__ = ["digest", "save_frame", "load_frame", "difference", "RowGroup", "row_groups", "read_row_group", "hash_split"]
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def digest(path: str | os.PathLike) -> str:
+    """SHA-256 hash of the content of a file, read in chunks."""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def save_frame(df: pd.DataFrame, directory: str | os.PathLike) -> dict[str, str]:
+    """Write a DataFrame as an Arrow IPC file named after the hash of its content.
+
+    Writing the same data twice yields the same file, so it can be shared between tasks and runs by passing only its
+    path and hash around.
+
+    :param df: DataFrame to save.
+    :param directory: Artifacts directory.
+    :return: Path and SHA-256 hash of the file.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as f:
+        with pa.ipc.new_file(f, table.schema) as writer:
+            writer.write_table(table)
+
+    sha256 = digest(f.name)
+    path = directory / f"{sha256}.arrow"
+    os.replace(f.name, path)
+    return {"path": path.as_posix(), "sha256": sha256}
+
+
+def load_frame(path: str | os.PathLike, sha256: str | None = None) -> pd.DataFrame:
+    """Load a DataFrame saved by :func:`save_frame`, memory-mapping the file instead of reading it.
+
+    Numeric columns without nulls are read-only views of the mapped file, not copies. String columns and columns with
+    nulls are converted to pandas objects, and the Arrow buffers are released column by column as they are converted.
+
+    :param path: File path.
+    :param sha256: Expected content hash, checked against the content-addressed file name.
+    :return: DataFrame.
+    """
+    path = Path(path)
+    if sha256 is not None and path.stem != sha256:
+        raise ValueError(f"File '{path}' does not match hash '{sha256}'")
+
+    table = pa.ipc.open_file(pa.memory_map(path.as_posix())).read_all()
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def difference(df: pd.DataFrame, other: pd.DataFrame) -> pd.DataFrame:
+    """Rows of a DataFrame whose values are not in another one, compared by a hash of their content.
+
+    :param df: DataFrame.
+    :param other: DataFrame with the same columns.
+    :return: Rows of ``df`` not in ``other``.
+    """
+    seen = pd.util.hash_pandas_object(other[df.columns], index=False)
+    return df[~pd.util.hash_pandas_object(df, index=False).isin(seen).to_numpy()]
+
+
+class RowGroup(t.NamedTuple):
+    """Row group of a Parquet file."""
+
+    path: str
+    index: int
+    rows: int
+
+
+def row_groups(path: str | os.PathLike) -> list[RowGroup]:
+    """Row groups of a Parquet file, or of every Parquet file in a directory, in file order. Only file metadata is read.
+
+    :param path: Parquet file or directory of Parquet parts.
+    :return: Row groups.
+    """
+    path = Path(path)
+    files = sorted(path.rglob("*.parquet")) if path.is_dir() else [path]
+    if not files:
+        raise ValueError(f"No Parquet files in '{path}'")
+
+    groups = []
+    for file in files:
+        metadata = pq.ParquetFile(file).metadata
+        groups += [RowGroup(file.as_posix(), i, metadata.row_group(i).num_rows) for i in range(metadata.num_row_groups)]
+    return groups
+
+
+def read_row_group(row_group: RowGroup, columns: t.Sequence[str] | None = None) -> pd.DataFrame:
+    """Read a single row group of a Parquet file.
+
+    :param row_group: Row group.
+    :param columns: Columns to read, all of them if not set.
+    :return: DataFrame.
+    """
+    return pq.ParquetFile(row_group.path).read_row_group(row_group.index, columns=columns).to_pandas()
+
+
+def hash_split(ids: t.Any, test_size: float, seed: int = 0) -> np.ndarray:
+    """Deterministic train/test split by a hash of the row ids, so a row lands on the same side in every run and every
+    chunk of a dataset can be split on its own.
+
+    :param ids: Integer row ids.
+    :param test_size: Expected share of test rows.
+    :param seed: Hash seed.
+    :return: Whether every row is a test row.
+    """
+    # SplitMix64 finalizer, wrapping around on overflow
+    x = np.asarray(ids).astype(np.uint64) + np.uint64(seed * 0x9E3779B97F4A7C15 % 2**64)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(float) / 2**53 < test_size
@@ -0,0 +1,241 @@
+import threading
+import typing as t
+
+import numpy as np
+
+from mlops.sketches import FrequentItems, QuantileSketch
+
+__all__ = ["DriftMonitor", "summarize", "psi"]
+
+# Floor of the bin shares in the PSI, so that empty bins don't make it infinite
+PSI_FLOOR = 1e-4
+
+
+def psi(expected: t.Sequence[float], actual: t.Sequence[float]) -> float:
+    """Population stability index between two distributions over the same bins.
+
+    :param expected: Reference share of every bin.
+    :param actual: Observed share of every bin.
+    :return: PSI.
+    """
+    expected, actual = (np.maximum(np.asarray(x, dtype=float), PSI_FLOOR) for x in (expected, actual))
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def _missing(values: np.ndarray) -> np.ndarray:
+    return np.array([value is None or value != value for value in values], dtype=bool)
+
+
+def _summarize_numerical(values: np.ndarray, bins: int, points: int) -> dict[str, t.Any]:
+    present = np.sort(values[~np.isnan(values)])
+    # Bins are closed on the right, matching the shares given by a cumulative distribution at their edges
+    edges = np.unique(np.quantile(present, np.linspace(0, 1, bins + 1)[1:-1])) if len(present) else np.empty(0)
+    counts = np.bincount(np.searchsorted(edges, present, side="left"), minlength=len(edges) + 1)
+    grid = np.unique(np.quantile(present, np.linspace(0, 1, points + 1))) if len(present) else np.empty(0)
+    return {
+        "missing": 1 - len(present) / len(values) if len(values) else 0.0,
+        "edges": edges.tolist(),
+        "shares": (counts / max(len(present), 1)).tolist(),
+        "points": grid.tolist(),
+        "cdf": (np.searchsorted(present, grid, side="right") / max(len(present), 1)).tolist(),
+    }
+
+
+def _summarize_categorical(values: np.ndarray, capacity: int) -> dict[str, t.Any]:
+    missing = _missing(values)
+    items = FrequentItems(capacity).update(str(value) for value in values[~missing])
+    return {"missing": float(missing.mean()) if len(values) else 0.0, "frequencies": items.frequencies()}
+
+
+def summarize(
+    X: t.Any,
+    numerical: t.Sequence[str],
+    categorical: t.Sequence[str],
+    output: t.Any,
+    *,
+    bins: int = 10,
+    points: int = 100,
+    capacity: int = 32,
+) -> dict[str, t.Any]:
+    """Reference summary of the data a model was trained on, compared by :class:`DriftMonitor` with the served one.
+
+    Numerical columns and the output are summarized by their shares over ``bins`` quantile bins and their cumulative
+    distribution at ``points`` quantiles, and categorical columns by the shares of their ``capacity`` most frequent
+    categories. Missing values are summarized by their share. The summary is JSON serializable.
+
+    :param X: Training features, as a DataFrame.
+    :param numerical: Monitored numerical columns.
+    :param categorical: Monitored categorical columns.
+    :param output: Predicted probability of the positive class for every row.
+    :param bins: Quantile bins of the numerical columns.
+    :param points: Quantiles the cumulative distributions are kept at.
+    :param capacity: Max categories kept per categorical column.
+    :return: Reference summary.
+    """
+    return {
+        "rows": len(X),
+        "columns": [str(column) for column in X.columns],
+        "numerical": {
+            str(name): _summarize_numerical(np.asarray(X[name], dtype=float), bins, points) for name in numerical
+        },
+        "categorical": {
+            str(name): _summarize_categorical(np.asarray(X[name], dtype=object), capacity) for name in categorical
+        },
+        "output": _summarize_numerical(np.asarray(output, dtype=float), bins, points),
+    }
+
+
+class DriftMonitor:
+    """Streaming summary of the rows served by a model and of its output, compared on demand with the summary of its
+    training data written by :func:`summarize`.
+
+    Rows are buffered and, once ``buffer_size`` of them are waiting, every numerical column and the output are added to
+    a :class:`~mlops.sketches.QuantileSketch` and every categorical column to a
+    :class:`~mlops.sketches.FrequentItems` counter. Memory doesn't grow with the rows seen and the cost per row is
+    amortized constant. Reports give, for every column and the output, the PSI over the reference bins plus missing
+    values and, for numerical ones, the KS distance at the reference points.
+
+    :param reference: Reference summary.
+    :param epsilon: Rank error of the quantile sketches.
+    :param capacity: Max categories counted per categorical column.
+    :param buffer_size: Rows buffered before they are added to the sketches.
+    :param threshold: PSI above which a column is reported as drifted.
+    """
+
+    def __init__(
+        self,
+        reference: dict[str, t.Any],
+        *,
+        epsilon: float = 0.01,
+        capacity: int = 32,
+        buffer_size: int = 256,
+        threshold: float = 0.2,
+    ):
+        self.reference = reference
+        self.buffer_size = buffer_size
+        self.threshold = threshold
+        self.numerical = list(reference["numerical"])
+        self.categorical = list(reference["categorical"])
+        self.sketches = {name: QuantileSketch(epsilon) for name in self.numerical}
+        self.items = {name: FrequentItems(capacity) for name in self.categorical}
+        self.output = QuantileSketch(epsilon)
+        self.missing = dict.fromkeys(self.numerical + self.categorical, 0)
+        self.rows = 0
+        self._positions = [reference["columns"].index(name) for name in self.numerical + self.categorical]
+        self._inputs: list[np.ndarray] = []
+        self._outputs: list[np.ndarray] = []
+        self._buffered = 0
+        self._lock = threading.Lock()
+
+    def observe(self, rows: t.Any, output: t.Any) -> None:
+        """Add served rows and the probability of the positive class predicted for them.
+
+        :param rows: Input rows, in training column order.
+        :param output: Predicted probabilities.
+        """
+        if not len(rows):
+            return
+
+        inputs = np.asarray(rows, dtype=object).reshape(len(rows), -1)[:, self._positions]
+        with self._lock:
+            self._inputs.append(inputs)
+            self._outputs.append(np.asarray(output, dtype=float))
+            self._buffered += len(inputs)
+            if self._buffered >= self.buffer_size:
+                self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffered:
+            return
+
+        inputs = np.concatenate(self._inputs)
+        for i, name in enumerate(self.numerical):
+            values = np.asarray(inputs[:, i], dtype=float)
+            self.sketches[name].update(values)
+            self.missing[name] += int(np.isnan(values).sum())
+        for i, name in enumerate(self.categorical, start=len(self.numerical)):
+            missing = _missing(inputs[:, i])
+            self.items[name].update(str(value) for value in inputs[~missing, i])
+            self.missing[name] += int(missing.sum())
+        self.output.update(np.concatenate(self._outputs))
+
+        self.rows += self._buffered
+        self._inputs, self._outputs, self._buffered = [], [], 0
+
+    def _numerical(self, reference: dict[str, t.Any], sketch: QuantileSketch, missing: int) -> dict[str, t.Any]:
+        missing_share = missing / self.rows
+        shares = (
+            np.diff([0.0, *sketch.cdf(reference["edges"]), 1.0])
+            if len(sketch)
+            else np.zeros(len(reference["edges"]) + 1)
+        )
+        return {
+            "psi": psi(
+                [*np.multiply(reference["shares"], 1 - reference["missing"]), reference["missing"]],
+                [*shares * (1 - missing_share), missing_share],
+            ),
+            "ks": (
+                float(np.abs(sketch.cdf(reference["points"]) - np.asarray(reference["cdf"])).max())
+                if len(sketch) and reference["points"]
+                else None
+            ),
+            "missing": missing_share,
+            "reference_missing": reference["missing"],
+        }
+
+    def _categorical(self, reference: dict[str, t.Any], items: FrequentItems, missing: int) -> dict[str, t.Any]:
+        missing_share = missing / self.rows
+        frequencies = items.frequencies() if len(items) else {}
+        categories = list(dict.fromkeys([*reference["frequencies"], *frequencies]))
+        # Categories counted on one side only are compared with the remaining share of the other one
+        expected, actual = (
+            np.array([shares.get(category, 0.0) for category in categories])
+            for shares in (reference["frequencies"], frequencies)
+        )
+        other = (max(1 - expected.sum(), 0.0), max(1 - actual.sum(), 0.0) if frequencies else 0.0)
+        return {
+            "psi": psi(
+                [*expected * (1 - reference["missing"]), other[0] * (1 - reference["missing"]), reference["missing"]],
+                [*actual * (1 - missing_share), other[1] * (1 - missing_share), missing_share],
+            ),
+            "missing": missing_share,
+            "reference_missing": reference["missing"],
+            "frequencies": frequencies,
+        }
+
+    def report(self) -> dict[str, t.Any]:
+        """Drift of every monitored column and of the output from the reference, None until a row is observed."""
+        with self._lock:
+            self._flush()
+            if not self.rows:
+                return {
+                    "rows": 0,
+                    "reference_rows": self.reference["rows"],
+                    "threshold": self.threshold,
+                    "drifted": [],
+                    "columns": None,
+                    "output": None,
+                }
+
+            columns = {
+                **{
+                    name: self._numerical(self.reference["numerical"][name], self.sketches[name], self.missing[name])
+                    for name in self.numerical
+                },
+                **{
+                    name: self._categorical(self.reference["categorical"][name], self.items[name], self.missing[name])
+                    for name in self.categorical
+                },
+            }
+            output = self._numerical(self.reference["output"], self.output, 0)
+
+        return {
+            "rows": self.rows,
+            "reference_rows": self.reference["rows"],
+            "threshold": self.threshold,
+            "drifted": [
+                name for name, column in {**columns, "output": output}.items() if column["psi"] > self.threshold
+            ],
+            "columns": columns,
+            "output": output,
+        }
@@ -0,0 +1,2 @@
+from mlops.engines.churn import *  # noqa
+from mlops.engines.plans import *  # noqa
@@ -0,0 +1,274 @@
+import numpy as np
+
+__all__ = ["ChurnEngine", "build_plan", "fold"]
+
+DTYPE = np.float32
+
+
+def _identity(x):
+    return x
+
+
+def _logistic(x):
+    # Equivalent to 1 / (1 + exp(-x)) without overflowing float32 for large negative inputs
+    x *= 0.5
+    np.tanh(x, out=x)
+    x += 1.0
+    x *= 0.5
+    return x
+
+
+def _tanh(x):
+    return np.tanh(x, out=x)
+
+
+def _relu(x):
+    return np.maximum(x, 0, out=x)
+
+
+def _softmax(x):
+    x -= x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+ACTIVATIONS = {
+    "identity": _identity,
+    "logistic": _logistic,
+    "tanh": _tanh,
+    "relu": _relu,
+    "softmax": _softmax,
+}
+
+
+def build_plan(estimator) -> dict[str, np.ndarray]:
+    """Flatten a fitted churn pipeline into a plan of plain NumPy arrays.
+
+    :param estimator: Fitted churn pipeline, or a search object wrapping it.
+    :return: Inference plan.
+    """
+    estimator = getattr(estimator, "best_estimator_", estimator)
+    preprocessing = estimator.named_steps["preprocessing"]
+    classifier = estimator.named_steps["mlp_classifier"]
+
+    transformers = {name: (transformer, columns) for name, transformer, columns in preprocessing.transformers_}
+    numerical, numerical_columns = transformers["numerical"]
+    categorical, categorical_columns = transformers["categorical"]
+
+    imputer = numerical.named_steps["imputer"]
+    clipper = numerical.named_steps["outlier_clipper"]
+    scaler = numerical.named_steps["scaler"]
+    categorical_imputer = categorical.named_steps["imputer"]
+    onehot = categorical.named_steps["onehot"]
+
+    if imputer.add_indicator or categorical_imputer.add_indicator:
+        raise ValueError("Missing value indicators are not supported by the inference plan")
+
+    if onehot.drop_idx_ is not None:
+        raise ValueError("Dropped one-hot categories are not supported by the inference plan")
+
+    n_numerical = len(numerical_columns)
+    plan = {
+        "n_features_in": np.asarray(preprocessing.n_features_in_),
+        "numerical_columns": np.asarray(numerical_columns),
+        "categorical_columns": np.asarray(categorical_columns),
+        "impute": np.asarray(imputer.statistics_, dtype=DTYPE),
+        "lower_bounds": np.asarray(clipper.lower_bounds_, dtype=DTYPE),
+        "upper_bounds": np.asarray(clipper.upper_bounds_, dtype=DTYPE),
+        "mean": np.asarray(scaler.mean_ if scaler.with_mean else np.zeros(n_numerical), dtype=DTYPE),
+        "scale": np.asarray(scaler.scale_ if scaler.with_std else np.ones(n_numerical), dtype=DTYPE),
+        "categorical_fill": np.asarray(categorical_imputer.fill_value, dtype=str),
+        "activation": np.asarray(classifier.activation),
+        "out_activation": np.asarray(classifier.out_activation_),
+        "classes": np.asarray(classifier.classes_),
+        "n_layers": np.asarray(len(classifier.coefs_)),
+    }
+
+    if hasattr(estimator, "feature_names_in_"):
+        plan["feature_names"] = np.asarray(estimator.feature_names_in_, dtype=str)
+
+    for i, categories in enumerate(onehot.categories_):
+        plan[f"categories_{i}"] = np.asarray(categories, dtype=str)
+
+    for i, (coef, intercept) in enumerate(zip(classifier.coefs_, classifier.intercepts_)):
+        plan[f"coefs_{i}"] = np.ascontiguousarray(coef, dtype=DTYPE)
+        plan[f"intercepts_{i}"] = np.ascontiguousarray(intercept, dtype=DTYPE)
+
+    plan.update(fold(plan))
+    return plan
+
+
+def fold(plan: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """First layer of a plan with the scaler folded into its weights and every one-hot block turned into a lookup table
+    of its rows, the arrays :class:`ChurnEngine` runs.
+
+    They are part of every plan built by :func:`build_plan`, so that processes mapping a plan file share them as well
+    instead of computing a copy each.
+
+    :param plan: Inference plan.
+    :return: Numerical weights ``numerical_coef``, bias ``first_intercept`` and a ``table_<i>`` per categorical column.
+    """
+    n_numerical = len(plan["numerical_columns"])
+    first, scale, mean = plan["coefs_0"], plan["scale"], plan["mean"]
+    folded = {
+        "numerical_coef": np.ascontiguousarray(first[:n_numerical] / scale[:, None], dtype=DTYPE),
+        "first_intercept": (plan["intercepts_0"] - (mean / scale) @ first[:n_numerical]).astype(DTYPE),
+    }
+
+    offset = n_numerical
+    for i in range(len(plan["categorical_columns"])):
+        n_categories = len(plan[f"categories_{i}"])
+        # Last row is all zeros so unknown categories contribute nothing, as in `handle_unknown="ignore"`
+        table = np.zeros((n_categories + 1, first.shape[1]), dtype=DTYPE)
+        table[:-1] = first[offset : offset + n_categories]
+        folded[f"table_{i}"] = table
+        offset += n_categories
+
+    return folded
+
+
+class ChurnEngine:
+    """Runs a churn inference plan as a handful of NumPy matrix products.
+
+    The scaler is folded into the first layer weights and every one-hot block is replaced by a lookup table of first
+    layer rows, so the only dense matrix built per request is the numerical block and categories are kept as codes of
+    the smallest integer type that fits them.
+    """
+
+    def __init__(self, plan: dict[str, np.ndarray]):
+        if "numerical_coef" not in plan:  # Plan written before the first layer was folded into it
+            plan = {**plan, **fold(plan)}
+
+        self.plan = plan
+        self.n_features_in_ = int(plan["n_features_in"])
+        self.numerical_columns = plan["numerical_columns"]
+        self.categorical_columns = plan["categorical_columns"]
+        self.impute = plan["impute"]
+        self.lower_bounds = plan["lower_bounds"]
+        self.upper_bounds = plan["upper_bounds"]
+        self.categorical_fill = str(plan["categorical_fill"])
+        self.classes_ = plan["classes"]
+        if "feature_names" in plan:
+            self.feature_names_in_ = plan["feature_names"].astype(object)
+        self.activation = ACTIVATIONS[str(plan["activation"])]
+        self.out_activation = ACTIVATIONS[str(plan["out_activation"])]
+
+        # Every weight is used as is, so the ones of a mapped plan stay views of the file shared between processes
+        self.numerical_coef = plan["numerical_coef"]
+        self.first_intercept = plan["first_intercept"]
+        self.categories = [plan[f"categories_{i}"].astype(object) for i in range(len(self.categorical_columns))]
+        self.tables = [plan[f"table_{i}"] for i in range(len(self.categorical_columns))]
+        self.layers = [(plan[f"coefs_{i}"], plan[f"intercepts_{i}"]) for i in range(1, int(plan["n_layers"]))]
+
+    @classmethod
+    def from_estimator(cls, estimator) -> "ChurnEngine":
+        return cls(build_plan(estimator))
+
+    def _check(self, X):
+        if not hasattr(X, "iloc") and not isinstance(X, np.ndarray):
+            X = np.asarray(X, dtype=object)
+
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1]} features, but the engine is expecting {self.n_features_in_}")
+
+        return X
+
+    @staticmethod
+    def _block(X, columns: np.ndarray) -> np.ndarray:
+        if hasattr(X, "iloc"):
+            return (X.iloc[:, columns] if columns.dtype.kind in "iu" else X[columns]).to_numpy()
+
+        return X[:, columns]
+
+    def _numerical(self, X) -> np.ndarray:
+        block = self._block(X, self.numerical_columns)
+        try:
+            numerical = np.array(block, dtype=DTYPE, order="C")
+        except TypeError:
+            numerical = np.array(np.where(np.equal(block, None), np.nan, block), dtype=DTYPE, order="C")
+
+        return self._clean(numerical)
+
+    def _clean(self, numerical: np.ndarray) -> np.ndarray:
+        np.copyto(numerical, np.broadcast_to(self.impute, numerical.shape), where=np.isnan(numerical))
+        return np.clip(numerical, self.lower_bounds, self.upper_bounds, out=numerical)
+
+    @staticmethod
+    def _code_dtype(categories: np.ndarray) -> np.dtype:
+        # Unknown categories take the code after the last one
+        return np.min_scalar_type(len(categories))
+
+    def _codes(self, column: np.ndarray, categories: np.ndarray) -> np.ndarray:
+        codes = np.full(len(column), len(categories), dtype=self._code_dtype(categories))
+        for code, category in enumerate(categories):
+            codes[column == category] = code
+
+        if self.categorical_fill in categories:
+            missing = np.not_equal(column, column) | np.equal(column, None)
+            codes[missing] = np.searchsorted(categories, self.categorical_fill)
+
+        return codes
+
+    def transform(self, X) -> tuple[np.ndarray, list[np.ndarray]]:
+        """Preprocess the data, as the column transformer does, into the numerical block and the category codes."""
+        X = self._check(X)
+        numerical = self._numerical(X)
+
+        codes = []
+        if len(self.categorical_columns):
+            categorical = self._block(X, self.categorical_columns).astype(object, copy=False)
+            codes = [self._codes(categorical[:, i], categories) for i, categories in enumerate(self.categories)]
+
+        return numerical, codes
+
+    def transform_columns(self, numerical: np.ndarray, codes: list[np.ndarray]) -> tuple[np.ndarray, list[np.ndarray]]:
+        """Preprocess data already decoded column by column, as :meth:`transform` does.
+
+        :param numerical: Numerical block, with NaN for missing values.
+        :param codes: Index of every value in the categories of its column, ``-1`` for missing values and the number of
+            categories for unknown ones.
+        :return: Numerical block and category codes.
+        """
+        if numerical.ndim != 2 or numerical.shape[1] != len(self.numerical_columns):
+            raise ValueError(
+                f"Numerical block has {numerical.shape[-1]} columns, but the engine is expecting "
+                f"{len(self.numerical_columns)}"
+            )
+
+        numerical = self._clean(np.array(numerical, dtype=DTYPE, order="C"))
+        transformed = []
+        for code, categories in zip(codes, self.categories):
+            fill = np.searchsorted(categories, self.categorical_fill) if self.categorical_fill in categories else None
+            code = np.where(code < 0, len(categories) if fill is None else fill, code)
+            transformed.append(code.astype(self._code_dtype(categories), copy=False))
+
+        return numerical, transformed
+
+    def forward(self, Xt: tuple[np.ndarray, list[np.ndarray]]) -> np.ndarray:
+        """Run the network on preprocessed data, as returned by :meth:`transform`."""
+        numerical, codes = Xt
+        hidden = numerical @ self.numerical_coef
+        hidden += self.first_intercept
+        for table, code in zip(self.tables, codes):
+            hidden += table[code]
+
+        for coef, intercept in self.layers:
+            hidden = self.activation(hidden) @ coef
+            hidden += intercept
+
+        output = self.out_activation(hidden)
+        if output.shape[1] == 1:
+            output = np.hstack((1.0 - output, output))
+
+        return output
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self.forward(self.transform(X))
+
+    def predict(self, X) -> np.ndarray:
+        probabilities = self.predict_proba(X)
+        if len(self.classes_) == 2:
+            return self.classes_[(probabilities[:, 1] > 0.5).astype(np.intp)]
+
+        return self.classes_[probabilities.argmax(axis=1)]
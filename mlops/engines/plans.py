@@ -0,0 +1,83 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+import typing as t
+from pathlib import Path
+
+import numpy as np
+
+__all__ = ["save_plan", "load_plan"]
+
+MAGIC = b"MLOPSPLN"
+ALIGNMENT = 64
+_LENGTH = struct.Struct("<Q")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_plan(plan: dict[str, np.ndarray], path: str | os.PathLike, **header: t.Any) -> Path:
+    """Write an inference plan into a single file laid out to be memory-mapped.
+
+    The file holds a JSON header with the dtype, shape and offset of every array, followed by the raw arrays aligned to
+    cache lines, so they can be used in place once mapped.
+
+    :param plan: Inference plan.
+    :param path: File path.
+    :param header: Extra JSON serializable data stored in the header.
+    :return: File path.
+    """
+    path = Path(path)
+    arrays = {name: np.asarray(value, order="C") for name, value in plan.items()}
+    if objects := [name for name, value in arrays.items() if value.dtype.hasobject]:
+        raise ValueError(f"Arrays with objects cannot be memory-mapped: {', '.join(objects)}")
+
+    layout, offset = {}, 0
+    for name, value in arrays.items():
+        layout[name] = {"dtype": value.dtype.str, "shape": value.shape, "offset": offset}
+        offset = _align(offset + value.nbytes)
+
+    metadata = json.dumps({"arrays": layout, **header}).encode()
+    start = _align(len(MAGIC) + _LENGTH.size + len(metadata))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as f:
+        f.write(MAGIC + _LENGTH.pack(len(metadata)) + metadata)
+        for name, value in arrays.items():
+            f.seek(start + layout[name]["offset"])
+            f.write(value.tobytes())
+        f.truncate(start + offset)
+
+    os.replace(f.name, path)
+    return path
+
+
+def load_plan(path: str | os.PathLike) -> tuple[dict[str, np.ndarray], dict[str, t.Any]]:
+    """Memory-map a plan written by :func:`save_plan`.
+
+    The arrays are read-only views over the mapped file, so processes loading the same file share its pages instead of
+    holding a copy each.
+
+    :param path: File path.
+    :return: Inference plan and extra header data.
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"File '{path}' is not an inference plan")
+
+    (length,) = _LENGTH.unpack_from(buffer, len(MAGIC))
+    header = json.loads(buffer[len(MAGIC) + _LENGTH.size : len(MAGIC) + _LENGTH.size + length])
+    start = _align(len(MAGIC) + _LENGTH.size + length)
+
+    plan = {}
+    for name, spec in header.pop("arrays").items():
+        dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+        count = int(np.prod(shape, dtype=np.int64))
+        plan[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=start + spec["offset"]).reshape(shape)
+
+    return plan, header
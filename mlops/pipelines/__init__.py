@@ -1 +1,5 @@
+from mlops.pipelines.cache import *  # noqa
 from mlops.pipelines.churn import *  # noqa
+from mlops.pipelines.execution import *  # noqa
+from mlops.pipelines.profiling import *  # noqa
+from mlops.pipelines.streaming import *  # noqa
@@ -0,0 +1,200 @@
+import collections
+import functools
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import typing as t
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse
+
+__all__ = ["TransformerCache"]
+
+# Stores are kept per process and looked up by name, so estimator clones and copies unpickled in a worker share them
+_STORES: dict[str, "_Store"] = {}
+_STORES_LOCK = threading.Lock()
+
+IGNORED_ARGUMENTS = ("message_clsname", "message")
+
+COUNTS = ("hits", "misses", "evictions", "entries", "size")
+
+
+def _nbytes(obj: t.Any) -> int:
+    if isinstance(obj, tuple | list):
+        return sum(_nbytes(x) for x in obj)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if scipy.sparse.issparse(obj):
+        return sum(getattr(obj, attr).nbytes for attr in ("data", "indices", "indptr") if hasattr(obj, attr))
+    if hasattr(obj, "memory_usage"):
+        return int(obj.memory_usage(deep=True).sum())
+    return 0
+
+
+def _fingerprint(obj: t.Any) -> bytes:
+    # Data is hashed with vectorized pandas hashing, much cheaper than pickling it through joblib.hash
+    if isinstance(obj, pd.DataFrame | pd.Series):
+        columns = obj.columns.tolist() if isinstance(obj, pd.DataFrame) else obj.name
+        return repr((columns, obj.shape)).encode() + pd.util.hash_pandas_object(obj, index=True).values.tobytes()
+    if isinstance(obj, np.ndarray):
+        if obj.dtype == object:
+            return (
+                repr(obj.shape).encode()
+                + pd.util.hash_pandas_object(pd.DataFrame(obj.reshape(len(obj), -1))).values.tobytes()
+            )
+        return repr((obj.shape, obj.dtype.str)).encode() + np.ascontiguousarray(obj).tobytes()
+    return joblib.hash(obj).encode()
+
+
+def _key(*args: t.Any) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    for arg in args:
+        digest.update(_fingerprint(arg))
+    return digest.hexdigest()
+
+
+class _Store:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: collections.OrderedDict[str, tuple[t.Any, int]] = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> t.Any:
+        with self.lock:
+            try:
+                value, _ = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                raise
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: t.Any) -> None:
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.size = self.hits = self.misses = self.evictions = 0
+
+    def counts(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "size": self.size,
+            }
+
+
+class TransformerCache:
+    """In-memory, size bounded LRU cache for the fitted transformers of a pipeline.
+
+    It implements the ``joblib.Memory`` interface expected by the ``memory`` parameter of
+    :class:`sklearn.pipeline.Pipeline`. Entries are keyed by a hash of the transformer parameters and the data it is
+    fitted on, so every search candidate sharing the same preprocessing reuses the one fitted on its fold.
+
+    Entries are kept per process, so search workers have a store of their own. Every store writes its statistics to a
+    directory of the process that created the cache, so that :meth:`stats` adds up the ones of every worker.
+
+    :param name: Store name, caches with the same name share their entries within a process.
+    :param max_size: Max size of the cached transformed data in megabytes.
+    :param owner: Process that created the cache, the current one if not set.
+    """
+
+    def __init__(self, name: str = "default", max_size: float = 512, owner: int | None = None):
+        self.name = name
+        self.max_size = max_size
+        self.owner = owner if owner is not None else os.getpid()
+
+    def __reduce__(self):
+        return self.__class__, (self.name, self.max_size, self.owner)
+
+    @property
+    def directory(self) -> Path:
+        """Directory of the statistics of the store of every process using the cache."""
+        return Path(tempfile.gettempdir()) / f"mlops-transformer-cache-{self.name}-{self.owner}"
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(name={self.name!r}, max_size={self.max_size!r})"
+
+    @property
+    def store(self) -> _Store:
+        with _STORES_LOCK:
+            if self.name not in _STORES:
+                _STORES[self.name] = _Store(max_bytes=int(self.max_size * 1024**2))
+            store = _STORES[self.name]
+            store.max_bytes = int(self.max_size * 1024**2)
+            return store
+
+    def cache(self, func: t.Callable) -> t.Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _key(
+                (func.__module__, func.__qualname__),
+                *args,
+                {k: v for k, v in kwargs.items() if k not in IGNORED_ARGUMENTS},
+            )
+            store = self.store
+            try:
+                result = store.get(key)
+            except KeyError:
+                result = func(*args, **kwargs)
+                store.put(key, result)
+
+            self._report(store)
+            return result
+
+        return wrapper
+
+    def _report(self, store: _Store) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{os.getpid()}.json"
+        # Written aside and renamed, so the file is never read half written
+        staging = path.with_name(f"{path.stem}-{threading.get_ident()}.tmp")
+        staging.write_text(json.dumps(store.counts()))
+        os.replace(staging, path)
+
+    def clear(self) -> None:
+        """Clear the store of this process and drop the statistics of every process."""
+        self.store.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def stats(self) -> dict[str, t.Any]:
+        """Statistics of the stores of every process that used the cache since it was last cleared."""
+        totals, processes = dict.fromkeys(COUNTS, 0), 0
+        for path in self.directory.glob("*.json"):
+            try:
+                counts = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for name in COUNTS:
+                totals[name] += counts[name]
+            processes += 1
+
+        requests = totals["hits"] + totals["misses"]
+        return {**totals, "hit_rate": totals["hits"] / requests if requests else 0.0, "processes": processes}
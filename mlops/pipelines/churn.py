@@ -1,16 +1,33 @@
+import numpy as np
 from sklearn.compose import ColumnTransformer
+from sklearn.experimental import enable_halving_search_cv  # noqa
 from sklearn.impute import SimpleImputer
-from sklearn.model_selection import GridSearchCV
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, RandomizedSearchCV
 from sklearn.neural_network import MLPClassifier
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
 
 import mlops.transformers as transformers
 from mlops.config import MODEL_CONFIG
+from mlops.pipelines.cache import TransformerCache
+from mlops.pipelines.execution import Execution
+from mlops.pipelines.profiling import ProfiledPipeline, ProfiledScorer, ThreadProfiledPipeline
+
+SEARCH_STRATEGIES = ("grid", "random", "halving")
 
 
 class ChurnPipeline:
-    def __init__(self, params, *, numeric_features, categorical_features):
+    def __init__(
+        self,
+        params,
+        *,
+        numeric_features,
+        categorical_features,
+        search=None,
+        cache=None,
+        execution=None,
+        profile=False,
+    ):
         self.numeric_features = list(
             set(numeric_features).difference(MODEL_CONFIG["models"]["churn"]["drop_features"]["numerical"])
         )
@@ -18,17 +35,39 @@ class ChurnPipeline:
             set(categorical_features).difference(MODEL_CONFIG["models"]["churn"]["drop_features"]["categorical"])
         )
         self.params = params
+        self.search = {"strategy": "grid", **(search or {})}
+        self.cache = cache or {}
+        self.execution = Execution(**(execution or {}))
+        self.profile = profile
+
+        if self.search["strategy"] not in SEARCH_STRATEGIES:
+            raise ValueError(
+                f"Wrong search strategy '{self.search['strategy']}', expected one of: {', '.join(SEARCH_STRATEGIES)}"
+            )
 
     def build(self):
+        return self._search(self.estimator())
+
+    def estimator(self):
+        """Unfitted churn pipeline: preprocessing and MLP classifier, before the search over its params."""
+        # Numerical columns are cast once to float32 into a new array, so the following steps work on it in place.
+        # Categories are few, so one-hot columns are stacked as a dense float32 block instead of a sparse matrix that
+        # the column transformer would densify next to the numerical block.
         preprocessor = ColumnTransformer(
             [
                 (
                     "numerical",
                     Pipeline(
                         [
-                            ("imputer", SimpleImputer(strategy="median")),
-                            ("outlier_clipper", transformers.OutlierClipper(factor=1.5)),
-                            ("scaler", StandardScaler()),
+                            (
+                                "cast",
+                                FunctionTransformer(
+                                    np.asarray, kw_args={"dtype": np.float32}, feature_names_out="one-to-one"
+                                ),
+                            ),
+                            ("imputer", SimpleImputer(strategy="median", copy=False)),
+                            ("outlier_clipper", transformers.OutlierClipper(factor=1.5, copy=False)),
+                            ("scaler", StandardScaler(copy=False)),
                         ]
                     ),
                     self.numeric_features,
@@ -38,24 +77,81 @@ class ChurnPipeline:
                     Pipeline(
                         [
                             ("imputer", SimpleImputer(strategy="constant", fill_value="missing")),
-                            ("onehot", OneHotEncoder(handle_unknown="ignore")),
+                            (
+                                "onehot",
+                                OneHotEncoder(handle_unknown="ignore", sparse_output=False, dtype=np.float32),
+                            ),
                         ]
                     ),
                     self.categorical_features,
                 ),
-            ]
+            ],
+            sparse_threshold=0,
+        )
+        # Candidates only differ on classifier params, so preprocessing fitted on a fold is reused across them
+        memory = (
+            TransformerCache("churn", max_size=self.cache.get("max_size", 512)) if self.cache.get("enabled") else None
         )
-        model_pipeline = Pipeline(
+        # Profiled fits report their CPU time and peak memory from the search workers, except the peak memory of the
+        # ones fitted by threads, which can't be told apart
+        if not self.profile:
+            pipeline_class = Pipeline
+        elif self.execution.backend == "threads":
+            pipeline_class = ThreadProfiledPipeline
+        else:
+            pipeline_class = ProfiledPipeline
+        model_pipeline = pipeline_class(
             [
                 ("preprocessing", preprocessor),
                 ("mlp_classifier", MLPClassifier(random_state=MODEL_CONFIG["models"]["churn"]["random_seed"])),
-            ]
+            ],
+            memory=memory,
         )
+        return model_pipeline
+
+    def _search(self, estimator):
+        cv = self.search.get("cv", 5)
+        metrics = ["accuracy", "f1", "roc_auc"]
+        scoring = ProfiledScorer(metrics) if self.profile else metrics
+        random_state = MODEL_CONFIG["models"]["churn"]["random_seed"]
+
+        if self.search["strategy"] == "random":
+            return RandomizedSearchCV(
+                estimator,
+                self.params,
+                n_iter=self.search.get("n_iter", 10),
+                cv=cv,
+                scoring=scoring,
+                refit="roc_auc",  # pyright: ignore
+                n_jobs=self.execution.n_jobs,
+                random_state=random_state,
+            )
+
+        if self.search["strategy"] == "halving":
+            # Successive halving only supports a single metric. When the resource is an estimator parameter, such as
+            # the number of MLP iterations, it cannot be searched too, so its largest value becomes the max budget.
+            params = dict(self.params)
+            resource = self.search.get("resource", "n_samples")
+            max_resources = max(params.pop(resource)) if resource in params else "auto"
+            return HalvingGridSearchCV(
+                estimator,
+                params,
+                factor=self.search.get("factor", 3),
+                resource=resource,
+                max_resources=self.search.get("max_resources", max_resources),
+                min_resources=self.search.get("min_resources", "exhaust"),
+                cv=cv,
+                scoring="roc_auc",
+                refit=True,
+                n_jobs=self.execution.n_jobs,
+                random_state=random_state,
+            )
+
         return GridSearchCV(
-            model_pipeline,
+            estimator,
             self.params,
-            cv=5,
-            scoring=["accuracy", "f1", "roc_auc"],
+            cv=cv,
+            scoring=scoring,
             refit="roc_auc",  # pyright: ignore
-            n_jobs=-1,
+            n_jobs=self.execution.n_jobs,
         )
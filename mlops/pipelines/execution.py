@@ -0,0 +1,116 @@
+import contextlib
+import os
+import shutil
+import tempfile
+import typing as t
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib.externals.loky import get_reusable_executor
+from threadpoolctl import threadpool_limits
+
+__all__ = ["EXECUTION_BACKENDS", "Execution"]
+
+EXECUTION_BACKENDS = ("processes", "threads", "serial")
+
+_JOBLIB_BACKENDS = {"processes": "loky", "threads": "threading", "serial": "sequential"}
+
+
+def _memmap(directory: str, name: str, values: np.ndarray) -> np.ndarray:
+    path = os.path.join(directory, f"{name}.npy")
+    array = np.lib.format.open_memmap(path, mode="w+", dtype=values.dtype, shape=values.shape)
+    array[:] = values
+    array.flush()
+    del array
+    return np.load(path, mmap_mode="r")
+
+
+class Execution:
+    """Backend running the fits of a hyperparameter search in parallel.
+
+    Process workers don't get a pickled copy of the training data per task: it is first written column by column to
+    memory-mapped files, on ``/dev/shm`` when available, and workers map them read-only. String columns are stored as
+    category codes for that. Thread workers share the process memory, so BLAS is limited to its share of the cores per
+    worker instead to avoid oversubscription.
+
+    :param backend: One of "processes", "threads" or "serial".
+    :param n_jobs: Number of workers, -1 for one per core.
+    :param blas_threads: BLAS threads per thread worker, the cores divided between the workers if not set.
+    :param share: Memory-map the training data to process workers.
+    :param temp_folder: Directory of the memory-mapped files.
+    """
+
+    def __init__(
+        self,
+        backend: str = "processes",
+        n_jobs: int = -1,
+        blas_threads: int | None = None,
+        share: bool = True,
+        temp_folder: str | None = None,
+    ):
+        if backend not in EXECUTION_BACKENDS:
+            raise ValueError(f"Wrong execution backend '{backend}', expected one of: {', '.join(EXECUTION_BACKENDS)}")
+
+        self.backend = backend
+        self.n_jobs = 1 if backend == "serial" else n_jobs
+        self.blas_threads = blas_threads
+        self.share = share
+        self.temp_folder = temp_folder or ("/dev/shm" if os.path.isdir("/dev/shm") else None)
+
+    @property
+    def workers(self) -> int:
+        return joblib.effective_n_jobs(self.n_jobs)
+
+    @contextlib.contextmanager
+    def parallel(self) -> t.Iterator[None]:
+        """Configure joblib, used by the search, for this backend."""
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(
+                joblib.parallel_config(
+                    backend=_JOBLIB_BACKENDS[self.backend],
+                    n_jobs=self.n_jobs,
+                    temp_folder=self.temp_folder,
+                    mmap_mode="r",
+                )
+            )
+            if self.backend == "threads":
+                blas_threads = self.blas_threads or max(1, (os.cpu_count() or 1) // self.workers)
+                stack.enter_context(threadpool_limits(limits=blas_threads, user_api="blas"))
+            yield
+
+    @contextlib.contextmanager
+    def shared(self, X: pd.DataFrame, y: pd.Series) -> t.Iterator[tuple[pd.DataFrame, pd.Series]]:
+        """Copy the training data into memory-mapped files, removed on exit, when process workers share it.
+
+        :param X: Training features.
+        :param y: Training target.
+        :return: Memory-mapped training features and target.
+        """
+        if self.backend != "processes" or not self.share or self.workers == 1:
+            yield X, y
+            return
+
+        directory = tempfile.mkdtemp(prefix="mlops-", dir=self.temp_folder)
+        try:
+            columns = {}
+            for i, (name, column) in enumerate(X.items()):
+                if column.dtype == object:
+                    categorical = column.astype("category")
+                    codes = _memmap(directory, f"x{i}", categorical.cat.codes.to_numpy())
+                    columns[name] = pd.Categorical.from_codes(codes, categorical.cat.categories)
+                else:
+                    columns[name] = _memmap(directory, f"x{i}", column.to_numpy())
+
+            # Not copying keeps one block per column backed by its file, which joblib pickles as a reference
+            X_shared = pd.DataFrame(columns, index=X.index, copy=False)
+            y_shared = pd.Series(_memmap(directory, "y", y.to_numpy()), index=y.index, name=y.name, copy=False)
+            yield X_shared, y_shared
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def release(self) -> None:
+        """Stop the process workers, which joblib otherwise keeps for the next search, so that the memory they hold,
+        such as their preprocessing caches, is returned."""
+        if self.backend == "processes":
+            get_reusable_executor().shutdown(wait=True)
@@ -0,0 +1,122 @@
+import typing as t
+
+import numpy as np
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.metrics import check_scoring
+from sklearn.pipeline import Pipeline
+from sklearn.utils import _safe_indexing
+
+from mlops import profiling
+
+__all__ = ["ProfiledPipeline", "ThreadProfiledPipeline", "ProfiledScorer", "profile_steps", "profile_candidates"]
+
+
+class ProfiledPipeline(Pipeline):
+    """Pipeline measuring the wall time, CPU time and peak memory of its own fit, kept in ``profile_``.
+
+    Searches fit their candidates in workers, so the measures are sent back as scores by :class:`ProfiledScorer`.
+    """
+
+    profile_memory = True
+
+    def fit(self, X, y=None, **params):
+        with profiling.measure(self.profile_memory) as self.profile_:
+            super().fit(X, y, **params)
+        return self
+
+
+class ThreadProfiledPipeline(ProfiledPipeline):
+    """:class:`ProfiledPipeline` without peak memory, for fits running concurrently in threads of the same process.
+
+    The peak traced by ``tracemalloc`` is global to the process, so every fit would reset the one of the others.
+    """
+
+    profile_memory = False
+
+
+class ProfiledScorer:
+    """Multi-metric scorer that also scores the CPU time and peak memory of the fit of a :class:`ProfiledPipeline`, so
+    that searches report them per candidate as ``fit_cpu_seconds`` and ``fit_peak_memory_mb`` in ``cv_results_``.
+
+    :param scoring: Metric names.
+    """
+
+    def __init__(self, scoring: t.Sequence[str]):
+        self.scoring = list(scoring)
+
+    def __call__(self, estimator, X, y) -> dict[str, float]:
+        scores = check_scoring(estimator, scoring=self.scoring)(estimator, X, y)
+        profile = getattr(estimator, "profile_", {})
+        return {
+            **scores,
+            "fit_cpu_seconds": profile.get("cpu_seconds", np.nan),
+            "fit_peak_memory_mb": profile.get("peak_memory_mb", np.nan),
+        }
+
+
+def _fit_transform(profiler: profiling.Profiler, name: str, step, X, y):
+    with profiler.section(f"{name}/fit"):
+        step.fit(X, y)
+    with profiler.section(f"{name}/transform"):
+        return step.transform(X)
+
+
+def profile_steps(estimator, X, y, profiler: profiling.Profiler):
+    """Fit a clone of a pipeline one step at a time, profiling the fit and transform of every step, including the
+    steps of every column transformer branch.
+
+    :param estimator: Pipeline, or a search object whose best estimator is profiled.
+    :param X: Training features.
+    :param y: Training target.
+    :param profiler: Profiler recording a section per step.
+    :return: Fitted clone.
+    """
+    estimator = clone(getattr(estimator, "best_estimator_", estimator))
+    *transformers, (name, classifier) = estimator.steps
+
+    Xt = X
+    for step_name, step in transformers:
+        if not isinstance(step, ColumnTransformer):
+            Xt = _fit_transform(profiler, step_name, step, Xt, y)
+            continue
+
+        blocks = []
+        for branch, transformer, columns in step.transformers:
+            if transformer == "drop":
+                continue
+            Xb = _safe_indexing(Xt, columns, axis=1)
+            for sub_name, sub in transformer.steps if isinstance(transformer, Pipeline) else [(branch, transformer)]:
+                if sub not in (None, "passthrough"):
+                    Xb = _fit_transform(profiler, f"{step_name}/{branch}/{sub_name}", sub, Xb, y)
+            blocks.append(Xb)
+        Xt = sparse.hstack(blocks).tocsr() if any(sparse.issparse(b) for b in blocks) else np.hstack(blocks)
+
+    with profiler.section(f"{name}/fit"):
+        classifier.fit(Xt, y)
+
+    return estimator
+
+
+def profile_candidates(search) -> list[dict[str, t.Any]]:
+    """Mean fit and score time of every candidate of a fitted search, and the mean CPU time and peak memory of their
+    fits when scored by :class:`ProfiledScorer`.
+
+    :param search: Fitted search.
+    :return: Profile per candidate.
+    """
+    results = search.cv_results_
+    candidates = []
+    for i, params in enumerate(results["params"]):
+        candidate = {
+            "params": params,
+            "fit_seconds": float(results["mean_fit_time"][i]),
+            "score_seconds": float(results["mean_score_time"][i]),
+        }
+        for key in ("fit_cpu_seconds", "fit_peak_memory_mb", "n_resources"):
+            if (values := results.get(f"mean_test_{key}", results.get(key))) is not None:
+                # Not measured, such as the peak memory of fits run by threads
+                candidate[key] = None if np.isnan(values[i]) else float(values[i])
+        candidates.append(candidate)
+    return candidates
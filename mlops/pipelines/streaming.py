@@ -0,0 +1,213 @@
+import logging
+import os
+import typing as t
+
+import numpy as np
+import pandas as pd
+
+from mlops import datasets
+from mlops.sketches import QuantileSketch
+
+__all__ = ["StreamingTrainer"]
+
+logger = logging.getLogger(__name__)
+
+# Quantiles the distribution of a column is sampled at from its sketch to estimate the moments of its clipped values
+MOMENT_GRID = (np.arange(1000) + 0.5) / 1000
+
+
+class StreamingTrainer:
+    """Fit a churn pipeline out of core, reading a Parquet dataset one row group at a time.
+
+    Rows are split into train and test rows by :func:`mlops.datasets.hash_split` of their id, row group by row group,
+    so the split is the same in every pass and never needs the whole dataset. A first pass over the train rows
+    summarizes every numerical column with a :class:`mlops.sketches.QuantileSketch` and collects the vocabulary of
+    every categorical one. The preprocessing is fitted from them: imputation medians and clipping quartiles are read
+    from the sketches, and the scaler moments are estimated from the quantiles of the clipped and imputed values. The
+    MLP is then trained with ``partial_fit``, ``epochs`` times over the row groups in a new random order every epoch,
+    its own mini-batches shuffled within every group.
+
+    Only a row group, the sketches and a sample of about ``sample_size`` train rows, kept to summarize the training
+    data, are in memory at a time.
+
+    :param path: Parquet file or directory of Parquet parts.
+    :param target: Target column.
+    :param id_column: Integer column the split is hashed on.
+    :param drop: Columns that are not model features.
+    :param test_size: Expected share of test rows.
+    :param seed: Seed of the split, the sample and the row group order.
+    :param epochs: Passes of the classifier over the train rows.
+    :param epsilon: Rank error of the quantile sketches.
+    :param sample_size: Expected size of the sample of train rows.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        *,
+        target: str,
+        id_column: str,
+        drop: t.Collection[str] = (),
+        test_size: float = 0.2,
+        seed: int = 0,
+        epochs: int = 20,
+        epsilon: float = 0.001,
+        sample_size: int = 10_000,
+    ):
+        self.row_groups = datasets.row_groups(path)
+        self.target = target
+        self.id_column = id_column
+        self.drop = set(drop)
+        self.test_size = test_size
+        self.seed = seed
+        self.epochs = epochs
+        self.epsilon = epsilon
+        self.sample_size = sample_size
+        self.columns: list[str] = []
+        self.sketches: dict[str, QuantileSketch] = {}
+        self.missing: dict[str, int] = {}
+        self.vocabularies: dict[str, set[str]] = {}
+        self.classes: np.ndarray | None = None
+        self.rows = 0
+        self.test_rows = 0
+        self.losses: list[float] = []
+
+    def _read(self, row_group: datasets.RowGroup, test: bool = False) -> tuple[pd.DataFrame, pd.Series]:
+        df = datasets.read_row_group(row_group)
+        if self.id_column not in df:
+            raise ValueError(f"Missing id column '{self.id_column}' in '{row_group.path}'")
+
+        df = df[datasets.hash_split(df[self.id_column], self.test_size, self.seed) == test]
+        return df.drop(columns=[self.target]), df[self.target]
+
+    def _update(self, X: pd.DataFrame, y: pd.Series) -> None:
+        if not self.columns:
+            self.columns = X.columns.tolist()
+            for name in self.columns:
+                if name in self.drop:
+                    continue
+                if X[name].dtype.kind in "iuf":
+                    self.sketches[name] = QuantileSketch(epsilon=self.epsilon, seed=len(self.sketches))
+                else:
+                    self.vocabularies[name] = set()
+                self.missing[name] = 0
+        elif X.columns.tolist() != self.columns:
+            raise ValueError(f"Wrong columns {X.columns.tolist()}, expected the ones of the first row group")
+
+        for name, sketch in self.sketches.items():
+            values = X[name].to_numpy(dtype=float, na_value=np.nan)
+            sketch.update(values)
+            self.missing[name] += int(np.isnan(values).sum())
+        for name, vocabulary in self.vocabularies.items():
+            values = X[name]
+            self.missing[name] += int(values.isna().sum())
+            vocabulary.update(values.dropna().astype(str).unique())
+
+        classes = np.unique(y) if self.classes is None else np.union1d(self.classes, np.unique(y))
+        self.classes = classes
+        self.rows += len(X)
+
+    def scan(self) -> pd.DataFrame:
+        """Summarize the train rows in a single pass.
+
+        :return: Sample of the train rows.
+        """
+        total = sum(row_group.rows for row_group in self.row_groups)
+        rate = min(1.0, self.sample_size / max((1 - self.test_size) * total, 1))
+
+        samples = []
+        for row_group in self.row_groups:
+            X, y = self._read(row_group)
+            if len(X):
+                self._update(X, y)
+                # Sampled on another hash of the ids, so the sample is the same in every run
+                samples.append(X[datasets.hash_split(X[self.id_column], rate, self.seed + 1)])
+
+        if not self.rows:
+            raise ValueError("No train rows in the dataset")
+        if empty := [name for name, sketch in self.sketches.items() if not len(sketch)]:
+            raise ValueError(f"Numerical columns without values: {', '.join(empty)}")
+
+        logger.info("Scanned %d train rows in %d row groups", self.rows, len(self.row_groups))
+        return pd.concat(samples)
+
+    def _moments(self, sketch: QuantileSketch, missing: int, lower: float, upper: float) -> tuple[float, float]:
+        """Mean and variance of the values of a column once imputed and clipped."""
+        values = np.clip(sketch.quantile(MOMENT_GRID), lower, upper)
+        median = np.clip(sketch.quantile(0.5), lower, upper)
+        weights = np.array([len(sketch), missing]) / (len(sketch) + missing)
+        mean = weights @ [values.mean(), median]
+        return mean, weights @ [np.mean((values - mean) ** 2), (median - mean) ** 2]
+
+    def _fit_preprocessing(self, preprocessing, sample: pd.DataFrame) -> None:
+        # The column transformer is fitted on rows holding the medians and every category, which yields the imputation
+        # values and vocabularies of the whole data, then the clipper and scaler get the statistics of the sketches
+        size = max([1, *(len(vocabulary) + 1 for vocabulary in self.vocabularies.values())])
+        rows = sample.iloc[np.arange(size) % len(sample)].reset_index(drop=True)
+        for name, sketch in self.sketches.items():
+            rows[name] = sketch.quantile(0.5)
+        for name, vocabulary in self.vocabularies.items():
+            categories = sorted(vocabulary) + (["missing"] if self.missing[name] else [])
+            rows[name] = [categories[i % len(categories)] for i in range(size)]
+        preprocessing.fit(rows)
+
+        for step, transformer, columns in preprocessing.transformers_:
+            if step != "numerical":
+                continue
+
+            names = [self.columns[c] for c in columns]  # Columns are selected by position
+            clipper = transformer.named_steps["outlier_clipper"].fit_sketches([self.sketches[name] for name in names])
+            mean, var = np.array(
+                [
+                    self._moments(self.sketches[name], self.missing[name], lower, upper)
+                    for name, lower, upper in zip(names, clipper.lower_bounds_, clipper.upper_bounds_)
+                ]
+            ).T
+            scaler = transformer.named_steps["scaler"]
+            scaler.mean_, scaler.var_ = mean, var
+            scaler.scale_ = np.where(var > 0, np.sqrt(var), 1.0)
+            scaler.n_samples_seen_ = np.int64(self.rows)
+
+    def fit(self, estimator, sample: pd.DataFrame):
+        """Fit the preprocessing from the summaries of :meth:`scan` and train the classifier epoch by epoch.
+
+        :param estimator: Unfitted churn pipeline, see :meth:`mlops.pipelines.ChurnPipeline.estimator`.
+        :param sample: Sample of the train rows returned by :meth:`scan`.
+        :return: Fitted pipeline.
+        """
+        if sample.empty:
+            raise ValueError("Empty sample of the train rows, the preprocessing can't be fitted")
+
+        preprocessing, classifier = estimator[:-1], estimator[-1]
+        self._fit_preprocessing(preprocessing.named_steps["preprocessing"], sample)
+
+        rng = np.random.default_rng(self.seed)
+        for epoch in range(self.epochs):
+            loss, rows = 0.0, 0
+            for i in rng.permutation(len(self.row_groups)):
+                X, y = self._read(self.row_groups[i])
+                if len(X):
+                    classifier.partial_fit(preprocessing.transform(X), y, classes=self.classes)
+                    loss, rows = loss + classifier.loss_ * len(X), rows + len(X)
+            self.losses.append(loss / rows)
+            logger.info("Epoch %d/%d, loss %.5f", epoch + 1, self.epochs, self.losses[-1])
+        return estimator
+
+    def test_scores(self, estimator) -> tuple[np.ndarray, np.ndarray]:
+        """Target and predicted probabilities of the test rows, read row group by row group.
+
+        :param estimator: Fitted pipeline.
+        :return: Target and probabilities.
+        """
+        targets, probabilities = [], []
+        for row_group in self.row_groups:
+            X, y = self._read(row_group, test=True)
+            if len(X):
+                targets.append(y.to_numpy())
+                probabilities.append(estimator.predict_proba(X))
+
+        if not targets:
+            raise ValueError("No test rows in the dataset")
+
+        self.test_rows = sum(map(len, targets))
+        return np.concatenate(targets), np.concatenate(probabilities)
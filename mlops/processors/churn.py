@@ -1,5 +1,7 @@
+import copy
 import datetime
 import logging
+import time
 import typing as t
 import uuid
 from pathlib import Path
@@ -7,21 +9,61 @@ from pathlib import Path
 import flama
 import numpy as np
 import pandas as pd
-from sklearn.metrics import f1_score, roc_auc_score
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
 from sklearn.model_selection import train_test_split
+from sklearn.utils import _safe_indexing
 
+import mlops.engines as engines
 import mlops.pipelines as pipelines
+import mlops.transformers as transformers
+from mlops import drift, profiling
 from mlops.config import MODEL_CONFIG
 
 logger = logging.getLogger(__name__)
 
-__all__ = ["ChurnProcessor"]
+__all__ = ["ChurnProcessor", "Scores"]
+
+
+def _updatable(step) -> bool:
+    # An exactly fitted clipper keeps no summary of the data it saw, so its partial_fit would only see the new rows
+    if isinstance(step, transformers.OutlierClipper):
+        return hasattr(step, "sketches_")
+    return hasattr(step, "partial_fit")
+
+
+class Scores(t.NamedTuple):
+    """Predicted labels and class probabilities, from a single forward pass."""
+
+    labels: np.ndarray
+    probabilities: np.ndarray
+
+
+def _score(estimator, X) -> Scores:
+    probabilities = estimator.predict_proba(X)
+    return Scores(estimator.classes_[probabilities.argmax(axis=1)], probabilities)
+
+
+def _metrics(estimator, X, y, scores: Scores | None = None):
+    labels, probabilities = scores if scores is not None else _score(estimator, X)
+
+    return {
+        "accuracy": accuracy_score(y, labels),
+        # Ranked by the probability of the positive class, not by the hard labels
+        "roc_auc_score": roc_auc_score(y, probabilities[:, 1]),
+        "f1_score": f1_score(y, labels),
+    }
 
 
 class ChurnProcessor:
     def __init__(self, config=MODEL_CONFIG):
         self.config = config["models"]["churn"]
         self._pipeline = None
+        self.training: dict[str, t.Any] = {}
+        self.reference: dict[str, t.Any] | None = None
+        profiling_config = self.config.get("profiling", {})
+        self.profiler = (
+            profiling.Profiler(memory=profiling_config.get("memory", True)) if profiling_config.get("enabled") else None
+        )
 
     @property
     def pipeline(self):
@@ -32,18 +74,39 @@ class ChurnProcessor:
             )
         return self._pipeline
 
-    def compute_metrics(self, X, y):
-        y_pred = self.pipeline.predict(X)
+    @staticmethod
+    def profile_path(model_path) -> Path:
+        """Path of the profile report written next to a model artifact."""
+        return Path(model_path).with_suffix(".profile.json")
 
-        return {
-            "accuracy": self.pipeline.score(X, y),
-            "roc_auc_score": roc_auc_score(y, y_pred),
-            "f1_score": f1_score(y, y_pred),
-        }
+    def score(self, X) -> Scores:
+        """Predict the class probabilities with a single pass through the pipeline, and the labels from them.
+
+        Categories are one-hot encoded as a dense float32 block, as the MLP needs, :class:`mlops.engines.ChurnEngine`
+        is the path that keeps them as integer codes.
+
+        :param X: Features.
+        :return: Labels and probabilities.
+        """
+        return _score(self.pipeline, X)
+
+    def compute_metrics(self, X, y, scores: Scores | None = None):
+        """Accuracy, F1 and ROC-AUC of the model, from a single pass through the pipeline.
+
+        :param X: Features.
+        :param y: Target.
+        :param scores: Scores of the features, computed by :meth:`score` if not given.
+        :return: Metrics.
+        """
+        with profiling.section(self.profiler, "compute_metrics"):
+            return _metrics(self.pipeline, X, y, scores)
 
     def train(self, X, y):
-        logger.info("Training process")
+        with profiling.section(self.profiler, "train"):
+            return self._train(X, y)
 
+    def _features(self, X) -> tuple[list[int], list[int]]:
+        """Positions of the numerical and categorical feature columns."""
         numeric_features = [
             X.columns.get_loc(c)
             for c in X.select_dtypes(include=["int64", "float64"])
@@ -57,47 +120,274 @@ class ChurnProcessor:
             .drop(self.config["drop_features"]["categorical"], axis=1)
             .columns.values
         ]
+        return numeric_features, categorical_features
+
+    def _train(self, X, y):
+        logger.info("Training process")
+        start = time.perf_counter()
+
+        numeric_features, categorical_features = self._features(X)
+
+        churn_pipeline = pipelines.ChurnPipeline(
+            self.config["param_grid"],
+            numeric_features=numeric_features,
+            categorical_features=categorical_features,
+            search=self.config.get("search"),
+            cache=self.config.get("cache"),
+            execution=self.config.get("execution"),
+            profile=self.profiler is not None,
+        )
+        self._pipeline = churn_pipeline.build()
+
+        execution = churn_pipeline.execution
+        if isinstance(memory := self._pipeline.estimator.memory, pipelines.TransformerCache):
+            memory.clear()
+
+        logger.info("Searching with %d %s worker(s)", execution.workers, execution.backend)
+        if self.profiler is not None and self.profiler.memory and execution.backend == "threads":
+            logger.info("Peak memory of the search candidates is not measured with the threads backend")
+        with profiling.section(self.profiler, "search"):
+            with execution.shared(X, y) as (X_shared, y_shared), execution.parallel():
+                self._pipeline.fit(X_shared, y_shared)
 
-        self._pipeline = pipelines.ChurnPipeline(
-            self.config["param_grid"], numeric_features=numeric_features, categorical_features=categorical_features
-        ).build()
+        if isinstance(memory, pipelines.TransformerCache):
+            logger.info("Preprocessing cache: %s", memory.stats())
+            execution.release()
+            memory.clear()
+            # The cache is only needed to fit, so the model is dumped without it
+            self._pipeline.estimator.set_params(memory=None)
+            self._pipeline.best_estimator_.set_params(memory=None)
 
-        self._pipeline.fit(X, y)
+        if self.profiler is not None:
+            # Steps can't be told apart within the search fits, so the best candidate is fitted again step by step
+            with self.profiler.section("steps"):
+                pipelines.profile_steps(self._pipeline, X, y, self.profiler)
+            self.profiler.extra["candidates"] = pipelines.profile_candidates(self._pipeline)
 
+        self.training = {"mode": "full", "samples": len(X), "seconds": time.perf_counter() - start}
+        self.reference = self._reference(X)
         return self
 
+    def _streaming_trainer(self, path) -> pipelines.StreamingTrainer:
+        config = self.config.get("streaming", {})
+        drop = self.config["drop_features"]
+        return pipelines.StreamingTrainer(
+            path,
+            target=self.config["target"],
+            id_column=self.config.get("id_column", "CustomerId"),
+            drop=drop["numerical"] + drop["categorical"],
+            test_size=self.config["test_size"],
+            seed=self.config["random_seed"],
+            epochs=config.get("epochs", 20),
+            epsilon=config.get("epsilon", 0.001),
+            sample_size=config.get("sample_size", 10_000),
+        )
+
+    def train_stream(self, path):
+        """Train out of core on a Parquet file or directory of Parquet parts, read one row group at a time.
+
+        Rows are split by a hash of their ``id_column`` and only the train rows are used, see
+        :class:`mlops.pipelines.StreamingTrainer`. There is no search: the classifier is trained with the
+        ``streaming.params`` of the config, the first candidate of the param grid if not set.
+
+        :param path: Dataset path.
+        :return: Processor.
+        """
+        with profiling.section(self.profiler, "train_stream"):
+            return self._train_stream(path)
+
+    def _train_stream(self, path):
+        logger.info("Streaming training process")
+        start = time.perf_counter()
+
+        trainer = self._streaming_trainer(path)
+        with profiling.section(self.profiler, "scan"):
+            sample = trainer.scan()
+
+        numeric_features, categorical_features = self._features(sample)
+        params = self.config.get("streaming", {}).get("params") or {
+            name: values[0] for name, values in self.config["param_grid"].items()
+        }
+        estimator = pipelines.ChurnPipeline(
+            {}, numeric_features=numeric_features, categorical_features=categorical_features
+        ).estimator()
+        estimator.set_params(**params)
+        with profiling.section(self.profiler, "epochs"):
+            self._pipeline = trainer.fit(estimator, sample)
+
+        self.training = {
+            "mode": "stream",
+            "samples": trainer.rows,
+            "row_groups": len(trainer.row_groups),
+            "epochs": trainer.epochs,
+            "loss": float(trainer.losses[-1]),
+            "params": params,
+            "seconds": time.perf_counter() - start,
+        }
+        self.reference = self._reference(sample)
+        return self
+
+    def compute_metrics_stream(self, path):
+        """Accuracy, F1 and ROC-AUC of the model on the test rows of a dataset split as in :meth:`train_stream`, read
+        one row group at a time. Only the target and probabilities of the test rows are kept.
+
+        :param path: Dataset path.
+        :return: Metrics.
+        """
+        with profiling.section(self.profiler, "compute_metrics"):
+            y, probabilities = self._streaming_trainer(path).test_scores(self.pipeline)
+            labels = self.pipeline.classes_[probabilities.argmax(axis=1)]
+            return _metrics(self.pipeline, None, y, Scores(labels, probabilities))
+
+    def retrain(self, X, y, new=None):
+        """Update the fitted model with the rows of the training data it has not seen yet.
+
+        The best parameters found by the last search are kept: the preprocessing statistics that can be updated
+        incrementally are updated with the new rows only, through ``partial_fit``, and the MLP is warm-started from its
+        current weights on them. The updated estimator replaces the search, whose results would describe the previous
+        one, and its params are kept in :attr:`training`. A share of the new rows is held out and, if the metric set in
+        the ``retrain`` section of the config drops more than ``max_degradation`` below the one of the current model on
+        them, a full search is run on all the training data instead.
+
+        :param X: Training features, including the rows already seen.
+        :param y: Training target.
+        :param new: Index labels of the rows not seen yet, all of them if not set.
+        :return: Processor.
+        """
+        config = self.config.get("retrain", {})
+        if self._pipeline is None:
+            return self.train(X, y)
+
+        with profiling.section(self.profiler, "retrain"):
+            return self._retrain(X, y, new, config)
+
+    def _retrain(self, X, y, new, config):
+        start = time.perf_counter()
+        params = getattr(self._pipeline, "best_params_", self.training.get("params", {}))
+        X_new, y_new = (X, y) if new is None else (X.loc[new], y.loc[new])
+        if len(X_new) == 0:
+            logger.info("No new rows, the model is kept")
+            self.training = {"mode": "unchanged", "samples": len(X), "new_samples": 0, "seconds": 0.0, "params": params}
+            return self
+
+        stratify = y_new if y_new.value_counts().min() > 1 else None
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X_new,
+            y_new,
+            test_size=config.get("validation_size", 0.2),
+            random_state=self.config["random_seed"],
+            stratify=stratify,
+        )
+
+        previous = getattr(self.pipeline, "best_estimator_", self.pipeline)
+        estimator = self._warm_start(copy.deepcopy(previous), X_fit, y_fit, config.get("max_iter", 200))
+
+        metric = config.get("metric", "roc_auc_score")
+        reference = float(_metrics(previous, X_val, y_val)[metric])
+        score = float(_metrics(estimator, X_val, y_val)[metric])
+        logger.info("Validation %s: %.4f before, %.4f after warm start", metric, reference, score)
+        if reference - score > config.get("max_degradation", 0.01):
+            logger.info("Validation %s degraded past the threshold, running a full search", metric)
+            return self._train(X, y)
+
+        # The search results describe the estimator the search fitted, so only the updated one and its params are kept
+        self._pipeline = estimator
+        self.training = {
+            "mode": "warm_start",
+            "samples": len(X),
+            "new_samples": len(X_new),
+            "seconds": time.perf_counter() - start,
+            "params": params,
+            "validation": {"metric": metric, "previous": reference, "score": score},
+        }
+        self.reference = self._reference(X)
+        return self
+
+    def _reference(self, X) -> dict[str, t.Any]:
+        """Summary of the training features and predicted churn probabilities, monitored against the served rows."""
+        drop = self.config["drop_features"]
+        with profiling.section(self.profiler, "reference"):
+            return drift.summarize(
+                X,
+                [c for c in X.select_dtypes(include=["int64", "float64"]).columns if c not in drop["numerical"]],
+                [c for c in X.select_dtypes(include=["object"]).columns if c not in drop["categorical"]],
+                self.score(X).probabilities[:, 1],
+            )
+
+    @staticmethod
+    def _warm_start(estimator, X, y, max_iter):
+        preprocessing, classifier = estimator[:-1], estimator[-1]
+
+        for _, transformer, columns in preprocessing.named_steps["preprocessing"].transformers_:
+            if transformer in ("drop", "passthrough"):
+                continue
+
+            Xt = _safe_indexing(X, columns, axis=1)
+            for _, step in getattr(transformer, "steps", [(None, transformer)]):
+                if _updatable(step):
+                    step.partial_fit(Xt)
+                Xt = step.transform(Xt)
+
+        params = classifier.get_params()
+        classifier.set_params(warm_start=True, max_iter=max_iter).fit(preprocessing.transform(X), y)
+        classifier.set_params(warm_start=params["warm_start"], max_iter=params["max_iter"])
+        return estimator
+
     def dump(self, metrics, model_path="models/trained_model.flm"):
         logger.info("Saving model to %s", model_path)
 
+        with profiling.section(self.profiler, "dump"):
+            self._dump(metrics, model_path)
+
+        if self.profiler is not None:
+            logger.info("Profile written to %s", self.profiler.write(self.profile_path(model_path)))
+        return self
+
+    def _dump(self, metrics, model_path):
         flama.dump(
             self.pipeline,
             model_path,
             model_id=uuid.uuid4(),
             timestamp=datetime.datetime.now(),
-            params=self.pipeline.best_params_,
+            params=getattr(self.pipeline, "best_params_", self.training.get("params", {})),
             metrics=metrics,
             extra={
                 "model_author": self.config.get("author", "Unknown"),
                 "model_description": self.config.get("description", "ML Model"),
                 "model_version": self.config.get("version", "1.0.0"),
                 "tags": self.config.get("tags", []),
+                "training": self.training,
+                "reference": self.reference,
             },
         )
-        return self
 
     @classmethod
-    def load(cls, model_path="models/trained_model.flm") -> t.Self:
+    def load(cls, model_path="models/trained_model.flm", resume_profile: bool = False, config=MODEL_CONFIG) -> t.Self:
+        """Load a processor from a model artifact.
+
+        :param model_path: Model artifact path.
+        :param resume_profile: Keep adding to the profile report written next to the artifact, when profiling.
+        :param config: Models config.
+        :return: Processor.
+        """
         logger.info("Loading model from %s", model_path)
 
         pipeline = flama.load(model_path)
 
-        obj = cls()
+        obj = cls(config)
         obj._pipeline = pipeline.model
+        obj.training = (pipeline.meta.extra or {}).get("training", {})
+        obj.reference = (pipeline.meta.extra or {}).get("reference")
+        if obj.profiler is not None and resume_profile and (profile_path := cls.profile_path(model_path)).exists():
+            obj.profiler = profiling.Profiler.read(profile_path, memory=obj.profiler.memory)
         return obj
 
+    def export(self) -> dict[str, np.ndarray]:
+        """Export the best estimator as a flat inference plan that can be run by :class:`mlops.engines.ChurnEngine`."""
+        return engines.build_plan(self.pipeline)
+
     def predict(self, X: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
-        predictions = self.pipeline.predict(X)  # This will raise error if pipeline is not fitted
-        probabilities = self.pipeline.predict_proba(X)
+        predictions, probabilities = self.score(X)  # This will raise error if pipeline is not fitted
 
         logger.info("Predictions completed for %s samples", len(predictions))
         return predictions, probabilities
@@ -118,9 +408,10 @@ if __name__ == "__main__":
         )
 
         pipeline = ChurnProcessor().train(X_train, y_train)
-        predictions, probabilities = pipeline.predict(X_test)  # pyright: ignore
+        scores = pipeline.score(X_test)
+        predictions, probabilities = scores
 
-        metrics = pipeline.compute_metrics(X_test, y_test)
+        metrics = pipeline.compute_metrics(X_test, y_test, scores)
         pipeline.dump(metrics=metrics, model_path=(data_path.parent / "model.flm").as_posix())
 
         # Create results DataFrame
@@ -0,0 +1,139 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+import typing as t
+from pathlib import Path
+
+__all__ = ["Profiler", "measure", "section"]
+
+
+class _Frame:
+    def __init__(self, memory: bool):
+        self.memory = memory
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.baseline = tracemalloc.get_traced_memory()[0] if memory else 0
+        self.peak = self.baseline
+
+    def stop(self) -> dict[str, t.Any]:
+        record = {
+            "wall_seconds": time.perf_counter() - self.wall,
+            "cpu_seconds": time.process_time() - self.cpu,
+        }
+        if self.memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            record["peak_memory_mb"] = (self.peak - self.baseline) / 1024**2
+        return record
+
+
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def measure(memory: bool = True) -> t.Iterator[dict[str, t.Any]]:
+    """Measure wall time, CPU time and peak memory of a block, in the dict yielded, once the block exits.
+
+    Blocks can be nested: peak memory is reset when a block starts, so the peak so far is handed over to the enclosing
+    block first. The peak is global to the process, so blocks measuring memory must not run concurrently in threads.
+
+    :param memory: Trace Python and NumPy allocations to measure the peak memory, which slows down allocations.
+    """
+    frames = _local.__dict__.setdefault("frames", [])
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    if memory:
+        if frames:
+            frames[-1].peak = max(frames[-1].peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+    frame, record = _Frame(memory), {}
+    frames.append(frame)
+    try:
+        yield record
+    finally:
+        frames.pop()
+        record.update(frame.stop())
+        if frames:
+            frames[-1].peak = max(frames[-1].peak, frame.peak)
+        if started:
+            tracemalloc.stop()
+
+
+class Profiler:
+    """Opt-in profiler recording wall time, CPU time and peak memory of nested sections of the training.
+
+    CPU time is the one of the whole process, so it includes the threads running concurrently but not the process
+    workers of a search, which report the one of every fit on their own. Peak memory is the
+    maximum traced by ``tracemalloc`` above the memory allocated when the section started, including the allocations
+    of NumPy; tracing slows down allocations and can be disabled with ``memory``.
+
+    :param memory: Measure the peak memory of every section.
+    """
+
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.records: list[dict[str, t.Any]] = []
+        self.extra: dict[str, t.Any] = {}
+        self._names: list[str] = []
+
+    @contextlib.contextmanager
+    def section(self, name: str) -> t.Iterator[None]:
+        """Profile a block, named after the sections it is nested in and the given name.
+
+        :param name: Section name.
+        """
+        self._names.append(name)
+        record = {"name": "/".join(self._names)}
+        try:
+            with measure(self.memory) as measures:
+                yield
+        finally:
+            self._names.pop()
+            self.records.append({**record, **measures})
+
+    def add(self, records: t.Iterable[dict[str, t.Any]]) -> None:
+        """Add records measured elsewhere, such as in another process."""
+        self.records.extend(records)
+
+    def report(self) -> dict[str, t.Any]:
+        return {"sections": self.records, **self.extra}
+
+    def write(self, path: str | os.PathLike) -> Path:
+        """Write the report as JSON.
+
+        :param path: Report path.
+        :return: Report path.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2, default=str)
+        return path
+
+    @classmethod
+    def read(cls, path: str | os.PathLike, memory: bool = True) -> "Profiler":
+        """Profiler continuing a report written by :meth:`write`.
+
+        :param path: Report path.
+        :param memory: Measure the peak memory of the next sections.
+        :return: Profiler.
+        """
+        with open(path) as f:
+            report = json.load(f)
+        profiler = cls(memory=memory)
+        profiler.add(report.pop("sections", []))
+        profiler.extra = report
+        return profiler
+
+
+def section(profiler: Profiler | None, name: str) -> t.ContextManager:
+    """Section of a profiler, or a no-op when profiling is disabled.
+
+    :param profiler: Profiler, None if disabled.
+    :param name: Section name.
+    """
+    return profiler.section(name) if profiler is not None else contextlib.nullcontext()
@@ -0,0 +1,207 @@
+import collections
+import concurrent.futures
+import json
+import logging
+import os
+import time
+import typing as t
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from mlops.engines import ChurnEngine
+from mlops.processors.churn import ChurnProcessor
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["SCORING_BACKENDS", "read_chunks", "score"]
+
+SCORING_BACKENDS = ("sklearn", "numpy")
+
+Chunk = pa.RecordBatch | list[str]
+
+_processor: ChurnProcessor | None = None
+_engine: ChurnEngine | None = None
+
+
+def read_chunks(path: str | os.PathLike, chunk_size: int) -> t.Iterator[Chunk]:
+    """Read a Parquet or JSONL file in chunks of at most ``chunk_size`` rows.
+
+    Parquet files are read as record batches. JSONL chunks are kept as raw lines so that decoding happens in the
+    workers instead of the reading process.
+
+    :param path: Input file path.
+    :param chunk_size: Max rows per chunk.
+    :return: Iterator of chunks.
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        yield from pq.ParquetFile(path).iter_batches(batch_size=chunk_size)
+        return
+
+    if path.suffix not in (".jsonl", ".json"):
+        raise ValueError(f"Wrong input format '{path.suffix}', expected a .parquet or .jsonl file")
+
+    with open(path) as f:
+        lines = []
+        for line in f:
+            if line.strip():
+                lines.append(line)
+            if len(lines) == chunk_size:
+                yield lines
+                lines = []
+        if lines:
+            yield lines
+
+
+def _init_worker(model_path: str, backend: str = "sklearn") -> None:
+    global _processor, _engine
+    _processor = ChurnProcessor.load(model_path)
+    _engine = ChurnEngine.from_estimator(_processor.pipeline) if backend == "numpy" else None
+
+
+def _executor(
+    model_path: str | os.PathLike, workers: int, backend: str
+) -> concurrent.futures.ProcessPoolExecutor | None:
+    if backend not in SCORING_BACKENDS:
+        raise ValueError(f"Wrong scoring backend '{backend}', expected one of: {', '.join(SCORING_BACKENDS)}")
+
+    if workers > 1:
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(str(model_path), backend)
+        )
+
+    _init_worker(str(model_path), backend)
+    return None
+
+
+def _output_fields() -> list[pa.Field]:
+    assert _processor is not None, "Worker not initialized"
+
+    classes = _engine.classes_ if _engine is not None else _processor.pipeline.classes_
+    return [
+        pa.field("prediction", pa.array(np.asarray(classes)[:0]).type),
+        pa.field("probability", pa.float32() if _engine is not None else pa.float64()),
+    ]
+
+
+def _keep_fields(path: str | os.PathLike, keep: t.Sequence[str]) -> list[pa.Field] | None:
+    # JSONL values are only typed once decoded
+    if Path(path).suffix != ".parquet":
+        return None
+
+    schema = pq.read_schema(path)
+    return [schema.field(column) for column in keep]
+
+
+def _jsonl_fields(table: pa.Table, keep: t.Sequence[str]) -> list[pa.Field]:
+    # Columns only holding nulls in the first chunk can't be typed, so they are written as strings
+    fields = (table.schema.field(column) for column in keep)
+    return [pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field for field in fields]
+
+
+def _cast(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    try:
+        return table.cast(schema)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        raise ValueError(f"Scored chunk doesn't match the output schema: {e}") from e
+
+
+def _score_chunk(chunk: Chunk, keep: t.Sequence[str]) -> pa.Table:
+    assert _processor is not None, "Worker not initialized"
+
+    X = chunk.to_pandas() if isinstance(chunk, pa.RecordBatch) else pd.DataFrame.from_records(map(json.loads, chunk))
+    features = X.drop(columns=[_processor.config["target"]], errors="ignore")
+    # The pipeline selects columns by position, so restore the training column order
+    if (feature_names := getattr(_processor.pipeline, "feature_names_in_", None)) is not None:
+        features = features[feature_names]
+
+    if _engine is not None:
+        probabilities = _engine.predict_proba(features)
+        predictions = _engine.classes_[probabilities.argmax(axis=1)]
+    else:
+        predictions, probabilities = _processor.score(features)
+
+    return pa.table(
+        {
+            **{column: pa.array(X[column]) for column in keep},
+            "prediction": pa.array(predictions),
+            "probability": pa.array(probabilities[:, 1]),  # Probability of positive class
+        }
+    )
+
+
+def score(
+    input_path: str | os.PathLike,
+    output_path: str | os.PathLike,
+    model_path: str | os.PathLike,
+    *,
+    chunk_size: int = 10_000,
+    workers: int = 1,
+    keep: t.Sequence[str] = (),
+    backend: str = "sklearn",
+) -> dict[str, float]:
+    """Score a Parquet or JSONL file chunk by chunk, writing predictions incrementally to a Parquet file.
+
+    At most ``2 * workers`` chunks are in flight, so memory stays flat regardless of the input size. The output schema
+    is fixed before the first chunk is written: kept columns have the type of the input Parquet schema, or, for JSONL,
+    the one of the first chunk, with columns only holding nulls there written as strings. An empty input writes an
+    empty file with that schema.
+
+    :param input_path: Input file path.
+    :param output_path: Output Parquet file path.
+    :param model_path: Model artifact path.
+    :param chunk_size: Max rows per chunk.
+    :param workers: Number of worker processes, 1 scores in the current process.
+    :param keep: Input columns copied to the output, such as an id.
+    :param backend: Either the fitted pipeline, ``sklearn``, or the compiled NumPy engine, ``numpy``. Both keep
+        numerical features as float32, but only the engine keeps categories as small integer codes: the pipeline feeds
+        an ``MLPClassifier``, which needs one-hot columns, so it encodes them as a dense float32 block.
+    :return: Scoring summary.
+    """
+    start = time.perf_counter()
+    rows = 0
+    writer: pq.ParquetWriter | None = None
+
+    executor = _executor(model_path, workers, backend)
+
+    try:
+        fields = executor.submit(_output_fields).result() if executor is not None else _output_fields()
+        keep_fields = _keep_fields(input_path, keep)
+        pending: collections.deque[concurrent.futures.Future] = collections.deque()
+
+        def write(table: pa.Table) -> None:
+            nonlocal writer, rows
+            if writer is None:
+                schema = pa.schema([*(keep_fields if keep_fields is not None else _jsonl_fields(table, keep)), *fields])
+                writer = pq.ParquetWriter(output_path, schema)
+            writer.write_table(_cast(table, writer.schema))
+            rows += table.num_rows
+
+        for chunk in read_chunks(input_path, chunk_size):
+            if executor is None:
+                write(_score_chunk(chunk, keep))
+                continue
+
+            pending.append(executor.submit(_score_chunk, chunk, keep))
+            if len(pending) >= 2 * workers:
+                write(pending.popleft().result())
+
+        while pending:
+            write(pending.popleft().result())
+
+        if writer is None:  # Empty input, written as a chunk without rows so that the file has the output schema
+            write(pa.schema([*(pa.field(column, pa.null()) for column in keep), *fields]).empty_table())
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if writer is not None:
+            writer.close()
+
+    elapsed = time.perf_counter() - start
+    summary = {"rows": rows, "seconds": elapsed, "rows_per_second": rows / elapsed if elapsed else 0.0}
+    logger.info("Scored %s rows in %.2fs (%.0f rows/sec)", rows, elapsed, summary["rows_per_second"])
+    return summary
@@ -0,0 +1,7 @@
+from mlops.serving.batching import *  # noqa
+from mlops.serving.cache import *  # noqa
+from mlops.serving.columnar import *  # noqa
+from mlops.serving.metrics import *  # noqa
+from mlops.serving.registry import *  # noqa
+from mlops.serving.reload import *  # noqa
+from mlops.serving.traffic import *  # noqa
@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import time
+import typing as t
+
+import numpy as np
+
+__all__ = ["MicroBatcher", "Summary"]
+
+logger = logging.getLogger(__name__)
+
+
+class Summary:
+    """Running count, mean and max of an observed value."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def to_dict(self) -> dict[str, float]:
+        return {"count": self.count, "mean": self.total / self.count if self.count else 0.0, "max": self.max}
+
+
+class _Request(t.NamedTuple):
+    rows: list
+    future: asyncio.Future
+    enqueued: float
+
+
+class MicroBatcher:
+    """Coalesce concurrent predictions into a single vectorized call.
+
+    Requests are queued and collected until the batch holds ``max_batch_size`` rows or ``max_wait`` seconds have passed
+    since the first one arrived. The batch runs in a worker thread and each caller gets back only its own rows.
+    """
+
+    def __init__(
+        self,
+        func: t.Callable[[list], np.ndarray],
+        *,
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        max_queue_size: int = 1024,
+    ):
+        self.func = func
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue_size = max_queue_size
+        self.queue_wait = Summary()
+        self.fill_ratio = Summary()
+        self.inference_time = Summary()
+        self._queue: asyncio.Queue[_Request] | None = None
+        self._worker: asyncio.Task | None = None
+        self._pending: _Request | None = None
+        self._busy = False
+
+    def clone(self, func: t.Callable[[list], np.ndarray]) -> "MicroBatcher":
+        """New batcher with the same settings, predicting with another function.
+
+        :param func: Prediction function.
+        :return: Batcher.
+        """
+        return MicroBatcher(
+            func, max_batch_size=self.max_batch_size, max_wait=self.max_wait, max_queue_size=self.max_queue_size
+        )
+
+    def _start(self) -> asyncio.Queue[_Request]:
+        loop = asyncio.get_running_loop()
+        # The worker is started lazily so it is bound to the loop serving the requests
+        if self._queue is None or self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._pending = None
+            self._worker = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                ...
+
+        pending = [self._pending] if self._pending is not None else []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for request in pending:
+            request.future.cancel()
+
+        self._queue = self._worker = self._pending = None
+
+    async def drain(self) -> None:
+        """Wait until every queued request has been predicted, then stop the worker."""
+        while (
+            self._worker is not None
+            and not self._worker.done()
+            and (self._busy or self._pending is not None or not t.cast(asyncio.Queue, self._queue).empty())
+        ):
+            await asyncio.sleep(self.max_wait)
+        await self.close()
+
+    async def submit(self, rows: list) -> np.ndarray:
+        """Queue rows for the next batch and wait for their predictions.
+
+        :param rows: Rows to predict.
+        :return: Predictions for the given rows.
+        :raises asyncio.QueueFull: If the queue already holds ``max_queue_size`` requests.
+        """
+        queue = self._start()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait(_Request(rows, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self, queue: asyncio.Queue[_Request]) -> list[_Request]:
+        first = self._pending or await queue.get()
+        self._pending = None
+        self._busy = True
+        batch, size = [first], len(first.rows)
+        deadline = time.perf_counter() + self.max_wait
+
+        while size < self.max_batch_size:
+            try:
+                request = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                if (timeout := deadline - time.perf_counter()) <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(queue.get(), timeout)
+                except TimeoutError:
+                    break
+
+            if size + len(request.rows) > self.max_batch_size:
+                self._pending = request
+                break
+
+            batch.append(request)
+            size += len(request.rows)
+
+        return batch
+
+    async def _run(self, queue: asyncio.Queue[_Request]) -> None:
+        while True:
+            batch = await self._collect(queue)
+            started = time.perf_counter()
+            for request in batch:
+                self.queue_wait.observe(started - request.enqueued)
+
+            try:
+                await self._process(batch)
+            finally:
+                self._busy = False
+
+    async def _process(self, batch: list[_Request]) -> None:
+        started = time.perf_counter()
+        rows = [row for request in batch for row in request.rows]
+        try:
+            result = await asyncio.to_thread(self.func, rows)
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch[0], exception=e)
+            else:
+                # Retry one by one so a malformed request does not fail the requests batched with it
+                logger.debug("Batch of %s requests failed, retrying individually", len(batch))
+                for request in batch:
+                    await self._process([request])
+            return
+
+        self.inference_time.observe(time.perf_counter() - started)
+        self.fill_ratio.observe(len(rows) / self.max_batch_size)
+
+        offset = 0
+        for request in batch:
+            self._resolve(request, result=result[offset : offset + len(request.rows)])
+            offset += len(request.rows)
+
+    @staticmethod
+    def _resolve(request: _Request, result: t.Any = None, exception: Exception | None = None) -> None:
+        if request.future.done():
+            return
+
+        if exception is not None:
+            request.future.set_exception(exception)
+        else:
+            request.future.set_result(result)
+
+    def stats(self) -> dict[str, t.Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait": self.max_wait,
+            "max_queue_size": self.max_queue_size,
+            "queue_size": self._queue.qsize() if self._queue is not None else 0,
+            "queue_wait": self.queue_wait.to_dict(),
+            "fill_ratio": self.fill_ratio.to_dict(),
+            "inference_time": self.inference_time.to_dict(),
+        }
@@ -0,0 +1,167 @@
+import collections
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+import typing as t
+
+import numpy as np
+
+from mlops.serving import metrics
+
+__all__ = ["PredictionCache"]
+
+# Rough memory held by an entry besides its key and value: dict slot, tuple and array headers
+ENTRY_OVERHEAD = 200
+
+
+def _canonical(value: t.Any) -> t.Any:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool | int | float | np.number):
+        value = float(value)
+        return None if math.isnan(value) else value
+    return str(value)
+
+
+class PredictionCache:
+    """LRU cache of predicted probabilities per row, bounded in memory and with entries expiring after a TTL.
+
+    Rows are keyed by a hash of the values of the given columns only, so that identifiers not used by the model, such as
+    a row number or a surname, don't prevent hits. When watching a model artifact the cache is flushed as soon as the
+    file changes.
+
+    :param name: Model name, used as metrics label.
+    :param max_size: Max size in megabytes.
+    :param ttl: Entries time to live in seconds.
+    :param columns: Positions of the columns in the key, all of them if not set.
+    :param watch: Model artifact path whose changes flush the cache.
+    :param watch_interval: Min seconds between checks of the artifact.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_size: float = 64,
+        ttl: float = 3600,
+        columns: t.Sequence[int] | None = None,
+        watch: str | os.PathLike | None = None,
+        watch_interval: float = 1.0,
+    ):
+        self.name = name
+        self.max_bytes = int(max_size * 1024**2)
+        self.ttl = ttl
+        self.columns = list(columns) if columns is not None else None
+        self.watch = watch
+        self.watch_interval = watch_interval
+        self.entries: collections.OrderedDict[bytes, tuple[np.ndarray, float, int]] = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.flushes = 0
+        self._lock = threading.Lock()
+        self._signature = self._artifact_signature()
+        self._checked = time.monotonic()
+
+    def clone(self) -> "PredictionCache":
+        """New empty cache with the same settings."""
+        return PredictionCache(
+            self.name,
+            max_size=self.max_bytes / 1024**2,
+            ttl=self.ttl,
+            columns=self.columns,
+            watch=self.watch,
+            watch_interval=self.watch_interval,
+        )
+
+    def key(self, row: t.Sequence[t.Any]) -> bytes | None:
+        """Stable hash of a row, or None if the row cannot be keyed."""
+        try:
+            values = [row[i] for i in self.columns] if self.columns is not None else list(row)
+        except (IndexError, TypeError):
+            return None
+
+        encoded = json.dumps([_canonical(v) for v in values], separators=(",", ":")).encode()
+        return hashlib.blake2b(encoded, digest_size=16).digest()
+
+    def get(self, key: bytes | None) -> np.ndarray | None:
+        self._check_artifact()
+        with self._lock:
+            entry = self.entries.get(key) if key is not None else None
+            if entry is not None and entry[1] < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                metrics.CACHE_EVENTS.inc(model=self.name, event="expiration")
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                metrics.CACHE_EVENTS.inc(model=self.name, event="miss")
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            metrics.CACHE_EVENTS.inc(model=self.name, event="hit")
+            return entry[0]
+
+    def put(self, key: bytes | None, value: np.ndarray) -> None:
+        if key is None:
+            return
+
+        size = len(key) + value.nbytes + ENTRY_OVERHEAD
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (value, time.monotonic() + self.ttl, size)
+            self.size += size
+            while self.size > self.max_bytes and self.entries:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+                metrics.CACHE_EVENTS.inc(model=self.name, event="eviction")
+
+    def _remove(self, key: bytes) -> None:
+        _, _, size = self.entries.pop(key)
+        self.size -= size
+
+    def flush(self) -> None:
+        with self._lock:
+            self.entries.clear()
+            self.size = 0
+            self.flushes += 1
+        metrics.CACHE_EVENTS.inc(model=self.name, event="flush")
+
+    def _artifact_signature(self) -> tuple[int, int] | None:
+        if self.watch is None:
+            return None
+        try:
+            stat = os.stat(self.watch)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _check_artifact(self) -> None:
+        if self.watch is None or time.monotonic() - self._checked < self.watch_interval:
+            return
+
+        self._checked = time.monotonic()
+        if (signature := self._artifact_signature()) != self._signature:
+            self._signature = signature
+            self.flush()
+
+    def stats(self) -> dict[str, t.Any]:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "flushes": self.flushes,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "entries": len(self.entries),
+            "size": self.size,
+        }
@@ -0,0 +1,129 @@
+import typing as t
+
+import numpy as np
+
+__all__ = ["ARROW_STREAM", "Columns", "ColumnarDecoder"]
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+class Columns(t.NamedTuple):
+    """Decoded batch: numerical values, NaN where missing, and category codes, ``-1`` where missing and the number of
+    categories where unknown."""
+
+    numerical: np.ndarray
+    codes: list[np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.numerical)
+
+
+class ColumnarDecoder:
+    """Decode column-oriented payloads straight into NumPy arrays, validated once per column against the training
+    schema instead of once per row.
+
+    Columns must follow the training order. The ones the model doesn't use, such as the features dropped in
+    ``model.yaml``, can be omitted and are ignored when sent. Numerical columns must hold numbers and categorical ones
+    strings, both with nulls for missing values. Arrow payloads are decoded without building any Python object per row.
+
+    :param names: Training column names, in order.
+    :param numerical: Numerical columns used by the model.
+    :param categories: Known categories of every categorical column used by the model.
+    :param dtype: Dtype of the numerical values.
+    """
+
+    def __init__(
+        self,
+        names: t.Sequence[str],
+        numerical: t.Sequence[str],
+        categories: t.Mapping[str, t.Sequence[str]],
+        dtype: t.Any = np.float64,
+    ):
+        self.names = list(names)
+        self.numerical = list(numerical)
+        self.categorical = list(categories)
+        self.categories = {name: list(values) for name, values in categories.items()}
+        self.dtype = np.dtype(dtype)
+        if unknown := set(self.numerical + self.categorical).difference(self.names):
+            raise ValueError(f"Columns not in the training schema: {', '.join(sorted(unknown))}")
+
+    def _check_columns(self, columns: t.Sequence[str]) -> None:
+        if unknown := [c for c in columns if c not in self.names]:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        if missing := [c for c in self.numerical + self.categorical if c not in columns]:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        if list(columns) != [c for c in self.names if c in columns]:
+            raise ValueError(f"Columns out of order, expected: {', '.join(self.names)}")
+
+    def arrow(self, body: bytes) -> Columns:
+        """Decode an Arrow IPC stream.
+
+        :param body: Arrow IPC stream.
+        :return: Decoded batch.
+        """
+        import pyarrow as pa
+
+        try:
+            table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        except (pa.ArrowInvalid, OSError) as e:
+            raise ValueError(f"Wrong Arrow IPC stream: {e}")
+
+        self._check_columns(table.column_names)
+        for name in self.numerical:
+            kind = table.schema.field(name).type
+            if not (pa.types.is_integer(kind) or pa.types.is_floating(kind) or pa.types.is_null(kind)):
+                raise ValueError(f"Column '{name}' must be numerical, got {kind}")
+        for name in self.categorical:
+            kind = table.schema.field(name).type
+            if pa.types.is_dictionary(kind):
+                kind = kind.value_type
+            if not (pa.types.is_string(kind) or pa.types.is_large_string(kind) or pa.types.is_null(kind)):
+                raise ValueError(f"Column '{name}' must be categorical strings, got {kind}")
+
+        return self._decode({name: table.column(name) for name in self.numerical + self.categorical}, table.num_rows)
+
+    def json(self, columns: t.Mapping[str, t.Sequence[t.Any]]) -> Columns:
+        """Decode a column-oriented JSON object, mapping column names to their values.
+
+        :param columns: Values per column.
+        :return: Decoded batch.
+        """
+        import pyarrow as pa
+
+        if not isinstance(columns, t.Mapping):
+            raise ValueError("Columns must be an object mapping column names to their values")
+
+        self._check_columns(list(columns))
+        arrays = {}
+        for name, kind in [*((n, pa.float64()) for n in self.numerical), *((n, pa.string()) for n in self.categorical)]:
+            try:
+                arrays[name] = pa.array(columns[name], type=kind)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError) as e:
+                raise ValueError(f"Wrong values for column '{name}': {e}")
+
+        if len(lengths := {len(array) for array in arrays.values()}) > 1:
+            raise ValueError(f"Columns have different lengths: {', '.join(map(str, sorted(lengths)))}")
+
+        return self._decode(arrays, lengths.pop() if lengths else 0)
+
+    def _decode(self, arrays: t.Mapping[str, t.Any], n_rows: int) -> Columns:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        numerical = np.empty((n_rows, len(self.numerical)), dtype=self.dtype)
+        for i, name in enumerate(self.numerical):
+            numerical[:, i] = arrays[name].cast(pa.float64()).to_numpy(zero_copy_only=False)
+
+        codes = []
+        for name in self.categorical:
+            values = arrays[name].cast(pa.string())
+            categories = self.categories[name]
+            # Unknown categories get the code past the last one, missing values -1
+            index = pc.if_else(
+                pc.is_null(values),
+                -1,
+                pc.fill_null(pc.index_in(values, value_set=pa.array(categories, type=pa.string())), len(categories)),
+            )
+            codes.append(index.to_numpy(zero_copy_only=False).astype(np.intp, copy=False))
+
+        return Columns(numerical, codes)
@@ -0,0 +1,314 @@
+import abc
+import bisect
+import contextvars
+import math
+import threading
+import time
+import typing as t
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "Registry",
+    "REGISTRY",
+    "REQUESTS",
+    "REQUEST_SECONDS",
+    "IN_FLIGHT",
+    "STAGE_SECONDS",
+    "ROWS",
+    "MODEL_LOAD_SECONDS",
+    "CACHE_EVENTS",
+    "RELOADS",
+    "SWAP_SECONDS",
+    "REGISTRY_EVENTS",
+    "REGISTRY_SIZE",
+    "TRAFFIC_SECONDS",
+    "AGREEMENT_ROWS",
+    "MIRROR_EVENTS",
+    "Timer",
+    "current_timer",
+    "MetricsMiddleware",
+]
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROWS_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    labels = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _escape(value: t.Any) -> str:
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(abc.ABC):
+    type: t.ClassVar[str]
+
+    def __init__(self, name: str, documentation: str, labels: t.Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, t.Any]) -> tuple[str, ...]:
+        if len(labels) != len(self.labels):
+            raise ValueError(f"Metric '{self.name}' expects labels: {', '.join(self.labels)}")
+        return tuple(_escape(labels[name]) for name in self.labels)
+
+    @abc.abstractmethod
+    def samples(self) -> t.Iterator[str]:
+        ...
+
+    def render(self) -> str:
+        header = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        return "\n".join([*header, *self.samples()])
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, per combination of label values."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: t.Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: t.Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: t.Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> t.Iterator[str]:
+        for key, value in list(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down, per combination of label values."""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels: t.Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels: t.Any) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Count of observations in cumulative buckets plus their sum, per combination of label values."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: t.Sequence[str] = (),
+        buckets: t.Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: observations in every bucket (non-cumulative, the last one is +Inf), and their sum
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: t.Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = self._values[key]
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels: t.Any) -> int:
+        counts, _ = self._values.get(self._key(labels), ([0], [0.0]))
+        return sum(counts)
+
+    def sum(self, **labels: t.Any) -> float:
+        _, total = self._values.get(self._key(labels), ([0], [0.0]))
+        return total[0]
+
+    def samples(self) -> t.Iterator[str]:
+        for key, (counts, total) in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), list(counts)):
+                cumulative += count
+                labels = _format_labels(self.labels, key, f'le="{_format_value(float(bound))}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total[0])}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}"
+
+
+class Registry:
+    """Collection of metrics rendered together in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self.metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> t.Any:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric '{metric.name}' already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+REQUESTS: Counter = REGISTRY.register(
+    Counter("http_requests_total", "HTTP requests handled.", ("method", "endpoint", "status"))
+)
+REQUEST_SECONDS: Histogram = REGISTRY.register(
+    Histogram("http_request_duration_seconds", "HTTP request latency in seconds.", ("method", "endpoint"))
+)
+IN_FLIGHT: Gauge = REGISTRY.register(Gauge("http_requests_in_flight", "HTTP requests being handled."))
+STAGE_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "model_stage_duration_seconds",
+        "Time spent on every stage of a prediction: deserialization, preprocessing, classifier and serialization.",
+        ("model", "stage"),
+    )
+)
+ROWS: Histogram = REGISTRY.register(
+    Histogram("model_rows_per_request", "Rows per prediction request.", ("model",), buckets=ROWS_BUCKETS)
+)
+MODEL_LOAD_SECONDS: Gauge = REGISTRY.register(
+    Gauge("model_load_duration_seconds", "Time spent loading the model artifact.", ("model",))
+)
+CACHE_EVENTS: Counter = REGISTRY.register(
+    Counter(
+        "model_cache_events_total",
+        "Prediction cache hits, misses, evictions, expirations and flushes.",
+        ("model", "event"),
+    )
+)
+RELOADS: Counter = REGISTRY.register(
+    Counter("model_reloads_total", "Model artifact reloads, successful or failed.", ("model", "status"))
+)
+SWAP_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "model_swap_duration_seconds",
+        "Time spent swapping a reloaded model in.",
+        ("model",),
+        buckets=(1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1),
+    )
+)
+REGISTRY_EVENTS: Counter = REGISTRY.register(
+    Counter(
+        "model_registry_events_total",
+        "Model registry hits, lazy loads, load failures and evictions.",
+        ("model", "event"),
+    )
+)
+REGISTRY_SIZE: Gauge = REGISTRY.register(
+    Gauge("model_registry_resident_bytes", "Estimated size of the models loaded by the registry.")
+)
+TRAFFIC_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "model_prediction_duration_seconds",
+        "Prediction time of every model serving or mirroring traffic: primary, canary and shadow.",
+        ("model", "role"),
+    )
+)
+AGREEMENT_ROWS: Counter = REGISTRY.register(
+    Counter(
+        "model_agreement_rows_total",
+        "Rows mirrored to a model whose prediction agrees or disagrees with the served one.",
+        ("model", "agreement"),
+    )
+)
+MIRROR_EVENTS: Counter = REGISTRY.register(
+    Counter("model_mirror_events_total", "Mirrored requests queued, dropped or failed.", ("model", "event"))
+)
+
+
+class Timer:
+    """Request scoped stopwatch splitting the request time into consecutive prediction stages.
+
+    The middleware starts it when the request arrives and records the serialization stage when the response starts.
+    Endpoints opt in by setting the model and calling :meth:`lap` when a stage ends, or :meth:`reset` to not account
+    for the time since the last lap.
+    """
+
+    __slots__ = ("last", "model")
+
+    def __init__(self):
+        self.last = time.perf_counter()
+        self.model: str | None = None
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        if self.model is not None:
+            STAGE_SECONDS.observe(now - self.last, model=self.model, stage=stage)
+        self.last = now
+
+    def reset(self) -> None:
+        self.last = time.perf_counter()
+
+
+_timer: contextvars.ContextVar[Timer | None] = contextvars.ContextVar("timer", default=None)
+
+
+def current_timer() -> Timer | None:
+    """Timer of the request being handled, if any."""
+    return _timer.get()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording the latency, status and concurrency of HTTP requests.
+
+    Endpoints are labelled by their path, requests not matching any route are grouped together to bound the number of
+    series.
+
+    :param app: ASGI application.
+    """
+
+    def __init__(self, app: t.Any):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        method, path = scope["method"], scope["path"]
+        timer = Timer()
+        token = _timer.set(timer)
+        status = 500
+
+        async def _send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if timer.model is not None:
+                    timer.lap("serialization")
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            IN_FLIGHT.dec()
+            _timer.reset(token)
+            endpoint = path if status != 404 else "unmatched"
+            REQUESTS.inc(method=method, endpoint=endpoint, status=status)
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method=method, endpoint=endpoint)
@@ -0,0 +1,171 @@
+import asyncio
+import collections
+import logging
+import sys
+import time
+import typing as t
+
+from mlops.serving import metrics
+
+__all__ = ["ModelRegistry", "footprint"]
+
+logger = logging.getLogger(__name__)
+
+
+def footprint(obj: t.Any) -> int:
+    """Rough resident size in bytes of an object and everything it references. NumPy arrays count the data they own, so
+    views and memory-mapped arrays only count their header.
+
+    It is an estimate from :func:`sys.getsizeof` of the objects reachable through containers and instance dicts, so it
+    misses memory held by C extensions out of Python objects, objects only reachable through ``__slots__`` and
+    allocator overhead, and the process RSS can grow by more than it reports.
+
+    :param obj: Object.
+    :return: Size in bytes.
+    """
+    seen: set[int] = set()
+    stack = [obj]
+    size = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)  # Arrays include the data they own
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, list | tuple | set | frozenset):
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__"):
+            stack.append(vars(obj))
+    return size
+
+
+class ModelRegistry:
+    """Named models loaded on their first request and kept in memory up to a size budget.
+
+    Concurrent requests for a model that is not loaded yet wait for a single load, run in a worker thread. Once loaded,
+    the size of a model is estimated with :func:`footprint`, and while the loaded models add up to more than
+    ``max_size`` the least recently used ones other than the newest are evicted, to be loaded again on their next
+    request. In-flight requests keep the model they got, so an eviction never interrupts them.
+
+    A failed load is remembered: requests for that model fail right away until ``retry_after`` seconds have passed,
+    doubled on every consecutive failure up to ``max_retry_after``, so a broken artifact isn't loaded on every request.
+
+    :param max_size: Max estimated size of the loaded models in megabytes, no limit if not set. Sizes come from
+        :func:`footprint`, not from the memory of the process, which can use more.
+    :param retry_after: Seconds before a model that failed to load is loaded again.
+    :param max_retry_after: Max seconds between two loads of a model that keeps failing.
+    """
+
+    def __init__(self, max_size: float | None = None, retry_after: float = 5.0, max_retry_after: float = 300.0):
+        self.max_bytes = int(max_size * 1024**2) if max_size is not None else None
+        self.retry_after = retry_after
+        self.max_retry_after = max_retry_after
+        self.loaders: dict[str, t.Callable[[], t.Any]] = {}
+        self.models: collections.OrderedDict[str, tuple[t.Any, int]] = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.failures = 0
+        self._pending: dict[str, asyncio.Future] = {}
+        self._failed: dict[str, tuple[Exception, int, float]] = {}  # Error, consecutive failures and retry time
+
+    def register(self, name: str, load: t.Callable[[], t.Any]) -> None:
+        """Register a model without loading it.
+
+        :param name: Model name.
+        :param load: Function loading the model.
+        """
+        if name in self.loaders:
+            raise ValueError(f"Model '{name}' already registered")
+        self.loaders[name] = load
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.loaders
+
+    async def get(self, name: str) -> t.Any:
+        """Model of the given name, loading it first if it is not in memory.
+
+        :param name: Model name.
+        :return: Model.
+        """
+        if name not in self.loaders:
+            raise KeyError(name)
+
+        if name in self.models:
+            self.models.move_to_end(name)
+            self.hits += 1
+            metrics.REGISTRY_EVENTS.inc(model=name, event="hit")
+            return self.models[name][0]
+
+        if name in self._failed:
+            error, _, retry = self._failed[name]
+            if time.monotonic() < retry:
+                raise RuntimeError(
+                    f"Model '{name}' failed to load, retrying in {retry - time.monotonic():.0f}s"
+                ) from error
+
+        if (pending := self._pending.get(name)) is None:
+            pending = self._pending[name] = asyncio.ensure_future(self._load(name))
+            pending.add_done_callback(lambda _: self._pending.pop(name, None))
+
+        # Shielded, so a waiter cancelled doesn't cancel the load the others are waiting for
+        return await asyncio.shield(pending)
+
+    async def _load(self, name: str) -> t.Any:
+        start = time.perf_counter()
+        try:
+            model = await asyncio.to_thread(self.loaders[name])
+        except Exception as e:
+            self.failures += 1
+            metrics.REGISTRY_EVENTS.inc(model=name, event="failure")
+            count = self._failed[name][1] + 1 if name in self._failed else 1
+            backoff = min(self.retry_after * 2 ** (count - 1), self.max_retry_after)
+            self._failed[name] = (e, count, time.monotonic() + backoff)
+            logger.exception("Cannot load model '%s', retrying in %.0fs", name, backoff)
+            raise
+
+        self._failed.pop(name, None)
+        size = footprint(model)
+        self.models[name] = (model, size)
+        self.size += size
+        self.loads += 1
+        metrics.REGISTRY_EVENTS.inc(model=name, event="load")
+        metrics.MODEL_LOAD_SECONDS.set(time.perf_counter() - start, model=name)
+        logger.info("Model '%s' loaded in %.3fs, %.1f MB", name, time.perf_counter() - start, size / 1024**2)
+
+        while self.max_bytes is not None and self.size > self.max_bytes and len(self.models) > 1:
+            self.evict(next(iter(self.models)))
+
+        metrics.REGISTRY_SIZE.set(self.size)
+        return model
+
+    def evict(self, name: str) -> None:
+        """Drop a loaded model from memory, to be loaded again on its next request.
+
+        :param name: Model name.
+        """
+        _, size = self.models.pop(name)
+        self.size -= size
+        self.evictions += 1
+        metrics.REGISTRY_EVENTS.inc(model=name, event="eviction")
+        metrics.REGISTRY_SIZE.set(self.size)
+        logger.info("Model '%s' evicted, %.1f MB freed", name, size / 1024**2)
+
+    def stats(self) -> dict[str, t.Any]:
+        return {
+            "models": list(self.loaders),
+            "loaded": {name: size / 1024**2 for name, (_, size) in self.models.items()},
+            "loading": list(self._pending),
+            "failed": list(self._failed),
+            "size": self.size / 1024**2,
+            "max_size": self.max_bytes / 1024**2 if self.max_bytes is not None else None,
+            "hits": self.hits,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "failures": self.failures,
+        }
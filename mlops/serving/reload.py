@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import os
+import time
+import typing as t
+
+from mlops.serving import metrics
+
+__all__ = ["ModelReloader"]
+
+logger = logging.getLogger(__name__)
+
+
+def _signature(path: str | os.PathLike) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ModelReloader:
+    """Load new versions of a model artifact in the background and swap them in atomically.
+
+    The artifact is polled every ``interval`` seconds and reloaded once a change has been stable for a whole poll, so a
+    file still being written is not picked up. Reloads can also be requested on demand. Loading and warming up run in a
+    worker thread; swapping only replaces the model the requests resolve, so in-flight requests finish on the version
+    they started with while new ones get the new version. The first version can be loaded the same way once started, so
+    that the server is up while the model loads, and that load is retried until it succeeds, after ``retry_after``
+    seconds doubled on every consecutive failure up to ``max_retry_after``.
+
+    :param name: Model name, used as metrics label.
+    :param path: Model artifact path.
+    :param load: Function loading and warming up a model from the artifact.
+    :param swap: Function replacing the served model with the given one.
+    :param interval: Seconds between checks of the artifact, no watching if not set.
+    :param preload: Load the model in the background when started.
+    :param retry_after: Seconds before the first load is retried when it fails.
+    :param max_retry_after: Max seconds between two attempts of the first load.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path: str | os.PathLike,
+        load: t.Callable[[], t.Any],
+        swap: t.Callable[[t.Any], t.Any],
+        *,
+        interval: float | None = 5.0,
+        preload: bool = False,
+        retry_after: float = 5.0,
+        max_retry_after: float = 300.0,
+    ):
+        self.name = name
+        self.path = path
+        self.load = load
+        self.swap = swap
+        self.interval = interval
+        self.preload = preload
+        self.retry_after = retry_after
+        self.max_retry_after = max_retry_after
+        self.served = not preload  # Whether a version is served, loaded elsewhere when not preloaded
+        self.reloads = 0
+        self.failures = 0
+        self.last: dict[str, t.Any] = {}
+        self._signature = _signature(path)
+        self._lock: asyncio.Lock | None = None
+        self._watcher: asyncio.Task | None = None
+        self._loader: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self.preload and self._loader is None:
+            self._loader = asyncio.create_task(self._preload())
+        if self.interval and self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def close(self) -> None:
+        for task in (self._loader, self._watcher):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    ...
+        self._loader, self._watcher = None, None
+
+    @property
+    def loading(self) -> bool:
+        return self._loader is not None and not self._loader.done()
+
+    async def _preload(self) -> None:
+        failures = 0
+        while not self.served:
+            try:
+                await self.reload()
+            except Exception:
+                backoff = min(self.retry_after * 2**failures, self.max_retry_after)
+                failures += 1
+                logger.exception("Cannot load model '%s' from '%s', retrying in %.0fs", self.name, self.path, backoff)
+                await asyncio.sleep(backoff)
+
+    async def _watch(self) -> None:
+        previous = self._signature
+        while True:
+            await asyncio.sleep(t.cast(float, self.interval))
+            current = _signature(self.path)
+            if current is not None and current != self._signature and current == previous:
+                try:
+                    await self.reload()
+                except Exception:
+                    logger.exception("Cannot reload model '%s' from '%s'", self.name, self.path)
+            previous = current
+
+    async def reload(self) -> dict[str, t.Any]:
+        """Load the artifact, warm it up and swap it in.
+
+        :return: Load and swap times in seconds.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            signature = _signature(self.path)
+            start = time.perf_counter()
+            try:
+                model = await asyncio.to_thread(self.load)
+            except Exception:
+                # Remember the broken version, so it is not retried until the artifact changes again, unless there is no
+                # version served yet: then it is retried as is, in case the error was transient
+                if self.served:
+                    self._signature = signature
+                self.failures += 1
+                metrics.RELOADS.inc(model=self.name, status="failure")
+                raise
+
+            loaded = time.perf_counter()
+            self.swap(model)
+            swapped = time.perf_counter()
+
+            self._signature = signature
+            self.served = True
+            self.reloads += 1
+            self.last = {"load_seconds": loaded - start, "swap_seconds": swapped - loaded}
+            metrics.RELOADS.inc(model=self.name, status="success")
+            metrics.SWAP_SECONDS.observe(swapped - loaded, model=self.name)
+            logger.info("Model '%s' reloaded in %.3fs, swapped in %.6fs", self.name, loaded - start, swapped - loaded)
+            return self.last
+
+    def stats(self) -> dict[str, t.Any]:
+        return {
+            "loading": self.loading,
+            "served": self.served,
+            "watching": self._watcher is not None and not self._watcher.done(),
+            "interval": self.interval,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last": self.last,
+        }
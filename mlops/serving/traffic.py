@@ -0,0 +1,221 @@
+import asyncio
+import concurrent.futures
+import logging
+import random
+import time
+import typing as t
+
+from mlops.serving import metrics
+from mlops.serving.batching import Summary
+
+__all__ = ["TrafficSplitter"]
+
+logger = logging.getLogger(__name__)
+
+ROLES = ("primary", "canary", "shadow")
+
+
+class _Mirror(t.NamedTuple):
+    model: str
+    role: str
+    func: t.Callable[[list], list]
+    rows: list
+    reference: list
+
+
+class _ModelStats:
+    def __init__(self, role: str):
+        self.role = role
+        self.latency = Summary()
+        self.rows = 0
+        self.compared = 0
+        self.agreed = 0
+
+    def to_dict(self) -> dict[str, t.Any]:
+        return {
+            "role": self.role,
+            "requests": self.latency.count,
+            "rows": self.rows,
+            "latency": self.latency.to_dict(),
+            "compared_rows": self.compared,
+            "agreement": self.agreed / self.compared if self.compared else None,
+        }
+
+
+class TrafficSplitter:
+    """Split traffic between a primary and a canary model and mirror it to other models off the request path.
+
+    A ``canary_share`` of the requests is served by the canary model. Mirrored requests are scored by another model on
+    a bounded queue, after the response has been sent, and their predictions are compared with the served ones. When
+    the queue is full mirrored requests are dropped, so the served requests never wait for them. Latency and, for
+    mirrored requests, agreement with the served predictions are recorded per model.
+
+    Mirrored requests are scored by at most ``concurrency`` threads of their own, so they never take the threads used
+    to serve requests. They still run in the serving process and compete with the served requests for the GIL in the
+    Python parts of a prediction, ``benchmarks/mirror.py`` measures the impact on the latency of the served ones.
+
+    :param name: Name of the served model, used as metrics label.
+    :param canary_share: Share of the requests served by the canary model.
+    :param max_queue_size: Max mirrored requests waiting to be scored.
+    :param concurrency: Max mirrored requests scored at the same time.
+    :param log_interval: Min seconds between two warnings of failed mirrored requests.
+    :param seed: Seed of the canary picks.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        canary_share: float = 0.0,
+        max_queue_size: int = 256,
+        concurrency: int = 1,
+        log_interval: float = 60.0,
+        seed: int | None = None,
+    ):
+        if not 0 <= canary_share <= 1:
+            raise ValueError(f"Wrong canary share {canary_share}, expected a value between 0 and 1")
+
+        if concurrency < 1:
+            raise ValueError(f"Wrong concurrency {concurrency}, expected at least 1")
+
+        self.name = name
+        self.canary_share = canary_share
+        self.max_queue_size = max_queue_size
+        self.concurrency = concurrency
+        self.log_interval = log_interval
+        self.models: dict[str, _ModelStats] = {}
+        self.mirrored = 0
+        self.dropped = 0
+        self.failed = 0
+        self._random = random.Random(seed)
+        self._queue: asyncio.Queue[_Mirror] | None = None
+        self._workers: list[asyncio.Task] = []
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
+        self._logged = -float("inf")
+        self._unlogged = 0
+
+    def pick_canary(self) -> bool:
+        """Whether the next request is served by the canary model."""
+        return self.canary_share > 0 and self._random.random() < self.canary_share
+
+    def observe(self, model: str, role: str, seconds: float, rows: int) -> None:
+        """Record the latency of a request served or mirrored to a model.
+
+        :param model: Model name.
+        :param role: Model role, one of ``primary``, ``canary`` or ``shadow``.
+        :param seconds: Prediction time.
+        :param rows: Rows predicted.
+        """
+        stats = self.models.setdefault(model, _ModelStats(role))
+        stats.latency.observe(seconds)
+        stats.rows += rows
+        metrics.TRAFFIC_SECONDS.observe(seconds, model=model, role=role)
+
+    def compare(self, model: str, output: t.Sequence[t.Any], reference: t.Sequence[t.Any]) -> None:
+        """Record how many predictions of a model agree with the served ones.
+
+        :param model: Model name.
+        :param output: Predictions of the model.
+        :param reference: Served predictions of the same rows.
+        """
+        agreed = sum(a == b for a, b in zip(output, reference, strict=True))
+        stats = self.models[model]
+        stats.compared += len(reference)
+        stats.agreed += agreed
+        metrics.AGREEMENT_ROWS.inc(agreed, model=model, agreement="agree")
+        metrics.AGREEMENT_ROWS.inc(len(reference) - agreed, model=model, agreement="disagree")
+
+    def _start(self) -> asyncio.Queue[_Mirror]:
+        loop = asyncio.get_running_loop()
+        # Workers are started lazily so they are bound to the loop serving the requests
+        if (
+            self._queue is None
+            or not self._workers
+            or any(worker.done() for worker in self._workers)
+            or self._workers[0].get_loop() is not loop
+        ):
+            for worker in self._workers:
+                worker.cancel()
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(self.concurrency, thread_name_prefix="mirror")
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._workers = [loop.create_task(self._run(self._queue)) for _ in range(self.concurrency)]
+        return self._queue
+
+    async def join(self) -> None:
+        """Wait until every queued mirrored request has been scored."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._queue, self._workers, self._executor = None, [], None
+
+    def mirror(self, model: str, role: str, func: t.Callable[[list], list], rows: list, reference: list) -> bool:
+        """Queue rows to be scored by another model in the background and compared with the served predictions.
+
+        :param model: Model name.
+        :param role: Model role.
+        :param func: Prediction function of the model.
+        :param rows: Served rows.
+        :param reference: Served predictions.
+        :return: Whether the rows were queued, False if they were dropped because the queue is full.
+        """
+        try:
+            self._start().put_nowait(_Mirror(model, role, func, rows, reference))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            metrics.MIRROR_EVENTS.inc(model=model, event="dropped")
+            return False
+
+        self.mirrored += 1
+        metrics.MIRROR_EVENTS.inc(model=model, event="queued")
+        return True
+
+    def _failed(self, model: str) -> None:
+        self.failed += 1
+        metrics.MIRROR_EVENTS.inc(model=model, event="failed")
+        # A broken candidate fails every mirrored request, so warnings are rate limited
+        now = time.monotonic()
+        if now - self._logged < self.log_interval:
+            self._unlogged += 1
+            return
+
+        logger.warning(
+            "Mirrored request to model '%s' failed, %d more failure(s) since the last warning",
+            model,
+            self._unlogged,
+            exc_info=True,
+        )
+        self._logged, self._unlogged = now, 0
+
+    async def _run(self, queue: asyncio.Queue[_Mirror]) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            mirror = await queue.get()
+            start = time.perf_counter()
+            try:
+                output = await loop.run_in_executor(self._executor, mirror.func, mirror.rows)
+            except Exception:
+                self._failed(mirror.model)
+            else:
+                self.observe(mirror.model, mirror.role, time.perf_counter() - start, len(mirror.rows))
+                self.compare(mirror.model, output, mirror.reference)
+            finally:
+                queue.task_done()
+
+    def stats(self) -> dict[str, t.Any]:
+        return {
+            "canary_share": self.canary_share,
+            "max_queue_size": self.max_queue_size,
+            "concurrency": self.concurrency,
+            "queue_size": self._queue.qsize() if self._queue is not None else 0,
+            "mirrored": self.mirrored,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "models": {name: stats.to_dict() for name, stats in self.models.items()},
+        }
@@ -0,0 +1,147 @@
+import collections
+import math
+import typing as t
+
+import numpy as np
+
+__all__ = ["QuantileSketch", "FrequentItems"]
+
+
+class QuantileSketch:
+    """Mergeable streaming quantile sketch in the style of KLL.
+
+    Values are appended to a buffer of weight 1. Whenever the buffer at some level holds more than ``k`` values it is
+    sorted and every other value, starting at a random offset, is promoted to the next level with twice the weight. The
+    sketch keeps ``O(k log(n / k))`` values and the rank error of a quantile stays around ``epsilon`` of the count.
+
+    :param epsilon: Target rank error, as a fraction of the number of values seen.
+    :param seed: Random seed for the compaction offsets.
+    """
+
+    def __init__(self, epsilon: float = 0.01, seed: int | None = None):
+        self.epsilon = epsilon
+        self.k = max(int(math.ceil(2 / epsilon)), 8)
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def update(self, values: t.Any) -> "QuantileSketch":
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, values in enumerate(other.levels):
+            self.levels[level] = np.concatenate((self.levels[level], values))
+
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            values = self.levels[level]
+            if len(values) > self.k:
+                values = np.sort(values)
+                # An odd value out stays at this level, so the total weight is preserved
+                kept, values = values[len(values) - len(values) % 2 :], values[: len(values) - len(values) % 2]
+                self.levels[level] = kept
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], values[self._rng.integers(2) :: 2]))
+            level += 1
+
+    def quantile(self, q: t.Any) -> t.Any:
+        """Estimate quantiles, interpolating linearly between ranks as ``np.quantile`` does.
+
+        :param q: Quantile or sequence of quantiles in [0, 1].
+        :return: Estimated quantiles, NaN if no value has been seen.
+        """
+        if not self.count:
+            return np.full(np.shape(q), np.nan)[()]
+
+        values, weights = self._weighted()
+        # Every value stands for `weight` consecutive ranks, placed at the center of them
+        ranks = np.cumsum(weights) - (weights + 1) / 2
+        result = np.interp(np.asarray(q, dtype=float) * (self.count - 1), ranks, values)
+        return np.clip(result, self.min, self.max)[()]
+
+    def cdf(self, x: t.Any) -> t.Any:
+        """Estimate the share of the values seen that are lower than or equal to the given ones.
+
+        :param x: Value or sequence of values.
+        :return: Estimated shares, NaN if no value has been seen.
+        """
+        if not self.count:
+            return np.full(np.shape(x), np.nan)[()]
+
+        values, weights = self._weighted()
+        cumulative = np.concatenate(([0.0], np.cumsum(weights)))
+        return (cumulative[np.searchsorted(values, np.asarray(x, dtype=float), side="right")] / self.count)[()]
+
+    def _weighted(self) -> tuple[np.ndarray, np.ndarray]:
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(v), 2.0**level) for level, v in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], weights[order]
+
+
+class FrequentItems:
+    """Mergeable heavy hitters counter in the style of Space-Saving.
+
+    At most ``capacity`` items are counted. An item that is not counted yet takes the place of the one with the lowest
+    count, starting from it, so counts are overestimated by at most ``count / capacity`` and every item seen more often
+    than that is kept.
+
+    :param capacity: Max items counted.
+    """
+
+    def __init__(self, capacity: int = 32):
+        self.capacity = capacity
+        self.count = 0
+        self.counts: dict[t.Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def update(self, values: t.Iterable[t.Hashable]) -> "FrequentItems":
+        # Items are counted once per batch, so the cost per value doesn't depend on the capacity
+        return self._add(collections.Counter(values).most_common())
+
+    def merge(self, other: "FrequentItems") -> "FrequentItems":
+        return self._add(sorted(other.counts.items(), key=lambda item: item[1], reverse=True))
+
+    def _add(self, counts: list[tuple[t.Hashable, int]]) -> "FrequentItems":
+        for item, count in counts:
+            self.count += count
+            if item in self.counts or len(self.counts) < self.capacity:
+                self.counts[item] = self.counts.get(item, 0) + count
+            else:
+                lowest = min(self.counts, key=self.counts.__getitem__)
+                self.counts[item] = self.counts.pop(lowest) + count
+        return self
+
+    def frequencies(self) -> dict[t.Hashable, float]:
+        """Estimated share of the values seen of every counted item, from the most frequent one."""
+        return {
+            item: count / self.count
+            for item, count in sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        }
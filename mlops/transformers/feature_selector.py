@@ -5,13 +5,84 @@ __all__ = ["FeatureSelector"]
 
 
 class FeatureSelector(BaseEstimator, TransformerMixin):
-    def __init__(self, threshold=0.1):
+    """Select the features whose absolute Pearson correlation with the target reaches a threshold.
+
+    Correlations are computed for all columns at once from sufficient statistics (counts, sums, sums of squares and
+    cross products against the target) accumulated over row blocks, so fitting can be done in chunks or streamed
+    through ``partial_fit``. Rows with a missing value are skipped for that column only and constant columns get a
+    correlation of zero.
+
+    :param threshold: Min absolute correlation of a selected feature.
+    :param chunk_size: Rows per block when fitting, all rows at once if not set.
+    """
+
+    def __init__(self, threshold=0.1, chunk_size=None):
         self.threshold = threshold
+        self.chunk_size = chunk_size
         self.selected_features_ = None
 
+    def _reset(self):
+        for attr in ("n_samples_seen_", "_x_shift", "_y_shift", "_sx", "_sy", "_sxx", "_syy", "_sxy"):
+            self.__dict__.pop(attr, None)
+
     def fit(self, X, y):
-        correlations = np.array([abs(np.corrcoef(X[:, i], y)[0, 1]) for i in range(X.shape[1])])
-        self.selected_features_ = correlations >= self.threshold
+        self._reset()
+        X, y = np.asarray(X), np.asarray(y)
+        chunk_size = self.chunk_size or max(len(X), 1)
+        for start in range(0, max(len(X), 1), chunk_size):
+            self._accumulate(X[start : start + chunk_size], y[start : start + chunk_size])
+        return self._select()
+
+    def partial_fit(self, X, y):
+        self._accumulate(np.asarray(X), np.asarray(y))
+        return self._select()
+
+    def _accumulate(self, X, y):
+        y = y.astype(float, copy=False)
+        valid_y = ~np.isnan(y)
+        # A column sum is NaN only if the column has missing values, which is cheaper than building the mask upfront
+        complete = valid_y.all() and not np.isnan(X.sum(axis=0)).any()
+        mask = None if complete else ~np.isnan(X) & valid_y[:, None]
+
+        if not hasattr(self, "n_samples_seen_"):
+            # Statistics are accumulated around the first block means to avoid cancellation in the variance formula
+            if mask is None:
+                self._x_shift = X.mean(axis=0) if len(X) else np.zeros(X.shape[1])
+                self._y_shift = y.mean() if len(y) else 0.0
+            else:
+                self._x_shift = np.where(mask, X, 0).sum(axis=0) / np.maximum(mask.sum(axis=0), 1)
+                self._y_shift = y[valid_y].mean() if valid_y.any() else 0.0
+            self.n_samples_seen_ = np.zeros(X.shape[1])
+            self._sx, self._sy, self._sxx, self._syy, self._sxy = (np.zeros(X.shape[1]) for _ in range(5))
+
+        yc = np.where(valid_y, y - self._y_shift, 0.0)
+        if mask is None:
+            Xc = X - self._x_shift
+            self.n_samples_seen_ += len(X)
+            self._sy += yc.sum()
+            self._syy += yc @ yc
+        else:
+            Xc = np.where(mask, X - self._x_shift, 0.0)
+            weights = mask.astype(float)
+            self.n_samples_seen_ += weights.sum(axis=0)
+            self._sy += yc @ weights
+            self._syy += (yc * yc) @ weights
+
+        self._sx += Xc.sum(axis=0)
+        self._sxx += np.einsum("ij,ij->j", Xc, Xc)
+        self._sxy += yc @ Xc
+
+    def _select(self):
+        n = np.maximum(self.n_samples_seen_, 1)
+        covariance = self._sxy - self._sx * self._sy / n
+        x_variance = np.maximum(self._sxx - self._sx**2 / n, 0)
+        y_variance = np.maximum(self._syy - self._sy**2 / n, 0)
+        denominator = np.sqrt(x_variance * y_variance)
+
+        self.correlations_ = np.abs(
+            np.divide(covariance, denominator, out=np.zeros_like(covariance), where=denominator > 0)
+        )
+        self.selected_features_ = self.correlations_ >= self.threshold
         return self
 
     def transform(self, X):
@@ -1,22 +1,71 @@
 import numpy as np
 from sklearn.base import BaseEstimator, TransformerMixin
 
+from mlops.sketches import QuantileSketch
+
 __all__ = ["OutlierClipper"]
 
 
 class OutlierClipper(BaseEstimator, TransformerMixin):
-    def __init__(self, factor=1.5):
+    """Clip every column to the whiskers of its box plot, ``[Q1 - factor * IQR, Q3 + factor * IQR]``.
+
+    By default quartiles are computed exactly, both at once. With ``epsilon`` set, or when fitted with ``partial_fit``,
+    every column is summarized by a mergeable :class:`mlops.sketches.QuantileSketch` instead, so data can be streamed in
+    batches with bounded memory and approximate quartiles within that rank error.
+
+    :param factor: IQR multiplier of the clipping bounds.
+    :param epsilon: Rank error of the approximate quartiles, exact quartiles if not set.
+    :param copy: Whether to clip a copy of the data, if not float arrays are clipped in place.
+    """
+
+    def __init__(self, factor=1.5, epsilon=None, copy=True):
         self.factor = factor
+        self.epsilon = epsilon
+        self.copy = copy
         self.lower_bounds_ = None
         self.upper_bounds_ = None
 
+    def __setstate__(self, state):
+        # Clippers pickled before the epsilon and copy parameters existed behave as exact and copying ones
+        super().__setstate__({"epsilon": None, "copy": True, **state})
+
     def fit(self, X, y=None):  # type:ignore[unused-argument]
-        q1 = np.percentile(X, 25, axis=0)
-        q3 = np.percentile(X, 75, axis=0)
+        self.__dict__.pop("sketches_", None)
+        if self.epsilon is not None:
+            return self.partial_fit(X)
+
+        q1, q3 = np.quantile(X, [0.25, 0.75], axis=0)
+        return self._set_bounds(q1, q3)
+
+    def partial_fit(self, X, y=None):  # type:ignore[unused-argument]
+        X = np.asarray(X, dtype=float)
+        X = X.reshape(len(X), -1)
+        if not hasattr(self, "sketches_"):
+            self.sketches_ = [QuantileSketch(epsilon=self.epsilon or 0.01, seed=i) for i in range(X.shape[1])]
+
+        for sketch, column in zip(self.sketches_, X.T, strict=True):
+            sketch.update(column)
+
+        return self.fit_sketches(self.sketches_)
+
+    def fit_sketches(self, sketches):
+        """Fit from a sketch per column already summarizing the data, kept to go on with ``partial_fit``.
+
+        :param sketches: Quantile sketch of every column.
+        :return: Clipper.
+        """
+        self.sketches_ = list(sketches)
+        q1, q3 = np.array([sketch.quantile([0.25, 0.75]) for sketch in self.sketches_]).T
+        return self._set_bounds(q1, q3)
+
+    def _set_bounds(self, q1, q3):
         iqr = q3 - q1
         self.lower_bounds_ = q1 - (self.factor * iqr)
         self.upper_bounds_ = q3 + (self.factor * iqr)
         return self
 
     def transform(self, X):
+        if not self.copy and isinstance(X, np.ndarray) and X.dtype.kind == "f" and X.flags.writeable:
+            return np.clip(X, self.lower_bounds_, self.upper_bounds_, out=X)
+
         return np.clip(X, self.lower_bounds_, self.upper_bounds_)
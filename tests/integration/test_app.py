@@ -0,0 +1,151 @@
+import asyncio
+import functools
+
+import pandas as pd
+import pytest
+from flama.client import Client
+
+from mlops.app import app
+from mlops.apps.churn import app as churn_app
+from mlops.apps.registry import components
+from mlops.apps.registry.app import get_registry
+from mlops.config import ROOT_PATH
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet").drop(columns="Exited").head(20)
+
+
+@pytest.fixture
+async def client():
+    async with Client(app=app) as client:
+        for _ in range(600):  # Model loads in the background
+            if (await client.get("/ping/")).status_code == 200:
+                break
+            await asyncio.sleep(0.05)
+        yield client
+
+
+@pytest.mark.filterwarnings("ignore")
+class TestApp:
+    async def test_ping(self, client):
+        response = await client.get("/ping/")
+
+        assert response.status_code == 200
+
+    async def test_predict(self, client, dataset):
+        rows = dataset.astype(object).where(dataset.notna(), None).values.tolist()
+
+        response = await client.post("/churn/predict/", json={"input": rows})
+
+        assert response.status_code == 200
+        assert len(response.json()["output"]) == len(rows)
+        assert set(response.json()["model"]) == {"id", "version"}
+
+    async def test_predict_columnar(self, client, dataset):
+        rows = dataset.astype(object).where(dataset.notna(), None).values.tolist()
+        columns = {name: values.tolist() for name, values in dataset.drop(columns=["RowNumber", "Surname"]).items()}
+
+        expected = await client.post("/churn/predict/", json={"input": rows})
+        response = await client.post("/churn/predict/columnar/", json={"columns": columns})
+
+        assert response.status_code == 200
+        assert response.json()["output"] == expected.json()["output"]
+
+    @pytest.mark.parametrize(
+        ["body"],
+        [
+            pytest.param({"columns": {"Age": [42]}}, id="error_missing_columns"),
+            pytest.param({"input": [[42]]}, id="error_rows"),
+        ],
+    )
+    async def test_predict_columnar_error(self, client, body):
+        response = await client.post("/churn/predict/columnar/", json=body)
+
+        assert response.status_code == 400
+
+    async def test_traffic(self, client, dataset):
+        rows = dataset.astype(object).where(dataset.notna(), None).values.tolist()
+
+        await client.post("/churn/predict/", json={"input": rows})
+        response = await client.get("/churn/traffic/")
+
+        assert response.status_code == 200
+        assert response.json()["models"]["churn"]["role"] == "primary"
+        assert response.json()["models"]["churn"]["rows"] >= len(rows)
+
+    async def test_drift(self, client, dataset):
+        rows = dataset.astype(object).where(dataset.notna(), None).values.tolist()
+
+        await client.post("/churn/predict/", json={"input": rows})
+        response = await client.get("/churn/drift/")
+
+        assert response.status_code == 200
+        # Artifacts dumped before reference summaries were written into them are not monitored
+        if response.json()["enabled"]:
+            assert response.json()["rows"] >= len(rows)
+            assert set(response.json()["columns"]) >= {"Age", "Geography"}
+
+    @pytest.mark.parametrize(
+        ["token", "authorization", "broken", "status"],
+        [
+            pytest.param("secret", "Bearer secret", False, 200, id="ok"),
+            pytest.param(None, "Bearer secret", False, 404, id="error_disabled"),
+            pytest.param("secret", "Bearer wrong", False, 401, id="error_wrong_token"),
+            pytest.param("secret", None, False, 401, id="error_no_token"),
+            pytest.param("secret", "Bearer secret", True, 503, id="error_load"),
+        ],
+    )
+    async def test_reload(self, client, monkeypatch, token, authorization, broken, status):
+        async def reload():
+            raise OSError("Broken artifact")
+
+        monkeypatch.setattr(churn_app, "CHURN_RELOAD_TOKEN", token)
+        if broken:
+            monkeypatch.setattr(churn_app.reloader, "reload", reload)
+        headers = {"authorization": authorization} if authorization else {}
+
+        response = await client.post("/churn/reload/", headers=headers)
+
+        assert response.status_code == status
+        if status == 200:
+            assert response.json().keys() >= {"model", "load_seconds", "swap_seconds"}
+
+    async def test_registry(self, client, dataset):
+        rows = dataset.astype(object).where(dataset.notna(), None).values.tolist()
+
+        expected = await client.post("/churn/predict/", json={"input": rows})
+        responses = await asyncio.gather(
+            *[client.post("/models/churn-1.0.0-numpy/predict/", json={"input": rows}) for _ in range(3)]
+        )
+        stats = (await client.get("/models/")).json()
+
+        assert [r.status_code for r in responses] == [200] * 3
+        assert all(r.json()["output"] == expected.json()["output"] for r in responses)
+        assert "churn-1.0.0-numpy" in stats["loaded"]
+
+    @pytest.mark.parametrize(
+        ["path", "body", "status"],
+        [
+            pytest.param("/models/churn-1.0.0/predict/", {"input": [[42]]}, 400, id="error_wrong_input"),
+            pytest.param("/models/unknown/predict/", {"input": [[42]]}, 404, id="error_unknown_model"),
+        ],
+    )
+    async def test_registry_error(self, client, path, body, status):
+        response = await client.post(path, json=body)
+
+        assert response.status_code == status
+
+    async def test_registry_missing_artifact(self, client, monkeypatch):
+        registry = get_registry()
+        entry = {"kind": "schema", "artifact": "artifacts/models/missing.flm", "schema": "data/cars/schema.json"}
+        monkeypatch.setitem(registry.loaders, "missing", functools.partial(components.load, "missing", entry))
+        monkeypatch.setattr(registry, "_failed", {})
+        failures = registry.failures
+
+        responses = [await client.post("/models/missing/predict/", json={"input": [[42]]}) for _ in range(2)]
+
+        assert [r.status_code for r in responses] == [503, 503]
+        assert registry.stats()["failed"] == ["missing"]
+        assert registry.failures == failures + 1  # The second request is answered without loading it again
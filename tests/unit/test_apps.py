@@ -0,0 +1,178 @@
+import asyncio
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+from flama import exceptions
+
+from mlops import drift, serving
+from mlops.apps.churn import components
+from mlops.apps.registry import components as registry_components
+from mlops.config import CHURN_ARTIFACT_PATH, ROOT_PATH
+
+ROW = [1, 15634602, "Hargrave", 619, "France", "Female", 42, 2, 0.0, 1, 1, 1, 101348.88]
+
+
+class TestChurnComponents:
+    @pytest.mark.filterwarnings("ignore")
+    def test_snapshot(self, tmp_path):
+        snapshot_path = components.snapshot(CHURN_ARTIFACT_PATH, tmp_path / "model.plan", rows=100)
+
+        component = components.load_snapshot(snapshot_path, CHURN_ARTIFACT_PATH)
+        expected = components.load(CHURN_ARTIFACT_PATH).model
+
+        assert component is not None
+        assert component.model.info == expected.info
+        np.testing.assert_allclose(component.model.predict_proba([ROW]), expected.predict_proba([ROW]), atol=1e-5)
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_snapshot_stale(self, tmp_path):
+        artifact = tmp_path / "model.flm"
+        shutil.copy(CHURN_ARTIFACT_PATH, artifact)
+        snapshot_path = components.snapshot(artifact, tmp_path / "model.plan", rows=10)
+        with open(artifact, "ab") as f:
+            f.write(b"\0")
+
+        assert components.load_snapshot(snapshot_path, artifact) is None
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_snapshot_error(self, tmp_path):
+        with pytest.raises(ValueError):
+            components.snapshot(CHURN_ARTIFACT_PATH, tmp_path / "model.plan", rows=10, tolerance=-1)
+
+        assert not (tmp_path / "model.plan").exists()
+
+    @pytest.mark.filterwarnings("ignore")
+    @pytest.mark.parametrize(
+        "backend", [pytest.param("sklearn", id="ok_sklearn"), pytest.param("numpy", id="ok_numpy")]
+    )
+    def test_predict_proba_columns(self, backend):
+        model = components.load(CHURN_ARTIFACT_PATH, backend=backend).model
+        rows = [ROW, [2, 15647311, "Hill", 608, None, "Other", None, 1, 83807.86, 1, 0, 1, 112542.58]]
+        names = model.decoder.names
+        used = [name for name in names if name in model.decoder.numerical + model.decoder.categorical]
+
+        columns = model.decoder.json({name: [row[names.index(name)] for row in rows] for name in used})
+
+        np.testing.assert_allclose(model.predict_proba_columns(columns), model.predict_proba(rows), atol=1e-6)
+
+    @pytest.mark.filterwarnings("ignore")
+    @pytest.mark.parametrize(
+        "backend", [pytest.param("sklearn", id="ok_sklearn"), pytest.param("numpy", id="ok_numpy")]
+    )
+    async def test_monitor(self, backend):
+        model = components.load(CHURN_ARTIFACT_PATH, backend=backend).model
+        X = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet").drop(columns="Exited").head(50)
+        rows = X.astype(object).where(X.notna(), None).values.tolist()
+        model.monitor = drift.DriftMonitor(
+            drift.summarize(X, ["Age", "Balance"], ["Geography"], model.predict_proba(rows)[:, 1])
+        )
+
+        await model.apredict(rows)
+        await model.apredict_columns(model.decoder.json({name: X[name].tolist() for name in model.decoder.names}))
+        report = model.monitor.report()
+
+        assert report["rows"] == 2 * len(rows)
+        assert report["columns"]["Geography"]["psi"] == pytest.approx(0.0, abs=1e-6)
+        assert report["output"]["ks"] < 1e-4
+
+    @pytest.mark.filterwarnings("ignore")
+    async def test_swap(self):
+        component = components.load(CHURN_ARTIFACT_PATH)
+        previous = component.model
+        previous.batcher = serving.MicroBatcher(previous.predict_proba, max_wait=0.01)
+        previous.cache = serving.PredictionCache(previous.name)
+        model = components.load(CHURN_ARTIFACT_PATH).model
+        model.predict_proba = lambda x: np.tile([0.0, 1.0], (len(x), 1))
+
+        in_flight = asyncio.ensure_future(previous.apredict([ROW]))
+        await asyncio.sleep(0)
+        assert component.swap(model) is previous
+        served = await model.apredict([ROW])
+
+        assert await in_flight == [0]
+        assert previous.cache.get(previous.cache.key(ROW))[1] < 0.5
+        assert served == [1]
+        assert model.batcher is not None and model.batcher is not previous.batcher
+        assert model.cache is not None and model.cache is not previous.cache
+        assert model.cache.get(model.cache.key(ROW)).tolist() == [0.0, 1.0]
+        await asyncio.sleep(0.05)
+        assert previous.batcher is None
+        await model.batcher.close()
+
+    def test_component_loading(self):
+        component = components.ChurnModelComponent()
+
+        assert not component.ready
+        assert component.get_model_type() is components.ChurnModel
+        with pytest.raises(exceptions.HTTPException) as e:
+            component.resolve()
+        assert e.value.status_code == 503
+
+
+class TestRegistryComponents:
+    @pytest.fixture(scope="class")
+    def schema(self):
+        return registry_components.Schema.from_file(ROOT_PATH / "data" / "cars" / "schema.json")
+
+    def test_schema(self, schema):
+        assert schema.columns[:3] == ["kleur", "carrosserie", "kmstand"]
+        assert "src_ad_id" not in schema.columns  # Not eligible
+        assert "webclicks" not in schema.columns  # Target
+
+    @pytest.mark.parametrize(
+        ["values", "message"],
+        [
+            pytest.param({}, None, id="ok"),
+            pytest.param({"kmstand": None}, None, id="ok_missing_value"),
+            pytest.param({"kmstand": 1000}, None, id="ok_integer_as_float"),
+            pytest.param({"kleur": 1}, "Wrong value 1 of column 'kleur'", id="error_wrong_type"),
+            pytest.param({"photo_cnt": True}, "Wrong value True of column 'photo_cnt'", id="error_bool"),
+            pytest.param({"price": ...}, "Row 0 has", id="error_wrong_length"),
+        ],
+    )
+    def test_schema_check(self, schema, values, message):
+        example = {"integer": 1, "float": 1.5, "category": "a", "date": "2024-01-01"}
+        row = [example[kind] for kind in schema.fields.values()]
+        for name, value in values.items():
+            if value is ...:
+                row.pop(schema.columns.index(name))
+            else:
+                row[schema.columns.index(name)] = value
+
+        if message is None:
+            assert schema.check([row]) == [row]
+        else:
+            with pytest.raises(ValueError, match=message):
+                schema.check([row])
+
+    async def test_schema_model(self, schema):
+        threads = []
+
+        class Estimator:
+            def predict(self, X):
+                threads.append(threading.current_thread())
+                return np.zeros(len(X))
+
+        model = registry_components.SchemaModel(Estimator(), None, schema)
+        row = [None] * len(schema.columns)
+
+        assert await model.apredict([row, row]) == [0.0, 0.0]
+        assert threads and threads[0] is not threading.main_thread()
+        with pytest.raises(ValueError):
+            await model.apredict([[1]])
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_load_churn(self):
+        entry = {"kind": "churn", "artifact": CHURN_ARTIFACT_PATH.relative_to(ROOT_PATH), "backend": "numpy"}
+
+        model = registry_components.load("churn-numpy", entry)
+
+        assert model.name == "churn-numpy"
+        assert model.info == components.load(CHURN_ARTIFACT_PATH).model.info
+
+    def test_load_error(self):
+        with pytest.raises(ValueError):
+            registry_components.load("test", {"kind": "unknown", "artifact": "model.flm"})
@@ -0,0 +1,101 @@
+import os
+import time
+
+import pytest
+
+from mlops.caching import TaskCache, code_version, fingerprint
+
+
+class TestFingerprint:
+    @pytest.mark.parametrize(
+        ["other", "same"],
+        [
+            pytest.param({"config": {"b": 2, "a": 1}}, True, id="ok_same_inputs"),
+            pytest.param({"data": {"dataset": "other"}}, False, id="ok_data_changed"),
+            pytest.param({"config": {"a": 1, "b": 3}}, False, id="ok_config_changed"),
+            pytest.param({"code": "v2"}, False, id="ok_code_changed"),
+            pytest.param({"seed": 1}, False, id="ok_seed_changed"),
+        ],
+    )
+    def test_fingerprint(self, other, same):
+        inputs = {"data": {"dataset": "abc"}, "config": {"a": 1, "b": 2}, "code": "v1", "seed": 0}
+
+        assert (fingerprint(**inputs) == fingerprint(**{**inputs, **other})) is same
+
+    def test_code_version(self, tmp_path):
+        (tmp_path / "package").mkdir()
+        (tmp_path / "package" / "module.py").write_text("x = 1\n")
+        (tmp_path / "dag.py").write_text("y = 2\n")
+        version = code_version(tmp_path / "dag.py", tmp_path / "package")
+
+        (tmp_path / "package" / "notes.txt").write_text("not code")
+        assert code_version(tmp_path / "dag.py", tmp_path / "package") == version
+
+        (tmp_path / "package" / "module.py").write_text("x = 2\n")
+        assert code_version(tmp_path / "dag.py", tmp_path / "package") != version
+
+
+class TestTaskCache:
+    def test_get_put(self, tmp_path):
+        cache = TaskCache(tmp_path / "cache")
+        model = tmp_path / "model.flm"
+        model.write_bytes(b"trained")
+
+        assert cache.get("train", "key") is None
+        cache.put("train", "key", {"metrics": {"accuracy": 0.9}}, files=[model])
+        model.write_bytes(b"overwritten by another run")
+
+        assert cache.get("train", "key") == {"metrics": {"accuracy": 0.9}}
+        assert model.read_bytes() == b"trained"
+        assert cache.get("train", "other") is None
+
+    def test_broken_entry(self, tmp_path):
+        cache = TaskCache(tmp_path / "cache")
+        model = tmp_path / "model.flm"
+        model.write_bytes(b"trained")
+        path = cache.put("train", "key", {}, files=[model])
+
+        (path / "files" / "0-model.flm").unlink()
+
+        assert cache.get("train", "key") is None
+        assert not path.exists()
+
+    def test_drop(self, tmp_path):
+        cache = TaskCache(tmp_path)
+        cache.put("register", "key", {"run_id": "deleted"})
+
+        assert cache.drop("register", "key")
+        assert cache.get("register", "key") is None
+        assert not cache.drop("register", "key")
+        assert cache.put("register", "key", {"run_id": "new"}) is not None
+
+    @pytest.mark.parametrize(
+        ["max_age", "max_entries", "expected"],
+        [
+            pytest.param(None, None, ["c", "b", "a"], id="ok_no_limits"),
+            pytest.param(None, 2, ["c", "b"], id="ok_max_entries"),
+            pytest.param(1, None, ["c", "b"], id="ok_max_age"),
+        ],
+    )
+    def test_retention(self, tmp_path, max_age, max_entries, expected):
+        cache = TaskCache(tmp_path, max_age=max_age, max_entries=max_entries)
+        for i, key in enumerate(["a", "b", "c"]):
+            path = TaskCache(tmp_path).put("train", key, {"run": i})
+            last_used = time.time() - (2 - i) * 0.75 * 86400
+            os.utime(path / "output.json", (last_used, last_used))
+
+        cache.evict("train")
+
+        assert [entry.name for entry in cache.entries("train")] == expected
+
+    def test_get_keeps_used_entries(self, tmp_path):
+        cache = TaskCache(tmp_path, max_entries=2)
+        cache.put("train", "a", {})
+        cache.put("train", "b", {})
+        os.utime(cache.path("train", "a") / "output.json", (0, 0))
+        os.utime(cache.path("train", "b") / "output.json", (1, 1))
+
+        cache.get("train", "a")
+        cache.put("train", "c", {})
+
+        assert sorted(entry.name for entry in cache.entries("train")) == ["a", "c"]
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from mlops.datasets import difference, hash_split, load_frame, read_row_group, row_groups, save_frame
+
+
+class TestDatasets:
+    @pytest.fixture
+    def df(self):
+        return pd.DataFrame({"id": [3, 1, 2], "name": ["a", "b", None], "value": [0.5, None, 1.5]}, index=[10, 20, 30])
+
+    def test_save_load(self, df, tmp_path):
+        reference = save_frame(df, tmp_path / "datasets")
+
+        result = load_frame(**reference)
+
+        pd.testing.assert_frame_equal(result, df)
+
+    def test_load_zero_copy(self, df, tmp_path):
+        reference = save_frame(df, tmp_path)
+
+        result = load_frame(**reference)
+
+        assert not result["id"].to_numpy().flags.writeable
+        assert result["name"].to_numpy().flags.writeable
+
+    def test_save_content_addressed(self, df, tmp_path):
+        first = save_frame(df, tmp_path)
+        second = save_frame(df.copy(), tmp_path)
+        third = save_frame(df.head(2), tmp_path)
+
+        assert first == second
+        assert first["sha256"] != third["sha256"]
+        assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+            {f"{first['sha256']}.arrow", f"{third['sha256']}.arrow"}
+        )
+
+    def test_load_wrong_hash(self, df, tmp_path):
+        reference = save_frame(df, tmp_path)
+
+        with pytest.raises(ValueError):
+            load_frame(reference["path"], sha256="0" * 64)
+
+    def test_difference(self, df):
+        other = pd.concat([df.iloc[[2, 0]], pd.DataFrame({"id": [4], "name": ["d"], "value": [2.5]})])
+
+        result = difference(df, other[["value", "name", "id"]])
+
+        pd.testing.assert_frame_equal(result, df.iloc[[1]])
+
+    @pytest.mark.parametrize(
+        ["parts", "expected"],
+        [
+            pytest.param(None, [("data.parquet", 0, 4), ("data.parquet", 1, 4), ("data.parquet", 2, 2)], id="ok_file"),
+            pytest.param(2, [("part-0.parquet", 0, 4), ("part-1.parquet", 0, 4)], id="ok_directory"),
+        ],
+    )
+    def test_row_groups(self, tmp_path, parts, expected):
+        df = pd.DataFrame({"id": np.arange(10), "value": np.arange(10) * 0.5})
+        if parts is None:
+            path = tmp_path / "data.parquet"
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, row_group_size=4)
+        else:
+            path = tmp_path / "data"
+            path.mkdir()
+            for i in range(parts):
+                part = df.iloc[i * 4 : (i + 1) * 4]
+                pq.write_table(pa.Table.from_pandas(part, preserve_index=False), path / f"part-{i}.parquet")
+
+        groups = row_groups(path)
+
+        assert [(rg.path.rsplit("/", 1)[-1], rg.index, rg.rows) for rg in groups] == expected
+        pd.testing.assert_frame_equal(
+            read_row_group(groups[1], ["value"]), df[["value"]].iloc[4:8].reset_index(drop=True)
+        )
+
+    def test_row_groups_error(self, tmp_path):
+        with pytest.raises(ValueError, match="No Parquet files"):
+            row_groups(tmp_path)
+
+    def test_hash_split(self):
+        ids = np.arange(15634602, 15634602 + 100000)
+
+        split = hash_split(ids, 0.2, seed=1)
+
+        assert split.mean() == pytest.approx(0.2, abs=0.01)
+        assert (np.concatenate([hash_split(chunk, 0.2, seed=1) for chunk in np.array_split(ids, 7)]) == split).all()
+        assert (hash_split(ids, 0.2, seed=2) != split).any()
+        assert not (split & ~hash_split(ids, 0.3, seed=1)).any()  # Test rows stay so with a larger test size
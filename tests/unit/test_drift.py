@@ -0,0 +1,107 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mlops.drift import DriftMonitor, psi, summarize
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    size = 20000
+    return pd.DataFrame(
+        {
+            "Age": rng.normal(40, 10, size=size).round(),
+            "NumOfProducts": rng.integers(1, 5, size=size).astype(float),
+            "Geography": rng.choice(["France", "Spain", "Germany"], p=[0.5, 0.25, 0.25], size=size).astype(object),
+            "Surname": rng.choice(["Smith", "Jones"], size=size).astype(object),
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def reference(data):
+    return summarize(data.head(10000), ["Age", "NumOfProducts"], ["Geography"], data["Age"].head(10000) / 100)
+
+
+def rows(data):
+    return data.astype(object).where(data.notna(), None).values.tolist()
+
+
+class TestSummarize:
+    def test_summarize(self, reference):
+        age = reference["numerical"]["Age"]
+
+        assert json.loads(json.dumps(reference)) == reference
+        assert (reference["rows"], reference["columns"]) == (10000, ["Age", "NumOfProducts", "Geography", "Surname"])
+        assert len(age["shares"]) == len(age["edges"]) + 1 == 10
+        assert sum(age["shares"]) == pytest.approx(1.0)
+        assert reference["numerical"]["NumOfProducts"]["edges"] == [1.0, 2.0, 3.0, 4.0]
+        assert reference["categorical"]["Geography"]["frequencies"] == pytest.approx(
+            {"France": 0.5, "Spain": 0.25, "Germany": 0.25}, abs=0.02
+        )
+
+    @pytest.mark.parametrize(
+        ["expected", "actual", "result"],
+        [
+            pytest.param([0.5, 0.5], [0.5, 0.5], 0.0, id="ok_same"),
+            pytest.param([0.5, 0.5], [0.9, 0.1], 0.4 * np.log(9), id="ok_shifted"),
+            pytest.param([1.0, 0.0], [0.0, 1.0], 2 * (1 - 1e-4) * np.log(1e4), id="ok_empty_bins"),
+        ],
+    )
+    def test_psi(self, expected, actual, result):
+        assert psi(expected, actual) == pytest.approx(result)
+
+
+class TestDriftMonitor:
+    @pytest.mark.parametrize(
+        ["shift", "drifted"],
+        [
+            pytest.param({}, [], id="ok_same_distribution"),
+            pytest.param({"Age": 15}, ["Age", "output"], id="ok_numerical_shift"),
+            pytest.param({"Geography": "Spain"}, ["Geography"], id="ok_categorical_shift"),
+        ],
+    )
+    def test_report(self, data, reference, shift, drifted):
+        served = data.tail(10000).copy()
+        for name, value in shift.items():
+            served[name] = served[name] + value if isinstance(value, int) else value
+
+        monitor = DriftMonitor(reference, buffer_size=512)
+        for i in range(0, len(served), 100):
+            batch = served.iloc[i : i + 100]
+            monitor.observe(rows(batch), batch["Age"] / 100)
+        report = monitor.report()
+
+        assert report["rows"] == 10000
+        assert report["drifted"] == drifted
+        assert set(report["columns"]) == {"Age", "NumOfProducts", "Geography"}
+        assert report["columns"]["Age"]["ks"] > 0.4 if "Age" in shift else report["columns"]["Age"]["ks"] < 0.03
+
+    def test_missing_values(self, data, reference):
+        served = data.tail(1000).copy()
+        served.loc[served.index[:500], "NumOfProducts"] = np.nan
+        served.loc[served.index[:500], "Geography"] = None
+
+        monitor = DriftMonitor(reference)
+        monitor.observe(rows(served), served["Age"] / 100)
+        report = monitor.report()
+
+        assert report["columns"]["NumOfProducts"]["missing"] == report["columns"]["Geography"]["missing"] == 0.5
+        assert set(report["drifted"]) == {"NumOfProducts", "Geography"}
+
+    def test_buffer(self, data, reference):
+        monitor = DriftMonitor(reference, buffer_size=100)
+
+        monitor.observe(rows(data.head(60)), np.zeros(60))
+        assert (monitor.rows, len(monitor.output)) == (0, 0)
+
+        monitor.observe(rows(data.head(60)), np.zeros(60))
+        assert (monitor.rows, len(monitor.output)) == (120, 120)
+
+    def test_report_empty(self, reference):
+        report = DriftMonitor(reference).report()
+
+        assert (report["rows"], report["columns"], report["drifted"]) == (0, None, [])
@@ -0,0 +1,158 @@
+import flama
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.neural_network import MLPClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from mlops.config import CHURN_ARTIFACT_PATH, ROOT_PATH
+from mlops.engines import ChurnEngine, build_plan, fold, load_plan, save_plan
+from mlops.transformers import OutlierClipper
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    rng = np.random.default_rng(0)
+    n = 200
+    X = pd.DataFrame(
+        {
+            "id": np.arange(n),
+            "age": rng.normal(40, 10, n),
+            "country": rng.choice(["France", "Spain", "Germany"], n).astype(object),
+            "balance": rng.exponential(1000, n),
+            "gender": rng.choice(["Female", "Male"], n).astype(object),
+        }
+    )
+    y = ((X["age"] > 40) ^ (X["country"] == "Spain")).astype(int)
+    return X, y
+
+
+def build_pipeline(activation):
+    return Pipeline(
+        [
+            (
+                "preprocessing",
+                ColumnTransformer(
+                    [
+                        (
+                            "numerical",
+                            Pipeline(
+                                [
+                                    ("imputer", SimpleImputer(strategy="median")),
+                                    ("outlier_clipper", OutlierClipper(factor=1.5)),
+                                    ("scaler", StandardScaler()),
+                                ]
+                            ),
+                            [1, 3],
+                        ),
+                        (
+                            "categorical",
+                            Pipeline(
+                                [
+                                    ("imputer", SimpleImputer(strategy="constant", fill_value="missing")),
+                                    ("onehot", OneHotEncoder(handle_unknown="ignore")),
+                                ]
+                            ),
+                            [2, 4],
+                        ),
+                    ]
+                ),
+            ),
+            (
+                "mlp_classifier",
+                MLPClassifier(hidden_layer_sizes=(8, 4), activation=activation, max_iter=50, random_state=0),
+            ),
+        ]
+    )
+
+
+class TestChurnEngine:
+    @pytest.mark.filterwarnings("ignore")
+    @pytest.mark.parametrize(
+        ["activation", "rows"],
+        [
+            pytest.param("relu", None, id="ok_relu_dataframe"),
+            pytest.param("tanh", None, id="ok_tanh_dataframe"),
+            pytest.param("logistic", None, id="ok_logistic_dataframe"),
+            pytest.param(
+                "relu",
+                [[0, 35.0, "France", 10.0, "Male"], [1, 80.0, "Italy", 1e9, "Female"], [2, None, None, None, "Male"]],
+                id="ok_rows_with_unknown_and_missing",
+            ),
+        ],
+    )
+    def test_predict_proba(self, dataset, activation, rows):
+        X, y = dataset
+        pipeline = build_pipeline(activation).fit(X, y)
+        data = X if rows is None else rows
+
+        engine = ChurnEngine.from_estimator(pipeline)
+
+        np.testing.assert_allclose(engine.predict_proba(data), pipeline.predict_proba(data), atol=1e-5)
+        np.testing.assert_array_equal(engine.predict(data), pipeline.predict(data))
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_artifact(self):
+        pipeline = flama.load(CHURN_ARTIFACT_PATH).model
+        X = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet").drop(columns=["Exited"])
+
+        engine = ChurnEngine(build_plan(pipeline))
+
+        np.testing.assert_allclose(engine.predict_proba(X), pipeline.predict_proba(X), atol=1e-5)
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_plan_error(self, dataset):
+        X, y = dataset
+        pipeline = build_pipeline("relu")
+        pipeline.set_params(preprocessing__categorical__onehot__drop="first").fit(X, y)
+
+        with pytest.raises(ValueError):
+            build_plan(pipeline)
+
+
+class TestPlans:
+    @pytest.mark.filterwarnings("ignore")
+    def test_save_load(self, dataset, tmp_path):
+        X, y = dataset
+        pipeline = build_pipeline("tanh").fit(X, y)
+        plan = build_plan(pipeline)
+
+        loaded, header = load_plan(save_plan(plan, tmp_path / "churn.plan", meta={"id": "model"}))
+
+        assert header == {"meta": {"id": "model"}}
+        assert loaded.keys() == plan.keys()
+        for name, value in plan.items():
+            np.testing.assert_array_equal(loaded[name], value)
+            assert loaded[name].dtype == value.dtype and not loaded[name].flags.writeable
+        engine = ChurnEngine(loaded)
+        np.testing.assert_allclose(engine.predict_proba(X), pipeline.predict_proba(X), atol=1e-5)
+        # Folded weights are used in place, as views of the mapped file
+        assert engine.numerical_coef is loaded["numerical_coef"] and engine.first_intercept is loaded["first_intercept"]
+        assert all(table is loaded[f"table_{i}"] for i, table in enumerate(engine.tables))
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_unfolded(self, dataset):
+        X, y = dataset
+        pipeline = build_pipeline("relu").fit(X, y)
+        plan = {name: value for name, value in build_plan(pipeline).items() if name not in fold(build_plan(pipeline))}
+
+        np.testing.assert_allclose(ChurnEngine(plan).predict_proba(X), pipeline.predict_proba(X), atol=1e-5)
+
+    @pytest.mark.parametrize(
+        ["plan", "content", "raises"],
+        [
+            pytest.param({"x": np.array([None])}, None, pytest.raises(ValueError), id="error_object_array"),
+            pytest.param(None, b"not a plan", pytest.raises(ValueError), id="error_wrong_file"),
+        ],
+    )
+    def test_error(self, tmp_path, plan, content, raises):
+        path = tmp_path / "churn.plan"
+        with raises:
+            if plan is not None:
+                save_plan(plan, path)
+            else:
+                path.write_bytes(content)
+                load_plan(path)
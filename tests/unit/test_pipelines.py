@@ -1,10 +1,34 @@
+import os
+import pickle
 from contextlib import nullcontext as does_not_raise
 
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
-from sklearn.model_selection import GridSearchCV
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, RandomizedSearchCV
+from sklearn.neural_network import MLPClassifier
 from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
 
-from mlops.pipelines.churn import ChurnPipeline
+from mlops.config import ROOT_PATH
+from mlops.datasets import hash_split
+from mlops.pipelines import (
+    ChurnPipeline,
+    Execution,
+    ProfiledPipeline,
+    ProfiledScorer,
+    StreamingTrainer,
+    ThreadProfiledPipeline,
+    TransformerCache,
+    profile_candidates,
+    profile_steps,
+)
+from mlops.profiling import Profiler
 
 
 class TestChurnPipeline:
@@ -78,6 +102,33 @@ class TestChurnPipeline:
         assert model.n_jobs == -1
         assert model.param_grid == basic_params
 
+    def test_build_compact_preprocessing(self, basic_features, basic_params):
+        X = pd.DataFrame(
+            {
+                "age": [20.0, None, 40.0, 90.0],
+                "salary": [1000, 2000, 3000, 4000],
+                "state": ["a", "b", None, "a"],
+                "gender": ["m", "f", "f", "m"],
+            }
+        )
+        original = X.copy()
+        preprocessing = (
+            ChurnPipeline(
+                basic_params,
+                numeric_features=basic_features["numeric"],
+                categorical_features=basic_features["categorical"],
+            )
+            .build()
+            .estimator.named_steps["preprocessing"]
+        )
+
+        Xt = preprocessing.fit_transform(X)
+
+        assert isinstance(Xt, np.ndarray)
+        assert Xt.dtype == np.float32
+        assert not np.isnan(Xt).any()
+        pd.testing.assert_frame_equal(X, original)
+
     @pytest.mark.parametrize(
         ["params", "raises"],
         [
@@ -91,3 +142,334 @@ class TestChurnPipeline:
         )
         with raises:
             pipeline.build()
+
+    @pytest.mark.parametrize(
+        ["search", "expected_type", "expected_params"],
+        [
+            pytest.param(None, GridSearchCV, {"param_grid": {"mlp_classifier__max_iter": [100, 200]}}, id="ok_default"),
+            pytest.param(
+                {"strategy": "random", "n_iter": 3},
+                RandomizedSearchCV,
+                {"n_iter": 3, "param_distributions": {"mlp_classifier__max_iter": [100, 200]}},
+                id="ok_random",
+            ),
+            pytest.param(
+                {"strategy": "halving"},
+                HalvingGridSearchCV,
+                {"resource": "n_samples", "scoring": "roc_auc", "max_resources": "auto"},
+                id="ok_halving_samples",
+            ),
+            pytest.param(
+                {"strategy": "halving", "resource": "mlp_classifier__max_iter"},
+                HalvingGridSearchCV,
+                {"resource": "mlp_classifier__max_iter", "max_resources": 200, "param_grid": {}},
+                id="ok_halving_iterations",
+            ),
+        ],
+    )
+    def test_build_search(self, basic_features, search, expected_type, expected_params):
+        pipeline = ChurnPipeline(
+            {"mlp_classifier__max_iter": [100, 200]},
+            numeric_features=basic_features["numeric"],
+            categorical_features=basic_features["categorical"],
+            search=search,
+        )
+
+        model = pipeline.build()
+
+        assert isinstance(model, expected_type)
+        assert {k: v for k, v in model.get_params().items() if k in expected_params} == expected_params
+
+    def test_build_search_error(self, basic_features):
+        with pytest.raises(ValueError):
+            ChurnPipeline(
+                {},
+                numeric_features=basic_features["numeric"],
+                categorical_features=basic_features["categorical"],
+                search={"strategy": "bayesian"},
+            )
+
+    @pytest.mark.parametrize(
+        ["execution", "expected"],
+        [
+            pytest.param(None, -1, id="ok_default"),
+            pytest.param({"backend": "threads", "n_jobs": 2}, 2, id="ok_threads"),
+            pytest.param({"backend": "serial", "n_jobs": 4}, 1, id="ok_serial"),
+        ],
+    )
+    def test_build_execution(self, basic_features, basic_params, execution, expected):
+        pipeline = ChurnPipeline(
+            basic_params,
+            numeric_features=basic_features["numeric"],
+            categorical_features=basic_features["categorical"],
+            execution=execution,
+        )
+
+        assert pipeline.build().n_jobs == expected
+
+    @pytest.mark.parametrize(
+        ["profile", "backend", "expected_pipeline", "expected_scoring"],
+        [
+            pytest.param(False, "processes", Pipeline, list, id="ok_disabled"),
+            pytest.param(True, "processes", ProfiledPipeline, ProfiledScorer, id="ok_enabled"),
+            pytest.param(True, "threads", ThreadProfiledPipeline, ProfiledScorer, id="ok_enabled_threads"),
+        ],
+    )
+    def test_build_profile(self, basic_features, basic_params, profile, backend, expected_pipeline, expected_scoring):
+        search = ChurnPipeline(
+            basic_params,
+            numeric_features=basic_features["numeric"],
+            categorical_features=basic_features["categorical"],
+            execution={"backend": backend},
+            profile=profile,
+        ).build()
+
+        assert type(search.estimator) is expected_pipeline
+        assert isinstance(search.scoring, expected_scoring)
+
+
+class TestProfiling:
+    @pytest.fixture
+    def data(self):
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(
+            {
+                "age": rng.normal(40, 10, 200),
+                "salary": rng.normal(5e4, 1e4, 200),
+                "state": rng.choice(["a", "b", None], 200),
+            }
+        )
+        return X, pd.Series(rng.integers(0, 2, 200))
+
+    @pytest.fixture
+    def search(self):
+        return ChurnPipeline(
+            {"mlp_classifier__hidden_layer_sizes": [(4,), (8,)], "mlp_classifier__max_iter": [5]},
+            numeric_features=[0, 1],
+            categorical_features=[2],
+            search={"cv": 2},
+            execution={"backend": "serial"},
+            profile=True,
+        ).build()
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_profile_candidates(self, data, search):
+        search.fit(*data)
+
+        candidates = profile_candidates(search)
+
+        assert [c["params"] for c in candidates] == search.cv_results_["params"]
+        assert all(c["fit_cpu_seconds"] > 0 and c["fit_peak_memory_mb"] > 0 for c in candidates)
+        assert search.best_estimator_.profile_["wall_seconds"] > 0
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_profile_candidates_threads(self, data):
+        search = ChurnPipeline(
+            {"mlp_classifier__hidden_layer_sizes": [(4,), (8,)], "mlp_classifier__max_iter": [5]},
+            numeric_features=[0, 1],
+            categorical_features=[2],
+            search={"cv": 2},
+            execution={"backend": "threads", "n_jobs": 2},
+            profile=True,
+        ).build()
+        # Candidates are fitted in turn, the pipeline built for the threads backend doesn't measure memory either way
+        search.set_params(n_jobs=1).fit(*data)
+
+        candidates = profile_candidates(search)
+
+        assert all(c["fit_cpu_seconds"] > 0 and c["fit_peak_memory_mb"] is None for c in candidates)
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_profile_steps(self, data, search):
+        profiler = Profiler()
+
+        estimator = profile_steps(search.estimator, *data, profiler)
+
+        assert [r["name"] for r in profiler.records] == [
+            "preprocessing/numerical/cast/fit",
+            "preprocessing/numerical/cast/transform",
+            "preprocessing/numerical/imputer/fit",
+            "preprocessing/numerical/imputer/transform",
+            "preprocessing/numerical/outlier_clipper/fit",
+            "preprocessing/numerical/outlier_clipper/transform",
+            "preprocessing/numerical/scaler/fit",
+            "preprocessing/numerical/scaler/transform",
+            "preprocessing/categorical/imputer/fit",
+            "preprocessing/categorical/imputer/transform",
+            "preprocessing/categorical/onehot/fit",
+            "preprocessing/categorical/onehot/transform",
+            "mlp_classifier/fit",
+        ]
+        assert hasattr(estimator[-1], "coefs_")
+        assert not hasattr(search.estimator[-1], "coefs_")
+
+
+def is_memmap(values):
+    values = getattr(values, "codes", values)
+    while values is not None and not isinstance(values, np.memmap):
+        values = values.base
+    return values is not None
+
+
+class TestExecution:
+    @pytest.fixture
+    def data(self):
+        X = pd.DataFrame({"age": [30, 40, 50, 60], "state": ["a", "b", None, "a"]}, index=[3, 1, 2, 0])
+        return X, pd.Series([0, 1, 0, 1], index=X.index, name="target")
+
+    @pytest.mark.parametrize(
+        ["execution", "shared"],
+        [
+            pytest.param({"backend": "processes", "n_jobs": 2}, True, id="ok_processes"),
+            pytest.param({"backend": "processes", "n_jobs": 2, "share": False}, False, id="ok_processes_copy"),
+            pytest.param({"backend": "threads", "n_jobs": 2}, False, id="ok_threads"),
+            pytest.param({"backend": "serial"}, False, id="ok_serial"),
+        ],
+    )
+    def test_shared(self, data, tmp_path, execution, shared):
+        X, y = data
+
+        with Execution(**execution, temp_folder=str(tmp_path)).shared(X, y) as (X_shared, y_shared):
+            assert X_shared.index.equals(X.index)
+            assert X_shared.isna().equals(X.isna())
+            assert X_shared[X.notna()].astype(object).equals(X[X.notna()].astype(object))
+            np.testing.assert_array_equal(y_shared, y)
+            assert y_shared.index.equals(y.index)
+            assert all(is_memmap(X_shared[c].values) for c in X_shared) == shared
+            assert is_memmap(y_shared.values) == shared
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_parallel(self):
+        with Execution("threads", n_jobs=2).parallel():
+            results = joblib.Parallel()(joblib.delayed(abs)(i) for i in [-1, -2])
+
+        assert results == [1, 2]
+
+    def test_error(self):
+        with pytest.raises(ValueError):
+            Execution("gpu")
+
+
+class TestTransformerCache:
+    @pytest.fixture
+    def data(self):
+        rng = np.random.default_rng(0)
+        return rng.normal(size=(50, 3)), rng.integers(0, 2, 50)
+
+    def build(self, memory, alpha):
+        return Pipeline(
+            [("scaler", StandardScaler()), ("mlp_classifier", MLPClassifier(alpha=alpha, max_iter=5))], memory=memory
+        )
+
+    @pytest.mark.filterwarnings("ignore")
+    @pytest.mark.parametrize(
+        ["max_size", "expected"],
+        [
+            pytest.param(1, {"hits": 1, "misses": 1, "evictions": 0, "entries": 1}, id="ok_hit"),
+            pytest.param(0.0001, {"hits": 0, "misses": 2, "evictions": 0, "entries": 0}, id="ok_too_large_to_cache"),
+        ],
+    )
+    def test_cache(self, data, max_size, expected):
+        memory = TransformerCache("test", max_size=max_size)
+        memory.clear()
+        X, y = data
+
+        first = self.build(memory, alpha=0.1).fit(X, y)
+        second = self.build(pickle.loads(pickle.dumps(memory)), alpha=0.2).fit(X, y)
+
+        stats = memory.stats()
+        assert {k: stats[k] for k in expected} == expected
+        np.testing.assert_allclose(first[0].transform(X), second[0].transform(X))
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_cache_eviction(self, data):
+        memory = TransformerCache("test", max_size=1.5 * data[0].nbytes / 1024**2)
+        memory.clear()
+        X, y = data
+
+        self.build(memory, alpha=0.1).fit(X, y)
+        self.build(memory, alpha=0.1).fit(X + 1, y)
+        self.build(memory, alpha=0.1).fit(X, y)
+
+        assert memory.stats()["evictions"] == 2
+        assert memory.stats()["hits"] == 0
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_cache_workers(self, data):
+        memory = TransformerCache("test-workers", max_size=1)
+        memory.clear()
+        X, y = data
+        pipelines = [self.build(memory, alpha=alpha) for alpha in (0.1, 0.2, 0.3, 0.4)]
+
+        with joblib.parallel_config(backend="loky", n_jobs=2):
+            pids = joblib.Parallel()(joblib.delayed(lambda p: (p.fit(X, y), os.getpid())[1])(p) for p in pipelines)
+        stats = memory.stats()
+        Execution("processes").release()
+        memory.clear()
+
+        assert stats["processes"] == len(set(pids))
+        assert stats["hits"] + stats["misses"] == 4
+        assert stats["misses"] == stats["entries"] == len(set(pids))
+        assert memory.stats()["processes"] == 0
+
+
+class TestStreamingTrainer:
+    @pytest.fixture(scope="class")
+    def path(self, tmp_path_factory):
+        df = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet").head(4000)
+        df.loc[df.index[::50], ["Balance", "Geography"]] = None
+        path = tmp_path_factory.mktemp("streaming") / "data.parquet"
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, row_group_size=500)
+        return path
+
+    def trainer(self, path, **kwargs):
+        return StreamingTrainer(
+            path,
+            target="Exited",
+            id_column="CustomerId",
+            drop=["RowNumber", "CustomerId", "Surname"],
+            seed=0,
+            **kwargs,
+        )
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_fit(self, path):
+        trainer = self.trainer(path, epochs=3)
+        sample = trainer.scan()
+        numeric = [sample.columns.get_loc(c) for c in ["CreditScore", "Age", "Tenure", "Balance", "EstimatedSalary"]]
+        categorical = [sample.columns.get_loc(c) for c in ["Geography", "Gender"]]
+        estimator = ChurnPipeline({}, numeric_features=numeric, categorical_features=categorical).estimator()
+        estimator.set_params(mlp_classifier__hidden_layer_sizes=[8])
+
+        trainer.fit(estimator, sample)
+
+        df = pd.read_parquet(path)
+        train = df[~hash_split(df["CustomerId"], 0.2, 0)].drop(columns="Exited")
+        expected = clone(estimator.named_steps["preprocessing"]).fit(train)
+        steps, expected_steps = (
+            p.named_transformers_["numerical"].named_steps for p in (estimator.named_steps["preprocessing"], expected)
+        )
+        assert trainer.rows == len(train)
+        assert len(trainer.losses) == 3 and trainer.losses[-1] < trainer.losses[0]
+        np.testing.assert_allclose(steps["imputer"].statistics_, expected_steps["imputer"].statistics_, rtol=0.01)
+        np.testing.assert_allclose(steps["scaler"].mean_, expected_steps["scaler"].mean_, rtol=0.01)
+        np.testing.assert_allclose(steps["scaler"].scale_, expected_steps["scaler"].scale_, rtol=0.02)
+        categories = estimator.named_steps["preprocessing"].named_transformers_["categorical"]["onehot"].categories_
+        assert [c.tolist() for c in categories] == [["France", "Germany", "Spain", "missing"], ["Female", "Male"]]
+        assert estimator.predict_proba(train.head(5)).shape == (5, 2)
+
+        y, probabilities = trainer.test_scores(estimator)
+        assert len(y) == len(probabilities) == trainer.test_rows == len(df) - len(train)
+
+    def test_scan_error(self, path):
+        with pytest.raises(ValueError, match="Missing id column"):
+            StreamingTrainer(path, target="Exited", id_column="Id").scan()
+
+    def test_fit_empty_sample(self, path):
+        trainer = self.trainer(path)
+        sample = trainer.scan()
+        estimator = ChurnPipeline({}, numeric_features=[0], categorical_features=[1]).estimator()
+
+        with pytest.raises(ValueError, match="Empty sample"):
+            trainer.fit(estimator, sample.head(0))
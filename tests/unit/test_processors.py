@@ -0,0 +1,184 @@
+import copy
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+
+from mlops.config import MODEL_CONFIG, ROOT_PATH
+from mlops.processors.churn import ChurnProcessor
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    df = pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet").head(1500)
+    return df.drop(columns=["Exited"]), df["Exited"]
+
+
+def build_config(profiling=None, **retrain):
+    config = copy.deepcopy(MODEL_CONFIG)
+    churn_config = config["models"]["churn"]
+    churn_config["param_grid"] = {"mlp_classifier__hidden_layer_sizes": [[8, 1]], "mlp_classifier__max_iter": [50]}
+    churn_config["search"] = {"strategy": "grid", "cv": 2}
+    churn_config["execution"] = {"backend": "serial"}
+    churn_config["retrain"] = {"max_iter": 20, **retrain}
+    churn_config["profiling"] = profiling or {"enabled": False}
+    return config
+
+
+@pytest.mark.filterwarnings("ignore")
+class TestChurnProcessor:
+    @pytest.mark.parametrize(
+        ["max_degradation", "expected_mode"],
+        [
+            pytest.param(1.0, "warm_start", id="ok_warm_start"),
+            pytest.param(-1.0, "full", id="ok_fallback_to_full_search"),
+        ],
+    )
+    def test_retrain(self, dataset, max_degradation, expected_mode):
+        X, y = dataset
+        processor = ChurnProcessor(build_config(max_degradation=max_degradation)).train(X.head(1000), y.head(1000))
+        estimator = processor.pipeline.best_estimator_
+        numerical = estimator.named_steps["preprocessing"].named_transformers_["numerical"]
+        coefs = estimator[-1].coefs_[0].copy()
+
+        processor.retrain(X, y, X.index[1000:])
+
+        assert processor.training["mode"] == expected_mode
+        assert processor.training["samples"] == 1500
+        if expected_mode == "warm_start":
+            updated = processor.pipeline
+            assert not hasattr(updated, "cv_results_") and updated is not estimator
+            assert processor.training["params"] == {
+                "mlp_classifier__hidden_layer_sizes": [8, 1],
+                "mlp_classifier__max_iter": 50,
+            }
+            assert updated[-1].max_iter == 50
+            assert updated[-1].coefs_[0].shape == coefs.shape
+            assert (updated[-1].coefs_[0] != coefs).any()
+            numerical_updated = updated.named_steps["preprocessing"].named_transformers_["numerical"]
+            assert (
+                numerical_updated.named_steps["scaler"].n_samples_seen_
+                == numerical.named_steps["scaler"].n_samples_seen_ + 400
+            )
+
+            processor.retrain(X, y, X.index[:0])
+            assert processor.training["mode"] == "unchanged"
+            assert processor.training["params"]["mlp_classifier__max_iter"] == 50
+
+    def test_retrain_no_new_rows(self, dataset):
+        X, y = dataset
+        processor = ChurnProcessor(build_config()).train(X.head(200), y.head(200))
+        estimator = processor.pipeline.best_estimator_
+
+        processor.retrain(X.head(200), y.head(200), X.index[:0])
+
+        assert processor.training["mode"] == "unchanged"
+        assert processor.pipeline.best_estimator_ is estimator
+
+    def test_score(self, dataset, monkeypatch):
+        X, y = dataset
+        processor = ChurnProcessor(build_config()).train(X.head(1000), y.head(1000))
+        assert processor.pipeline.estimator.memory is None
+        assert processor.pipeline.best_estimator_.memory is None
+        expected = processor.pipeline.predict_proba(X)
+        calls = []
+
+        def predict_proba(X):
+            calls.append(len(X))
+            return expected
+
+        def predict(X):
+            raise AssertionError("Labels must be derived from the probabilities")
+
+        monkeypatch.setattr(processor.pipeline, "predict_proba", predict_proba)
+        monkeypatch.setattr(processor.pipeline, "predict", predict)
+        monkeypatch.setattr(processor.pipeline, "score", predict)
+
+        scores = processor.score(X)
+        metrics = processor.compute_metrics(X, y)
+
+        assert calls == [len(X), len(X)]
+        np.testing.assert_array_equal(scores.probabilities, expected)
+        np.testing.assert_array_equal(scores.labels, expected.argmax(axis=1))
+        assert metrics == {
+            "accuracy": accuracy_score(y, scores.labels),
+            "roc_auc_score": roc_auc_score(y, expected[:, 1]),
+            "f1_score": f1_score(y, scores.labels),
+        }
+        assert processor.compute_metrics(X, y, scores) == metrics
+        assert calls == [len(X), len(X)]
+
+    def test_profile(self, dataset, tmp_path):
+        X, y = dataset
+        config = build_config(profiling={"enabled": True})
+        model_path = tmp_path / "model.flm"
+
+        processor = ChurnProcessor(config).train(X, y)
+        processor.dump(processor.compute_metrics(X, y), model_path)
+        loaded = ChurnProcessor.load(model_path, resume_profile=True, config=config)
+        loaded.dump({}, model_path)
+
+        report = json.loads(ChurnProcessor.profile_path(model_path).read_text())
+        names = [section["name"] for section in report["sections"]]
+        assert names[names.index("train/search") :].count("dump") == 2
+        assert {"train", "train/steps/mlp_classifier/fit", "compute_metrics"} <= set(names)
+        assert all(section["wall_seconds"] >= 0 and "peak_memory_mb" in section for section in report["sections"])
+        assert len(report["candidates"]) == 1
+
+    def test_profile_disabled(self, dataset, tmp_path):
+        X, y = dataset
+        model_path = tmp_path / "model.flm"
+
+        ChurnProcessor(build_config()).train(X.head(200), y.head(200)).dump({}, model_path)
+
+        assert not ChurnProcessor.profile_path(model_path).exists()
+
+    def test_reference(self, dataset, tmp_path):
+        X, y = dataset
+        model_path = tmp_path / "model.flm"
+
+        ChurnProcessor(build_config()).train(X, y).dump({}, model_path)
+        reference = ChurnProcessor.load(model_path, config=build_config()).reference
+
+        assert reference["rows"] == len(X)
+        assert set(reference["numerical"]) == {
+            "CreditScore",
+            "Age",
+            "Tenure",
+            "Balance",
+            "NumOfProducts",
+            "HasCrCard",
+            "IsActiveMember",
+            "EstimatedSalary",
+        }
+        assert set(reference["categorical"]) == {"Geography", "Gender"}
+        assert sum(reference["output"]["shares"]) == pytest.approx(1.0)
+
+    def test_train_stream(self, dataset, tmp_path):
+        X, y = dataset
+        data_path, model_path = tmp_path / "data.parquet", tmp_path / "model.flm"
+        pq.write_table(
+            pa.Table.from_pandas(pd.concat([X, y], axis=1), preserve_index=False), data_path, row_group_size=300
+        )
+        config = build_config()
+        config["models"]["churn"]["streaming"] = {"epochs": 2, "sample_size": 200}
+
+        processor = ChurnProcessor(config).train_stream(data_path)
+        metrics = processor.compute_metrics_stream(data_path)
+        processor.dump(metrics, model_path)
+        loaded = ChurnProcessor.load(model_path, config=config)
+
+        assert loaded.training["mode"] == "stream"
+        assert loaded.training["row_groups"] == 5
+        assert 1000 < loaded.training["samples"] < 1400
+        assert loaded.training["params"] == {
+            "mlp_classifier__hidden_layer_sizes": [8, 1],
+            "mlp_classifier__max_iter": 50,
+        }
+        assert 100 < loaded.reference["rows"] < 300
+        assert set(metrics) == {"accuracy", "roc_auc_score", "f1_score"}
+        np.testing.assert_allclose(loaded.score(X.head(10)).probabilities, processor.score(X.head(10)).probabilities)
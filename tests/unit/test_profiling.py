@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from mlops.profiling import Profiler, measure, section
+
+
+class TestProfiler:
+    def test_section(self):
+        profiler = Profiler()
+
+        with profiler.section("outer"):
+            kept = np.ones(2**17)  # 1 MB
+            with profiler.section("inner"):
+                np.ones(2**18)  # 2 MB, freed on exit
+            with profiler.section("other"):
+                ...
+
+        records = {record["name"]: record for record in profiler.records}
+        assert list(records) == ["outer/inner", "outer/other", "outer"]
+        assert records["outer/inner"]["peak_memory_mb"] == pytest.approx(2, abs=0.1)
+        assert records["outer/other"]["peak_memory_mb"] < 0.1
+        assert records["outer"]["peak_memory_mb"] == pytest.approx(3, abs=0.1)
+        assert records["outer"]["wall_seconds"] >= records["outer/inner"]["wall_seconds"]
+        del kept
+
+    def test_section_without_memory(self):
+        profiler = Profiler(memory=False)
+
+        with profiler.section("step"):
+            ...
+
+        assert set(profiler.records[0]) == {"name", "wall_seconds", "cpu_seconds"}
+
+    def test_measure(self):
+        with measure() as measures:
+            np.ones(2**18)
+
+        assert measures["peak_memory_mb"] == pytest.approx(2, abs=0.1)
+        assert measures["cpu_seconds"] >= 0
+
+    def test_write_read(self, tmp_path):
+        profiler = Profiler(memory=False)
+        profiler.extra["candidates"] = [{"params": {"alpha": 1}}]
+        with profiler.section("train"):
+            ...
+
+        resumed = Profiler.read(profiler.write(tmp_path / "profile.json"), memory=False)
+        with resumed.section("dump"):
+            ...
+
+        assert [record["name"] for record in resumed.records] == ["train", "dump"]
+        assert resumed.report()["candidates"] == [{"params": {"alpha": 1}}]
+
+    @pytest.mark.parametrize(
+        ["profiler", "expected"],
+        [pytest.param(None, 0, id="ok_disabled"), pytest.param(Profiler(memory=False), 1, id="ok_enabled")],
+    )
+    def test_section_helper(self, profiler, expected):
+        with section(profiler, "step"):
+            ...
+
+        assert len(profiler.records if profiler is not None else []) == expected
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mlops.config import CHURN_ARTIFACT_PATH, ROOT_PATH
+from mlops.scoring import read_chunks, score
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return pd.read_parquet(ROOT_PATH / "data" / "churn" / "data.parquet").head(250)
+
+
+@pytest.fixture(params=["parquet", "jsonl"])
+def input_path(request, dataset, tmp_path):
+    path = tmp_path / f"input.{request.param}"
+    if request.param == "parquet":
+        dataset.to_parquet(path, row_group_size=100)
+    else:
+        dataset.to_json(path, orient="records", lines=True)
+    return path
+
+
+class TestScoring:
+    @pytest.mark.parametrize(
+        ["chunk_size", "expected"],
+        [
+            pytest.param(100, [100, 100, 50], id="ok_partial_last_chunk"),
+            pytest.param(250, [250], id="ok_single_chunk"),
+        ],
+    )
+    def test_read_chunks(self, input_path, chunk_size, expected):
+        assert [len(chunk) for chunk in read_chunks(input_path, chunk_size)] == expected
+
+    def test_read_chunks_error(self, tmp_path):
+        with pytest.raises(ValueError):
+            list(read_chunks(tmp_path / "input.csv", 10))
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_score(self, input_path, dataset, tmp_path):
+        output_path = tmp_path / "output.parquet"
+
+        summary = score(input_path, output_path, CHURN_ARTIFACT_PATH, chunk_size=100, keep=["CustomerId"])
+
+        result = pd.read_parquet(output_path)
+        assert summary["rows"] == len(dataset)
+        assert list(result.columns) == ["CustomerId", "prediction", "probability"]
+        assert result["CustomerId"].tolist() == dataset["CustomerId"].tolist()
+        assert result["probability"].between(0, 1).all()
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_score_numpy_backend(self, input_path, tmp_path):
+        sklearn_path, numpy_path = tmp_path / "sklearn.parquet", tmp_path / "numpy.parquet"
+
+        score(input_path, sklearn_path, CHURN_ARTIFACT_PATH, chunk_size=100)
+        score(input_path, numpy_path, CHURN_ARTIFACT_PATH, chunk_size=100, backend="numpy")
+
+        expected, result = pd.read_parquet(sklearn_path), pd.read_parquet(numpy_path)
+        assert result["probability"].dtype == np.float32
+        np.testing.assert_allclose(result["probability"], expected["probability"], atol=1e-4)
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_score_empty(self, input_path, dataset, tmp_path):
+        empty_path = input_path.with_name(f"empty{input_path.suffix}")
+        if input_path.suffix == ".parquet":
+            dataset.head(0).to_parquet(empty_path)
+        else:
+            empty_path.touch()
+        output_path = tmp_path / "output.parquet"
+
+        summary = score(empty_path, output_path, CHURN_ARTIFACT_PATH, keep=["CustomerId"])
+
+        result = pd.read_parquet(output_path)
+        assert summary["rows"] == 0
+        assert list(result.columns) == ["CustomerId", "prediction", "probability"]
+        assert len(result) == 0
+
+    @pytest.mark.filterwarnings("ignore")
+    def test_score_jsonl_types(self, dataset, tmp_path):
+        input_path, output_path = tmp_path / "input.jsonl", tmp_path / "output.parquet"
+        dataset = dataset.assign(
+            Note=[None] * 100 + ["note"] * (len(dataset) - 100),
+            Ref=list(range(200)) + [None] * (len(dataset) - 200),
+        )
+        dataset.to_json(input_path, orient="records", lines=True)
+
+        summary = score(input_path, output_path, CHURN_ARTIFACT_PATH, chunk_size=100, keep=["Note", "Ref"])
+
+        result = pd.read_parquet(output_path)
+        assert summary["rows"] == len(dataset)
+        assert result["Note"].tolist() == dataset["Note"].tolist()
+        assert result["Ref"].iloc[:200].tolist() == list(range(200))
+        assert result["Ref"].iloc[200:].isna().all()
+
+    def test_score_error(self, input_path, tmp_path):
+        with pytest.raises(ValueError):
+            score(input_path, tmp_path / "output.parquet", CHURN_ARTIFACT_PATH, backend="unknown")
@@ -0,0 +1,517 @@
+import asyncio
+import logging
+import threading
+import time
+import types
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from mlops.serving import (
+    ColumnarDecoder,
+    Counter,
+    Histogram,
+    MetricsMiddleware,
+    MicroBatcher,
+    ModelRegistry,
+    ModelReloader,
+    PredictionCache,
+    Registry,
+    TrafficSplitter,
+    current_timer,
+    footprint,
+    metrics,
+)
+from mlops.serving import registry as registry_module
+
+
+def double(rows):
+    if any(len(row) != 1 for row in rows):
+        raise ValueError("Wrong row")
+    return np.asarray(rows) * 2
+
+
+class TestMicroBatcher:
+    @pytest.mark.parametrize(
+        ["requests", "max_batch_size", "expected_batches"],
+        [
+            pytest.param([[[1]], [[2], [3]], [[4]]], 4, 1, id="ok_single_batch"),
+            pytest.param([[[1]], [[2], [3]], [[4]]], 2, 3, id="ok_split_by_size"),
+            pytest.param([[[1], [2], [3]]], 2, 1, id="ok_request_larger_than_batch"),
+        ],
+    )
+    async def test_submit(self, requests, max_batch_size, expected_batches):
+        batcher = MicroBatcher(double, max_batch_size=max_batch_size, max_wait=0.05)
+
+        results = await asyncio.gather(*[batcher.submit(rows) for rows in requests])
+        await batcher.close()
+
+        for rows, result in zip(requests, results):
+            np.testing.assert_array_equal(result, np.asarray(rows) * 2)
+        assert batcher.inference_time.count == expected_batches
+        assert batcher.queue_wait.count == len(requests)
+
+    async def test_submit_isolates_errors(self):
+        batcher = MicroBatcher(double, max_batch_size=8, max_wait=0.05)
+
+        results = await asyncio.gather(batcher.submit([[1]]), batcher.submit([[1, 2]]), return_exceptions=True)
+        await batcher.close()
+
+        np.testing.assert_array_equal(results[0], [[2]])
+        assert isinstance(results[1], ValueError)
+
+    async def test_drain(self):
+        def slow(rows):
+            time.sleep(0.01)
+            return double(rows)
+
+        batcher = MicroBatcher(slow, max_batch_size=1, max_wait=0.001)
+        clone = batcher.clone(double)
+
+        requests = [asyncio.ensure_future(batcher.submit([[i]])) for i in range(5)]
+        await asyncio.sleep(0)
+        await batcher.drain()
+
+        assert [r.result().tolist() for r in requests] == [[[2 * i]] for i in range(5)]
+        assert batcher.stats()["queue_size"] == 0 and batcher._worker is None
+        assert clone.func is double and clone.max_batch_size == 1 and clone.max_wait == 0.001
+
+    async def test_submit_queue_full(self):
+        batcher = MicroBatcher(double, max_batch_size=8, max_wait=0.05, max_queue_size=1)
+
+        with pytest.raises(asyncio.QueueFull):
+            await asyncio.gather(*[batcher.submit([[i]]) for i in range(3)])
+        await batcher.close()
+
+
+class TestMetrics:
+    def test_render(self):
+        registry = Registry()
+        counter = registry.register(Counter("requests_total", "Requests.", ("status",)))
+        histogram = registry.register(Histogram("latency_seconds", "Latency.", ("endpoint",), buckets=(0.1, 1.0)))
+
+        counter.inc(status=200)
+        counter.inc(2, status=200)
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value, endpoint='/a"b/')
+
+        assert registry.render().splitlines() == [
+            "# HELP requests_total Requests.",
+            "# TYPE requests_total counter",
+            'requests_total{status="200"} 3',
+            "# HELP latency_seconds Latency.",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{endpoint="/a\\"b/",le="0.1"} 1',
+            'latency_seconds_bucket{endpoint="/a\\"b/",le="1.0"} 2',
+            'latency_seconds_bucket{endpoint="/a\\"b/",le="+Inf"} 3',
+            'latency_seconds_sum{endpoint="/a\\"b/"} 5.55',
+            'latency_seconds_count{endpoint="/a\\"b/"} 3',
+        ]
+
+    @pytest.mark.parametrize(
+        ["labels", "raises"],
+        [
+            pytest.param({}, pytest.raises(ValueError), id="error_missing_label"),
+            pytest.param({"status": 200, "method": "GET"}, pytest.raises(ValueError), id="error_unknown_label"),
+        ],
+    )
+    def test_wrong_labels(self, labels, raises):
+        with raises:
+            Counter("requests_total", "Requests.", ("status",)).inc(**labels)
+
+    @pytest.mark.parametrize(
+        ["path", "status", "endpoint"],
+        [
+            pytest.param("/model/predict/", 200, "/model/predict/", id="ok_matched"),
+            pytest.param("/unknown/", 404, "unmatched", id="ok_unmatched"),
+        ],
+    )
+    async def test_middleware(self, path, status, endpoint):
+        async def app(scope, receive, send):
+            timer = current_timer()
+            timer.model = "test"
+            timer.lap("deserialization")
+            assert metrics.IN_FLIGHT.value() == 1
+            await send({"type": "http.response.start", "status": status, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def send(message):
+            ...
+
+        requests = metrics.REQUESTS.value(method="POST", endpoint=endpoint, status=status)
+        stages = metrics.STAGE_SECONDS.count(model="test", stage="serialization")
+
+        await MetricsMiddleware(app)({"type": "http", "method": "POST", "path": path}, None, send)
+
+        assert metrics.REQUESTS.value(method="POST", endpoint=endpoint, status=status) == requests + 1
+        assert metrics.STAGE_SECONDS.count(model="test", stage="serialization") == stages + 1
+        assert metrics.IN_FLIGHT.value() == 0
+        assert current_timer() is None
+
+
+class TestColumnarDecoder:
+    @pytest.fixture
+    def decoder(self):
+        return ColumnarDecoder(["Id", "Age", "Country"], ["Age"], {"Country": ["France", "Spain"]})
+
+    def test_json(self, decoder):
+        columns = decoder.json({"Age": [42, None, 30.5], "Country": ["Spain", None, "Italy"]})
+
+        np.testing.assert_array_equal(columns.numerical, [[42.0], [np.nan], [30.5]])
+        np.testing.assert_array_equal(columns.codes[0], [1, -1, 2])
+
+    def test_arrow(self, decoder):
+        table = pa.table(
+            {
+                "Id": [1, 2, 3],
+                "Age": pa.array([42, None, 30], type=pa.int64()),
+                "Country": pa.array(["Spain", None, "France"]).dictionary_encode(),
+            }
+        )
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+        columns = decoder.arrow(sink.getvalue().to_pybytes())
+
+        np.testing.assert_array_equal(columns.numerical, [[42.0], [np.nan], [30.0]])
+        np.testing.assert_array_equal(columns.codes[0], [1, -1, 0])
+
+    @pytest.mark.parametrize(
+        ["columns", "message"],
+        [
+            pytest.param({"Age": [1]}, "Missing columns: Country", id="error_missing"),
+            pytest.param({"Age": [1], "Country": ["Spain"], "Name": ["A"]}, "Unknown columns", id="error_unknown"),
+            pytest.param({"Country": ["Spain"], "Age": [1]}, "Columns out of order", id="error_order"),
+            pytest.param({"Age": ["old"], "Country": ["Spain"]}, "Wrong values for column 'Age'", id="error_dtype"),
+            pytest.param({"Age": [1, 2], "Country": ["Spain"]}, "different lengths", id="error_lengths"),
+            pytest.param([[1, "Spain"]], "must be an object", id="error_rows"),
+        ],
+    )
+    def test_json_error(self, decoder, columns, message):
+        with pytest.raises(ValueError, match=message):
+            decoder.json(columns)
+
+    def test_arrow_error(self, decoder):
+        table = pa.table({"Age": ["old"], "Country": ["Spain"]})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+        with pytest.raises(ValueError, match="must be numerical"):
+            decoder.arrow(sink.getvalue().to_pybytes())
+        with pytest.raises(ValueError, match="Wrong Arrow IPC stream"):
+            decoder.arrow(b"not arrow")
+
+
+class TestPredictionCache:
+    @pytest.mark.parametrize(
+        ["first", "second", "columns", "same"],
+        [
+            pytest.param([1, "Smith", 600, "France"], [2, "Jones", 600.0, "France"], [2, 3], True, id="ok_ignored"),
+            pytest.param([1, "Smith", None, "France"], [1, "Smith", float("nan"), "France"], None, True, id="ok_nan"),
+            pytest.param([1, "Smith", 600, "France"], [1, "Smith", 601, "France"], [2, 3], False, id="ok_different"),
+        ],
+    )
+    def test_key(self, first, second, columns, same):
+        cache = PredictionCache("test", columns=columns)
+
+        assert (cache.key(first) == cache.key(second)) == same
+
+    def test_key_wrong_row(self):
+        assert PredictionCache("test", columns=[0, 5]).key([1, 2]) is None
+
+    def test_lru_eviction(self):
+        value = np.zeros(2)
+        cache = PredictionCache("test", max_size=2.5 * (16 + value.nbytes + 200) / 1024**2)
+        keys = [cache.key([i]) for i in range(3)]
+
+        cache.put(keys[0], value)
+        cache.put(keys[1], value)
+        cache.get(keys[0])
+        cache.put(keys[2], value)
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_clone(self):
+        cache = PredictionCache("test", max_size=1, ttl=10, columns=[1])
+        key = cache.key([1, 2])
+        cache.put(key, np.zeros(2))
+
+        clone = cache.clone()
+
+        assert clone.get(key) is None and cache.get(key) is not None
+        assert (clone.max_bytes, clone.ttl, clone.columns) == (cache.max_bytes, cache.ttl, cache.columns)
+
+    def test_ttl(self):
+        cache = PredictionCache("test", ttl=0)
+        key = cache.key([1])
+        cache.put(key, np.zeros(2))
+
+        assert cache.get(key) is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_flush_on_artifact_change(self, tmp_path):
+        artifact = tmp_path / "model.flm"
+        artifact.write_bytes(b"v1")
+        cache = PredictionCache("test", watch=artifact, watch_interval=0)
+        key = cache.key([1])
+        cache.put(key, np.zeros(2))
+
+        assert cache.get(key) is not None
+
+        artifact.write_bytes(b"version 2")
+
+        assert cache.get(key) is None
+        assert cache.stats()["flushes"] == 1
+
+
+class TestModelReloader:
+    async def test_reload(self, tmp_path):
+        artifact = tmp_path / "model.flm"
+        artifact.write_bytes(b"v1")
+        served = []
+        reloader = ModelReloader("test", artifact, lambda: artifact.read_bytes(), served.append, interval=None)
+
+        result = await reloader.reload()
+
+        assert served == [b"v1"]
+        assert result.keys() == {"load_seconds", "swap_seconds"}
+        assert reloader.stats()["reloads"] == 1
+
+    async def test_reload_error(self, tmp_path):
+        def load():
+            raise ValueError("Broken artifact")
+
+        served = []
+        reloader = ModelReloader("test", tmp_path / "model.flm", load, served.append, interval=None)
+
+        with pytest.raises(ValueError):
+            await reloader.reload()
+
+        assert served == []
+        assert reloader.stats()["failures"] == 1
+
+    async def test_preload(self, tmp_path):
+        artifact = tmp_path / "model.flm"
+        artifact.write_bytes(b"v1")
+        served = []
+        reloader = ModelReloader(
+            "test", artifact, lambda: artifact.read_bytes(), served.append, interval=None, preload=True
+        )
+
+        await reloader.start()
+        assert served == []
+        await asyncio.sleep(0.05)
+        await reloader.close()
+
+        assert served == [b"v1"]
+        assert not reloader.stats()["loading"]
+
+    async def test_preload_retry(self, tmp_path):
+        artifact = tmp_path / "model.flm"
+        artifact.write_bytes(b"v1")
+        results = iter([OSError("Transient error"), OSError("Transient error")])
+        served = []
+
+        def load():
+            if (error := next(results, None)) is not None:
+                raise error
+            return artifact.read_bytes()
+
+        reloader = ModelReloader(
+            "test", artifact, load, served.append, interval=None, preload=True, retry_after=0.01, max_retry_after=0.02
+        )
+
+        await reloader.start()
+        for _ in range(100):
+            if served:
+                break
+            await asyncio.sleep(0.01)
+        await reloader.close()
+
+        assert served == [b"v1"]
+        assert reloader.stats()["failures"] == 2
+        assert reloader.stats()["served"]
+
+    async def test_watch(self, tmp_path):
+        artifact = tmp_path / "model.flm"
+        artifact.write_bytes(b"v1")
+        served = []
+        reloader = ModelReloader("test", artifact, lambda: artifact.read_bytes(), served.append, interval=0.01)
+        await reloader.start()
+
+        await asyncio.sleep(0.05)
+        artifact.write_bytes(b"version 2")
+        await asyncio.sleep(0.1)
+        await reloader.close()
+
+        assert served == [b"version 2"]
+        assert not reloader.stats()["watching"]
+
+
+class TestModelRegistry:
+    @pytest.mark.parametrize(
+        ["obj", "min_size", "max_size"],
+        [
+            pytest.param(np.zeros(1024**2, dtype=np.uint8), 1024**2, 1024**2 + 1024, id="ok_array"),
+            pytest.param(np.zeros(1024**2, dtype=np.uint8)[::2], 0, 1024, id="ok_view"),
+            pytest.param({"coefs": [np.zeros(1000), np.zeros(1000)]}, 16000, 17000, id="ok_nested"),
+        ],
+    )
+    def test_footprint(self, obj, min_size, max_size):
+        assert min_size <= footprint(obj) <= max_size
+
+    async def test_get_single_load(self):
+        loads = []
+
+        def load():
+            loads.append(1)
+            time.sleep(0.05)
+            return "model"
+
+        registry = ModelRegistry()
+        registry.register("test", load)
+
+        models = await asyncio.gather(*[registry.get("test") for _ in range(5)])
+        models.append(await registry.get("test"))
+
+        assert models == ["model"] * 6
+        assert len(loads) == 1
+        assert registry.stats()["hits"] == 1
+
+    async def test_lru_eviction(self):
+        registry = ModelRegistry(max_size=2.5)
+        for name in ("a", "b", "c"):
+            registry.register(name, lambda: np.zeros(1024**2, dtype=np.uint8))
+
+        for name in ("a", "b", "a", "c"):
+            await registry.get(name)
+
+        assert list(registry.models) == ["a", "c"]
+        assert registry.evictions == 1
+        assert registry.size <= registry.max_bytes
+
+    async def test_get_error(self):
+        results = iter([ValueError("Broken artifact"), "model"])
+
+        def load():
+            if isinstance(result := next(results), Exception):
+                raise result
+            return result
+
+        registry = ModelRegistry(retry_after=0)
+        registry.register("test", load)
+
+        with pytest.raises(ValueError):
+            await registry.get("test")
+        assert registry.stats()["failed"] == ["test"]
+        assert await registry.get("test") == "model"
+        assert registry.failures == 1
+        assert registry.stats()["failed"] == []
+        with pytest.raises(KeyError):
+            await registry.get("unknown")
+
+    async def test_get_error_backoff(self, monkeypatch):
+        now = 0.0
+        # Only the clock of the registry is frozen, the event loop keeps the real one
+        monkeypatch.setattr(
+            registry_module, "time", types.SimpleNamespace(monotonic=lambda: now, perf_counter=time.perf_counter)
+        )
+        loads = []
+
+        def load():
+            loads.append(now)
+            raise ValueError("Broken artifact")
+
+        registry = ModelRegistry(retry_after=10, max_retry_after=15)
+        registry.register("test", load)
+
+        for now in (0.0, 5.0, 10.0, 20.0, 25.0, 40.0):
+            with pytest.raises((ValueError, RuntimeError)):
+                await registry.get("test")
+
+        assert loads == [0.0, 10.0, 25.0, 40.0]
+        assert registry.failures == 4
+
+
+class TestTrafficSplitter:
+    @pytest.mark.parametrize(
+        ["canary_share", "expected"],
+        [
+            pytest.param(0.0, 0, id="ok_no_canary"),
+            pytest.param(0.25, 250, id="ok_share"),
+            pytest.param(1.0, 1000, id="ok_all_canary"),
+        ],
+    )
+    def test_pick_canary(self, canary_share, expected):
+        splitter = TrafficSplitter("test", canary_share=canary_share, seed=0)
+
+        assert sum(splitter.pick_canary() for _ in range(1000)) == pytest.approx(expected, abs=30)
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            pytest.param({"canary_share": 1.5}, id="error_share"),
+            pytest.param({"concurrency": 0}, id="error_concurrency"),
+        ],
+    )
+    def test_wrong_settings(self, kwargs):
+        with pytest.raises(ValueError):
+            TrafficSplitter("test", **kwargs)
+
+    async def test_mirror(self):
+        splitter = TrafficSplitter("test")
+
+        assert splitter.mirror("shadow", "shadow", lambda rows: [r % 2 for r in rows], [1, 2, 3, 4], [1, 0, 0, 0])
+        assert splitter.mirror("broken", "shadow", double, [[1, 2]], [0])
+        await splitter.join()
+        await splitter.close()
+
+        stats = splitter.stats()
+        assert stats["models"]["shadow"]["agreement"] == 0.75
+        assert stats["models"]["shadow"]["rows"] == 4
+        assert stats["failed"] == 1
+
+    async def test_mirror_drop(self):
+        splitter = TrafficSplitter("test", max_queue_size=1)
+
+        queued = [splitter.mirror("shadow", "shadow", lambda rows: rows, [1], [1]) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        await splitter.close()
+
+        assert queued == [True, False, False]
+        assert splitter.stats()["dropped"] == 2
+        assert splitter.stats()["models"]["shadow"]["requests"] == 1
+
+    async def test_mirror_concurrency(self):
+        splitter = TrafficSplitter("test", concurrency=2)
+        threads = set()
+
+        def predict(rows):
+            threads.add(threading.current_thread().name)
+            return rows
+
+        for _ in range(8):
+            splitter.mirror("shadow", "shadow", predict, [1], [1])
+        await splitter.join()
+        await splitter.close()
+
+        assert len(threads) <= 2
+        assert all(name.startswith("mirror") for name in threads)
+        assert splitter.stats()["models"]["shadow"]["requests"] == 8
+
+    async def test_mirror_failures(self, caplog):
+        splitter = TrafficSplitter("test")
+
+        with caplog.at_level(logging.WARNING, logger="mlops.serving.traffic"):
+            for _ in range(3):
+                splitter.mirror("broken", "shadow", double, [[1, 2]], [0])
+            await splitter.join()
+            await splitter.close()
+
+        assert splitter.stats()["failed"] == 3
+        assert len(caplog.records) == 1
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from mlops.sketches import FrequentItems, QuantileSketch
+
+
+class TestQuantileSketch:
+    @pytest.mark.parametrize(
+        ["data", "expected"],
+        [
+            pytest.param(np.array([1, 2, 3, 100]), np.array([1.75, 27.25]), id="ok_exact_small"),
+            pytest.param(np.array([1, np.nan, 2, 3, 100]), np.array([1.75, 27.25]), id="ok_missing_values"),
+            pytest.param(np.array([]), np.array([np.nan, np.nan]), id="ok_empty"),
+        ],
+    )
+    def test_quantile(self, data, expected):
+        sketch = QuantileSketch().update(data)
+
+        np.testing.assert_allclose(sketch.quantile([0.25, 0.75]), expected)
+
+    @pytest.mark.parametrize(
+        ["epsilon"],
+        [
+            pytest.param(0.05, id="ok_coarse"),
+            pytest.param(0.01, id="ok_default"),
+        ],
+    )
+    def test_rank_error(self, epsilon):
+        rng = np.random.default_rng(0)
+        data = rng.lognormal(size=200000)
+        quantiles = np.array([0.01, 0.25, 0.5, 0.75, 0.99])
+
+        sketch = QuantileSketch(epsilon=epsilon, seed=0)
+        for batch in np.array_split(data, 50):
+            sketch.update(batch)
+        ranks = np.searchsorted(np.sort(data), sketch.quantile(quantiles)) / len(data)
+
+        assert sketch.count == len(data)
+        assert sum(len(level) for level in sketch.levels) < 20 * sketch.k
+        np.testing.assert_allclose(ranks, quantiles, atol=epsilon)
+
+    def test_merge(self):
+        rng = np.random.default_rng(0)
+        data = rng.normal(size=100000)
+
+        sketch = QuantileSketch(seed=0).update(data[:60000]).merge(QuantileSketch(seed=1).update(data[60000:]))
+        ranks = np.searchsorted(np.sort(data), sketch.quantile([0.25, 0.75])) / len(data)
+
+        assert sketch.count == len(data)
+        assert (sketch.min, sketch.max) == (data.min(), data.max())
+        np.testing.assert_allclose(ranks, [0.25, 0.75], atol=0.01)
+
+    def test_cdf(self):
+        rng = np.random.default_rng(0)
+        data = rng.normal(size=100000)
+        points = np.array([-1.0, 0.0, 1.5])
+
+        sketch = QuantileSketch(seed=0)
+        for batch in np.array_split(data, 20):
+            sketch.update(batch)
+
+        np.testing.assert_allclose(sketch.cdf(points), (data[:, None] <= points).mean(axis=0), atol=0.01)
+        assert (sketch.cdf(data.min() - 1), sketch.cdf(data.max())) == (0.0, 1.0)
+        assert np.isnan(QuantileSketch().cdf(0.0))
+
+
+class TestFrequentItems:
+    @pytest.mark.parametrize(
+        ["capacity", "expected"],
+        [
+            pytest.param(8, {"a": 0.5, "b": 0.3, "c": 0.2}, id="ok_exact"),
+            pytest.param(2, {"a": 0.5, "c": 0.5}, id="ok_over_capacity"),
+        ],
+    )
+    def test_frequencies(self, capacity, expected):
+        items = FrequentItems(capacity).update(["a"] * 5 + ["b"] * 3).update(["c"] * 2)
+
+        assert items.count == 10
+        assert items.frequencies() == pytest.approx(expected)
+
+    def test_heavy_hitters(self):
+        rng = np.random.default_rng(0)
+        data = np.concatenate([np.full(3000, -1), rng.integers(0, 10000, size=7000)])
+        rng.shuffle(data)
+
+        items = FrequentItems(16)
+        for batch in np.array_split(data, 100):
+            items.update(batch.tolist())
+
+        assert len(items.counts) == 16
+        assert next(iter(items.frequencies())) == -1
+        assert 0.3 <= items.frequencies()[-1] <= 0.3 + 1 / 16
+
+    def test_merge(self):
+        items = FrequentItems(4).update(["a", "a", "b"]).merge(FrequentItems(4).update(["a", "c"]))
+
+        assert items.count == 5
+        assert items.frequencies() == pytest.approx({"a": 0.6, "b": 0.2, "c": 0.2})
@@ -50,6 +50,46 @@ class TestOutlierClipper:
         with raises:
             clipper.fit_transform(input)
 
+    @pytest.mark.parametrize(
+        ["epsilon", "batch_size"],
+        [
+            pytest.param(0.01, None, id="ok_sketch_fit"),
+            pytest.param(None, 1000, id="ok_partial_fit"),
+            pytest.param(0.001, 1000, id="ok_partial_fit_epsilon"),
+        ],
+    )
+    def test_clipper_approximate(self, epsilon, batch_size):
+        rng = np.random.default_rng(0)
+        data = rng.normal(size=(20000, 3)) * [1, 10, 100]
+        expected = OutlierClipper().fit(data)
+
+        clipper = OutlierClipper(epsilon=epsilon)
+        if batch_size is None:
+            clipper.fit(data)
+        else:
+            for start in range(0, len(data), batch_size):
+                clipper.partial_fit(data[start : start + batch_size])
+
+        scale = expected.upper_bounds_ - expected.lower_bounds_
+        np.testing.assert_allclose(clipper.lower_bounds_, expected.lower_bounds_, atol=0.05 * scale.max())
+        np.testing.assert_allclose(clipper.upper_bounds_, expected.upper_bounds_, atol=0.05 * scale.max())
+
+    @pytest.mark.parametrize(
+        ["data", "copy", "in_place"],
+        [
+            pytest.param(np.array([[1.0], [2.0], [3.0], [100.0]]), False, True, id="ok_in_place"),
+            pytest.param(np.array([[1.0], [2.0], [3.0], [100.0]]), True, False, id="ok_copy"),
+            pytest.param(np.array([[1], [2], [3], [100]]), False, False, id="ok_integer_copy"),
+        ],
+    )
+    def test_clipper_copy(self, data, copy, in_place):
+        clipper = OutlierClipper(copy=copy).fit(data)
+
+        result = clipper.transform(data)
+
+        assert (result is data) == in_place
+        np.testing.assert_allclose(result[:, 0], [1, 2, 3, 65.5], rtol=0.1)
+
 
 class TestFeatureSelector:
     @pytest.mark.parametrize(
@@ -95,3 +135,43 @@ class TestFeatureSelector:
         selector = FeatureSelector()
         with raises:
             selector.fit_transform(input, target)
+
+    @pytest.mark.parametrize(
+        ["chunk_size"],
+        [
+            pytest.param(None, id="ok_full"),
+            pytest.param(7, id="ok_chunked"),
+        ],
+    )
+    def test_selector_correlations(self, chunk_size):
+        rng = np.random.default_rng(0)
+        data = rng.normal(100, 5, (50, 4))
+        data[:, 3] = 1
+        target = data[:, 0] * 2 + rng.normal(size=50)
+        expected = [abs(np.corrcoef(data[:, i], target)[0, 1]) for i in range(3)] + [0]
+
+        selector = FeatureSelector(chunk_size=chunk_size).fit(data, target)
+
+        np.testing.assert_allclose(selector.correlations_, expected, atol=1e-10)
+
+    def test_selector_partial_fit(self):
+        rng = np.random.default_rng(0)
+        data = rng.normal(size=(60, 3))
+        target = data[:, 1] + rng.normal(size=60)
+
+        selector = FeatureSelector()
+        for start in range(0, 60, 20):
+            selector.partial_fit(data[start : start + 20], target[start : start + 20])
+
+        np.testing.assert_allclose(selector.correlations_, FeatureSelector().fit(data, target).correlations_)
+
+    def test_selector_missing_values(self):
+        data = np.array([[1, 1], [2, np.nan], [3, 3], [np.nan, 4], [5, 5]])
+        target = np.array([1, 2, 3, 4, 6])
+
+        selector = FeatureSelector().fit(data, target)
+
+        np.testing.assert_allclose(
+            selector.correlations_,
+            [abs(np.corrcoef([1, 2, 3, 5], [1, 2, 3, 6])[0, 1]), abs(np.corrcoef([1, 3, 4, 5], [1, 3, 4, 6])[0, 1])],
+        )